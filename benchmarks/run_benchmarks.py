@@ -0,0 +1,243 @@
+"""
+Benchmark Suite for the Influencer-Brand Matching System
+
+Generates a synthetic dataset, runs each pipeline stage against it and
+records throughput, latency percentiles and peak memory as JSON. Stub models
+are used by default so runs are offline and comparable between commits;
+pass --models real to benchmark the actual pipelines.
+
+Usage:
+    python -m benchmarks.run_benchmarks run --influencers 20 --posts 12 --comments 50
+    python -m benchmarks.run_benchmarks compare baseline.json latest.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from datetime import datetime
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+
+from scripts.data_analysis import InfluencerAnalyzer
+from scripts.analysis_cache import AnalysisCache
+from scripts.sponsor_match import (
+    InfluencerTable, BrandTable, match_brands_to_influencers, get_matches_with_pricing
+)
+from scripts.pricing_calculator import calculate_pricing, calculate_pricing_arrays
+from scripts.lookalike import LookalikeIndex
+from .synthetic_data import generate_dataset, generate_influencers, generate_brands
+from .stub_models import StubSentimentPipeline, StubZeroShotPipeline
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def _quiet(fn, *args):
+    """Call fn with its print output discarded"""
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return fn(*args)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+def measure(fn, items, memory=True):
+    """
+    Time fn(item) for every item, then measure peak Python allocation of a
+    second pass over the first item with tracemalloc (which skews timings,
+    hence the separate pass).
+    Returns dict with calls, throughput and latency percentiles in ms
+    """
+    durations = []
+    start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        _quiet(fn, item)
+        durations.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    latencies = np.asarray(durations) * 1000
+    result = {
+        "calls": len(durations),
+        "total_s": round(elapsed, 4),
+        "throughput_per_s": round(len(durations) / elapsed, 3) if elapsed > 0 else None,
+        "mean_ms": round(float(latencies.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3)
+    }
+
+    if memory and items:
+        tracemalloc.start()
+        _quiet(fn, items[0])
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_mem_mb"] = round(peak / 1024**2, 3)
+    return result
+
+def run(args):
+    """Generate data, benchmark every stage and write the results file"""
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="brandex_bench_")
+    languages = tuple(args.languages.split(","))
+    try:
+        usernames = generate_dataset(
+            data_dir, args.influencers, args.posts, args.comments, languages, args.seed
+        )
+
+        # A zero-size analysis cache keeps every analyze_influencer call doing the full work
+        no_cache = AnalysisCache(max_bytes=0)
+        if args.models == "real":
+            analyzer = InfluencerAnalyzer(data_dir=data_dir, analysis_cache=no_cache)
+        else:
+            analyzer = InfluencerAnalyzer(
+                data_dir=data_dir,
+                sentiment_analyzer=StubSentimentPipeline(),
+                post_classifier=StubZeroShotPipeline(),
+                analysis_cache=no_cache
+            )
+
+        stages = {}
+        stages["analyze_influencer"] = measure(analyzer.analyze_influencer, usernames, args.memory)
+        stages["generate_visualizations"] = measure(analyzer.generate_visualizations, usernames, args.memory)
+        stages["generate_report"] = measure(analyzer.generate_report, usernames, args.memory)
+
+        influencers = generate_influencers(args.match_influencers, args.seed)
+        brands = generate_brands(args.brands, args.seed)
+        influencer_table = InfluencerTable.from_influencers(influencers)
+        brand_table = BrandTable.from_brands(brands)
+        repeats = [None] * args.repeats
+
+        stages["match_brands_to_influencers"] = measure(
+            lambda _: match_brands_to_influencers(brand_table, influencer_table), repeats, args.memory
+        )
+        stages["get_matches_with_pricing"] = measure(
+            lambda _: get_matches_with_pricing(brand_table, influencer_table), repeats, args.memory
+        )
+        pairs = [(brands[i % len(brands)], influencers[i]) for i in range(min(len(influencers), 10000))]
+        stages["calculate_pricing"] = measure(lambda pair: calculate_pricing(*pair), pairs, args.memory)
+        stages["calculate_pricing_arrays"] = measure(
+            lambda _: calculate_pricing_arrays(
+                brand_table.product_cost[:, None], brand_table.roi_expectation[:, None],
+                influencer_table.average_reach[None, :]
+            ),
+            repeats, args.memory
+        )
+
+        # Clustered vectors stand in for pooled caption embeddings
+        rng = np.random.default_rng(args.seed)
+        centers = rng.standard_normal((max(args.match_influencers // 100, 1), 384), dtype=np.float32)
+        vectors = centers[rng.integers(0, len(centers), args.match_influencers)]
+        vectors = vectors + 0.6 * rng.standard_normal(vectors.shape, dtype=np.float32)
+        index = LookalikeIndex(384, index_type=args.lookalike_index,
+                               nlist=min(1024, max(args.match_influencers // 40, 1)))
+        index.add([influencer.name for influencer in influencers], vectors)
+        queries = [vectors[i] for i in range(min(len(vectors), 200))]
+        stages["lookalike_search"] = measure(lambda vector: index.search(vector, k=10), queries, args.memory)
+    finally:
+        if not args.data_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "models": args.models,
+            "params": {
+                "influencers": args.influencers,
+                "posts": args.posts,
+                "comments": args.comments,
+                "languages": list(languages),
+                "brands": args.brands,
+                "match_influencers": args.match_influencers,
+                "repeats": args.repeats,
+                "lookalike_index": args.lookalike_index,
+                "seed": args.seed
+            }
+        },
+        "stages": stages
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['meta']['commit'] or 'latest'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=4)
+
+    for name, stage in stages.items():
+        print(f"{name:30s} p50 {stage['p50_ms']:10.3f} ms  p95 {stage['p95_ms']:10.3f} ms  "
+              f"{stage['throughput_per_s']}/s  peak {stage.get('peak_mem_mb', '-')} MB")
+    print(f"\nResults saved to {output}")
+    return 0
+
+def compare(args):
+    """Compare two results files and flag stages whose p50 latency regressed"""
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r', encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    if baseline["meta"]["params"] != candidate["meta"]["params"]:
+        print("Warning: benchmark parameters differ; results may not be comparable")
+
+    regressions = []
+    for name, new in candidate["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old:
+            print(f"{name:30s} (new stage)")
+            continue
+        change = (new["p50_ms"] - old["p50_ms"]) / old["p50_ms"] if old["p50_ms"] else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:30s} {old['p50_ms']:10.3f} -> {new['p50_ms']:10.3f} ms ({change:+.1%}){flag}")
+
+    return 1 if regressions else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis and matching pipeline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--influencers", type=int, default=10, help="synthetic profiles to analyze")
+    run_parser.add_argument("--posts", type=int, default=7, help="posts per profile")
+    run_parser.add_argument("--comments", type=int, default=20, help="comments per post")
+    run_parser.add_argument("--languages", default="en,hi,ml", help="comma-separated language labels")
+    run_parser.add_argument("--brands", type=int, default=50, help="brands for matching")
+    run_parser.add_argument("--match-influencers", type=int, default=100000, help="influencers for matching")
+    run_parser.add_argument("--repeats", type=int, default=5, help="repeats of the whole-set matching stages")
+    run_parser.add_argument("--lookalike-index", choices=["flat", "ivfflat", "ivfpq"], default="ivfflat",
+                            help="index type for the lookalike search stage")
+    run_parser.add_argument("--models", choices=["stub", "real"], default="stub")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip peak memory passes")
+    run_parser.add_argument("--data-dir", help="keep the synthetic dataset in this directory")
+    run_parser.add_argument("-o", "--output", help="results file (default: benchmarks/results/<commit>.json)")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = subparsers.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.10, help="allowed p50 slowdown (0.10 = 10%%)")
+    compare_parser.set_defaults(handler=compare)
+
+    return parser
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    sys.exit(args.handler(args))
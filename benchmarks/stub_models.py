@@ -0,0 +1,80 @@
+"""
+Stub Models for Offline Benchmarks
+
+Drop-in replacements for the Hugging Face pipelines used by InfluencerScraper
+and InfluencerAnalyzer. They return outputs in the same shape, derived
+deterministically from the input text, so benchmarks can run without network
+access or model weights and measure everything around inference.
+"""
+import zlib
+
+def _text_hash(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+class StubSentimentPipeline:
+    """Mimics nlptown/bert-base-multilingual-uncased-sentiment ("1 star".."5 stars")"""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.calls += 1
+        results = []
+        for text in texts:
+            stars = _text_hash(text) % 5 + 1
+            label = f"{stars} star" if stars == 1 else f"{stars} stars"
+            results.append({"label": label, "score": 0.5 + (_text_hash(text) % 50) / 100})
+        return results
+
+class StubZeroShotPipeline:
+    """Mimics facebook/bart-large-mnli zero-shot classification"""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, sequences, candidate_labels, **kwargs):
+        single = isinstance(sequences, str)
+        sequences = [sequences] if single else sequences
+        self.calls += 1
+        results = []
+        for sequence in sequences:
+            offset = _text_hash(sequence) % len(candidate_labels)
+            labels = candidate_labels[offset:] + candidate_labels[:offset]
+            n = len(labels)
+            scores = [(n - i) / (n * (n + 1) / 2) for i in range(n)]
+            results.append({"sequence": sequence, "labels": labels, "scores": scores})
+        return results[0] if single else results
+
+class StubLanguagePipeline:
+    """Mimics papluca/xlm-roberta-base-language-detection"""
+    def __init__(self, languages=("en", "hi", "ml")):
+        self.languages = list(languages)
+        self.calls = 0
+
+    def __call__(self, texts, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.calls += 1
+        return [
+            {"label": self.languages[_text_hash(text) % len(self.languages)], "score": 0.9}
+            for text in texts
+        ]
+
+class StubEmbeddingPipeline:
+    """Mimics a sentence-transformers feature-extraction pipeline ([1, tokens, dim] per text)"""
+    def __init__(self, dim=384):
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, texts, **kwargs):
+        import numpy as np
+        single = isinstance(texts, str)
+        texts = [texts] if single else texts
+        self.calls += 1
+        results = []
+        for text in texts:
+            # Tokens are seeded by word, so captions sharing words land close together
+            words = text.lower().split() or [""]
+            tokens = [np.random.default_rng(_text_hash(word)).standard_normal(self.dim).tolist() for word in words]
+            results.append([tokens])
+        return results[0] if single else results
@@ -0,0 +1,154 @@
+"""
+Synthetic Influencer Data Generator
+
+Writes `{username}_profile.json` files in the same schema as
+InfluencerScraper.scrape_profile, and builds Brand/Influencer records for the
+matcher, at any scale and reproducibly from a seed.
+"""
+import os
+import json
+import random
+from datetime import datetime, timedelta
+from scripts.sponsor_match import Brand, Influencer
+
+CATEGORY_WORDS = {
+    "Fashion": ["outfit", "style", "ootd", "streetwear", "denim"],
+    "Food": ["recipe", "biryani", "foodie", "dessert", "brunch"],
+    "Fitness": ["workout", "gymlife", "protein", "cardio", "yoga"],
+    "Travel": ["wanderlust", "beach", "mountains", "roadtrip", "kerala"],
+    "Tech": ["unboxing", "gadget", "smartphone", "review", "setup"],
+    "Beauty": ["skincare", "makeup", "glow", "serum", "lipstick"]
+}
+FILLER_WORDS = ["today", "love", "new", "best", "weekend", "with", "my", "this", "so", "amazing"]
+SHORT_COMMENTS = ["nice", "🔥🔥", "😍", "wow", "love it", "❤️❤️❤️", "superb", "👏👏"]
+LOCATIONS = ["Mumbai", "Delhi", "Bengaluru", "Kochi", "Chennai", "Dubai", "London", None]
+AGES = ["13-17", "18-25", "26-35", "36-45"]
+GENDERS = ["male", "female"]
+COUNTRIES = ["IN", "US", "UK", "AE"]
+
+def _caption(rng, category, n_words):
+    words = [rng.choice(FILLER_WORDS) for _ in range(n_words)]
+    words += [rng.choice(CATEGORY_WORDS[category]) for _ in range(max(1, n_words // 4))]
+    rng.shuffle(words)
+    hashtags = [f"#{rng.choice(CATEGORY_WORDS[category])}" for _ in range(rng.randint(1, 4))]
+    return " ".join(words + hashtags), [tag[1:] for tag in hashtags]
+
+def _comment(rng):
+    if rng.random() < 0.6:
+        return rng.choice(SHORT_COMMENTS)
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(3, 25)))
+
+def generate_profile(username, n_posts=7, comments_per_post=20, languages=("en", "hi", "ml"), rng=None):
+    """Build one synthetic profile dict in the scrape_profile schema"""
+    rng = rng or random.Random()
+    followers = int(10 ** rng.uniform(3, 7))
+    category = rng.choice(list(CATEGORY_WORDS))
+    today = datetime(2024, 6, 1)
+
+    profile_data = {
+        "username": username,
+        "full_name": username.replace("_", " ").title(),
+        "biography": f"{category} creator",
+        "followers": followers,
+        "following": rng.randint(50, 2000),
+        "posts_count": n_posts + rng.randint(0, 500),
+        "is_business": rng.random() < 0.5,
+        "business_category": category,
+        "scrape_date": today.strftime("%Y-%m-%d"),
+        "demographics": {"estimated_age": None, "gender": None, "location": None},
+        "geographic_reach": {}
+    }
+
+    posts = []
+    engagement_sum = 0
+    for i in range(n_posts):
+        likes = int(followers * rng.uniform(0.005, 0.12))
+        caption, hashtags = _caption(rng, category, rng.randint(5, 60))
+        location = rng.choice(LOCATIONS)
+        comment_data = [
+            {
+                "text": _comment(rng),
+                "owner": f"fan_{rng.randint(0, 10**6)}",
+                "created_at": (today - timedelta(days=i)).strftime("%Y-%m-%d"),
+                "likes": rng.randint(0, 50)
+            }
+            for _ in range(comments_per_post)
+        ]
+        engagement = (likes + comments_per_post) / followers
+        engagement_sum += engagement
+        posts.append({
+            "post_id": f"{username}_{i}",
+            "post_url": f"https://www.instagram.com/p/{username}_{i}/",
+            "likes": likes,
+            "comments": comments_per_post,
+            "caption": caption,
+            "hashtags": hashtags,
+            "posted_on": (today - timedelta(days=3 * i)).strftime("%Y-%m-%d"),
+            "location": location,
+            "comment_data": comment_data,
+            "detected_language": rng.choice(languages),
+            "language_confidence": rng.uniform(0.6, 1.0),
+            "engagement_rate": engagement * 100
+        })
+        if location:
+            profile_data["geographic_reach"][location] = profile_data["geographic_reach"].get(location, 0) + 1
+
+    profile_data["engagement_rate"] = round(engagement_sum / n_posts * 100, 2) if n_posts else 0
+    profile_data["posts"] = posts
+    return profile_data
+
+def generate_dataset(out_dir, n_influencers=10, n_posts=7, comments_per_post=20,
+                     languages=("en", "hi", "ml"), seed=0):
+    """
+    Write n_influencers synthetic profiles to out_dir
+    Returns the list of generated usernames
+    """
+    rng = random.Random(seed)
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    usernames = []
+    for i in range(n_influencers):
+        username = f"synthetic_{i:06d}"
+        profile_data = generate_profile(username, n_posts, comments_per_post, languages, rng)
+        with open(os.path.join(out_dir, f"{username}_profile.json"), 'w', encoding='utf-8') as f:
+            json.dump(profile_data, f, ensure_ascii=False, indent=4)
+        usernames.append(username)
+    return usernames
+
+def generate_influencers(n, seed=0):
+    """Synthetic Influencer records for matching benchmarks"""
+    rng = random.Random(seed)
+    return [
+        Influencer(
+            name=f"synthetic_{i:06d}",
+            content_type=rng.choice(list(CATEGORY_WORDS)),
+            audience_stats={
+                "age": rng.choice(AGES),
+                "gender": rng.choice(GENDERS),
+                "location": rng.choice(COUNTRIES)
+            },
+            average_reach=int(10 ** rng.uniform(3, 6)),
+            engagement_rate=rng.uniform(0.5, 12)
+        )
+        for i in range(n)
+    ]
+
+def generate_brands(n, seed=0):
+    """Synthetic Brand records for matching benchmarks"""
+    rng = random.Random(seed + 1)
+    brands = []
+    for i in range(n):
+        target_audience = {"location": rng.choice(COUNTRIES)}
+        if rng.random() < 0.7:
+            target_audience["age"] = rng.choice(AGES)
+        if rng.random() < 0.4:
+            target_audience["gender"] = rng.choice(GENDERS)
+        brands.append(Brand(
+            name=f"brand_{i:04d}",
+            industry=rng.choice(list(CATEGORY_WORDS)),
+            target_audience=target_audience,
+            product_cost=round(rng.uniform(100, 5000), 2),
+            roi_expectation=rng.choice([10, 20, 30, 50])
+        ))
+    return brands
@@ -23,7 +23,8 @@ SUPPORTED_LANGUAGES = ["en", "hi", "ml"]
 # Data storage
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 
-# Project progress tracking
+# Project progress tracking: defaults for steps not yet recorded in the
+# run-state store (scripts/run_state.py)
 PROJECT_PROGRESS = {
     "step_1_data_collection": "in_progress",
     "step_2_data_analysis": "pending",
@@ -35,18 +36,8 @@ PROJECT_PROGRESS = {
 def update_progress(step, status):
     """Update the progress of a specific step"""
     if step in PROJECT_PROGRESS:
-        PROJECT_PROGRESS[step] = status
-        
-        # Save progress to a file
-        progress_file = os.path.join(DATA_DIR, "project_progress.json")
-        
-        # Create DATA_DIR if it doesn't exist
-        if not os.path.exists(DATA_DIR):
-            os.makedirs(DATA_DIR)
-            
-        with open(progress_file, 'w') as f:
-            import json
-            json.dump(PROJECT_PROGRESS, f, indent=4)
-        
+        # Imported here: the run-state store itself reads this module
+        from scripts.run_state import shared_run_state
+        shared_run_state().set_step(step, status)
         return True
-    return False
\ No newline at end of file
+    return False
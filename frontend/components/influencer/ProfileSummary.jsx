@@ -2,14 +2,18 @@ import { useState, useEffect } from 'react'
 import { BarChart, Bar, XAxis, YAxis, ResponsiveContainer } from 'recharts'
 import axios from 'axios'
 
-export default function ProfileSummary() {
+export default function ProfileSummary({ username }) {
   const [profileData, setProfileData] = useState(null)
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
+    if (!username) {
+      setLoading(false)
+      return
+    }
     const fetchProfile = async () => {
       try {
-        const response = await axios.get('/api/influencer/profile')
+        const response = await axios.get('/api/influencer/profile', { params: { username } })
         setProfileData(response.data)
       } catch (error) {
         console.error('Error fetching profile:', error)
@@ -18,7 +22,7 @@ export default function ProfileSummary() {
       }
     }
     fetchProfile()
-  }, [])
+  }, [username])
 
   if (loading) {
     return <div className="bg-white rounded-lg shadow p-6">Loading profile...</div>
@@ -21,6 +21,7 @@ export default function handler(req, res) {
     fs.writeFileSync(envPath, envContent)
     return res.status(200).json({ 
       success: true,
+      username,
       message: 'Instagram credentials saved'
     })
   } catch (error) {
@@ -1,37 +1,40 @@
 import axios from 'axios'
-import { InstagramClient } from 'instagram-graph-api'
+
+// Python API (scripts/api_server.py) that serves cached profile data
+const API_URL = process.env.ANALYTICS_API_URL || 'http://127.0.0.1:5000'
 
 export default async function handler(req, res) {
   try {
-    // Initialize Instagram client with credentials from .env
-    const client = new InstagramClient({
-      username: process.env.INSTAGRAM_USERNAME,
-      password: process.env.INSTAGRAM_PASSWORD
-    })
+    const username = req.query.username
+    if (!username) {
+      return res.status(400).json({ error: 'Missing username' })
+    }
 
-    // Fetch profile data
-    const profile = await client.getProfile()
-    const insights = await client.getInsights()
+    // Forward the browser's ETag so unchanged profiles come back as 304
+    const headers = {}
+    if (req.headers['if-none-match']) {
+      headers['If-None-Match'] = req.headers['if-none-match']
+    }
+
+    const response = await axios.get(
+      `${API_URL}/api/influencer/${encodeURIComponent(username)}/profile`,
+      { headers, validateStatus: (status) => status < 400 }
+    )
 
-    // Format response data
-    const responseData = {
-      followers: profile.followers_count,
-      engagement_rate: insights.engagement_rate,
-      sentiment_score: insights.sentiment_score,
-      age_range: insights.audience_age_range,
-      age_percent: insights.audience_age_percent,
-      gender: insights.audience_gender,
-      gender_percent: insights.audience_gender_percent,
-      top_location: insights.audience_top_location,
-      location_percent: insights.audience_location_percent
+    if (response.headers.etag) {
+      res.setHeader('ETag', response.headers.etag)
+    }
+    if (response.status === 304) {
+      return res.status(304).end()
     }
 
-    res.status(200).json(responseData)
+    res.status(200).json(response.data)
   } catch (error) {
-    console.error('Error fetching Instagram data:', error)
-    res.status(500).json({ 
+    console.error('Error fetching profile data:', error)
+    const status = error.response && error.response.status === 404 ? 404 : 500
+    res.status(status).json({
       error: 'Failed to fetch profile data',
-      details: error.message 
+      details: error.message
     })
   }
 }
@@ -7,15 +7,19 @@ import PricingEstimate from '../../components/influencer/PricingEstimate'
 
 export default function InfluencerDashboard() {
   const [isLoggedIn, setIsLoggedIn] = useState(false)
+  const [username, setUsername] = useState('')
 
   useEffect(() => {
     // Check for existing login in local storage
     const loggedIn = localStorage.getItem('instagramLoggedIn') === 'true'
     setIsLoggedIn(loggedIn)
+    setUsername(localStorage.getItem('instagramUsername') || '')
   }, [])
 
-  const handleLoginSuccess = () => {
+  const handleLoginSuccess = (data) => {
     localStorage.setItem('instagramLoggedIn', 'true')
+    localStorage.setItem('instagramUsername', data.username)
+    setUsername(data.username)
     setIsLoggedIn(true)
   }
 
@@ -37,6 +41,7 @@ export default function InfluencerDashboard() {
           <button 
             onClick={() => {
               localStorage.removeItem('instagramLoggedIn')
+              localStorage.removeItem('instagramUsername')
               setIsLoggedIn(false)
             }}
             className="text-sm text-red-600 hover:text-red-800"
@@ -47,7 +52,7 @@ export default function InfluencerDashboard() {
         
         <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
           <div className="lg:col-span-1">
-            <ProfileSummary />
+            <ProfileSummary username={username} />
           </div>
           <div className="lg:col-span-2 space-y-6">
             <RecommendedBrands />
@@ -1,11 +1,31 @@
 """
 Main application for the Influencer-Brand Matching System
+
+Run without arguments for the interactive menu, or headless, e.g.:
+    python main.py --json collect -f usernames.txt --workers 4
+    python main.py analyze --workers 2
+    python main.py --model-server /tmp/brandex-models.sock analyze --workers 4
+    python main.py report alice bob --print
+    python main.py pipeline -f usernames.txt --collect-workers 4 --analysis-workers 2
+    python main.py match --brands brands.json --influencers influencers.json -k 20
+    python main.py embed --index-type ivfflat && python main.py lookalike alice -k 10
+    python main.py hashtags skincare --days 30 --update
+    python main.py history alice bob --metric followers --days 90
 """
 import os
+import sys
 import json
-from scripts.data_collection import InfluencerScraper
+import time
+import argparse
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from scripts.data_collection import InfluencerScraper, load_language_detector, detect_post_languages
 from scripts.data_analysis import InfluencerAnalyzer
 from config import DATA_DIR, update_progress
+from scripts import instrumentation as metrics
+from scripts.pipeline import Pipeline, Stage
+from scripts.run_state import RUN_ENV, shared_run_state
 
 def init_project():
     """Initialize the project and create necessary directories"""
@@ -13,18 +33,15 @@ def init_project():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
     
-    # Create progress file if it doesn't exist
-    progress_file = os.path.join(DATA_DIR, "project_progress.json")
-    if not os.path.exists(progress_file):
-        with open(progress_file, 'w') as f:
-            from config import PROJECT_PROGRESS
-            json.dump(PROJECT_PROGRESS, f, indent=4)
+    # Create the run-state store, carrying over a legacy progress file
+    shared_run_state().initialize().import_progress_file(os.path.join(DATA_DIR, "project_progress.json"))
     
     print("Project initialized successfully.")
 
 def run_data_collection():
     """Run the data collection module"""
-    scraper = InfluencerScraper(save_dir=DATA_DIR)
+    scraper = InfluencerScraper(save_dir=DATA_DIR, hashtag_index=shared_hashtag_index(),
+                                timeseries_store=shared_timeseries_store())
     
     # Get list of influencers to scrape
     influencers = input("Enter comma-separated list of Instagram usernames to scrape: ").split(',')
@@ -50,6 +67,9 @@ def run_data_collection():
                 print(f"Avg. Engagement Rate: {profile_data['engagement_rate']}%")
                 successful += 1
     
+    # Fold the journaled updates into a fresh snapshot
+    shared_hashtag_index().save()
+    
     if successful > 0:
         update_progress("step_1_data_collection", "completed")
         print(f"\nData collection completed successfully for {successful} influencers.")
@@ -58,7 +78,7 @@ def run_data_collection():
 
 def run_data_analysis():
     """Run the data analysis module"""
-    analyzer = InfluencerAnalyzer(data_dir=DATA_DIR)
+    analyzer = InfluencerAnalyzer(data_dir=DATA_DIR, timeseries_store=shared_timeseries_store())
     
     # Check if there are any influencer profiles scraped already
     profile_files = [f for f in os.listdir(DATA_DIR) if f.endswith('_profile.json')]
@@ -138,14 +158,8 @@ def display_menu():
 
 def view_progress():
     """View current project progress"""
-    progress_file = os.path.join(DATA_DIR, "project_progress.json")
-    
-    if not os.path.exists(progress_file):
-        print("Progress file not found. Initializing project...")
-        init_project()
-    
-    with open(progress_file, 'r') as f:
-        progress = json.load(f)
+    state = shared_run_state()
+    progress = state.steps()
     
     print("\nProject Progress:")
     print("================")
@@ -168,8 +182,665 @@ def view_progress():
         status = progress.get(step_key, "pending")
         emoji = status_emoji.get(status, "⏳")
         print(f"{emoji} {step_name}: {status.replace('_', ' ').title()}")
+    
+    # Per-stage throughput of the latest batch runs (live while a run is going)
+    runs = state.runs(limit=3)
+    if runs:
+        print("\nRecent Batch Runs:")
+        print("==================")
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run["started_at"]))
+        print(f"Run #{run['run_id']} {run['command']} ({run['status']}, started {started})")
+        for stage in state.stage_summary(run["run_id"]):
+            line = (f"  {stage['stage']}: {stage['completed']} done, {stage['failed']} failed, "
+                    f"{stage['running']} running, {stage['items_per_second']:.2f}/s "
+                    f"(avg {stage['mean_seconds']:.2f}s per influencer)")
+            if run["status"] == "running":
+                line += f", {stage['recent_items_per_second']:.2f}/s over the last minute"
+            print(line)
+
+# Headless batch mode
+
+class BatchReporter:
+    """Emits per-item progress and a timing summary, as text or JSON lines"""
+    def __init__(self, stage, json_output=False, out=None, item_key="username"):
+        self.stage = stage
+        self.item_key = item_key
+        self.json_output = json_output
+        self.out = out or sys.stdout
+        self.start = time.perf_counter()
+        self.durations = []
+        self.failed = []
+
+    def _emit(self, event):
+        if self.json_output:
+            self.out.write(json.dumps(event, ensure_ascii=False) + "\n")
+        elif event["event"] == "stage":
+            self.out.write(
+                f"[{self.stage}:{event['stage']}] {event['processed']} done, {event['failed']} failed, "
+                f"{event['items_per_second']:.2f}/s with {event['workers']} worker(s), "
+                f"{event['utilization']:.0%} busy, {event['starved_seconds']:.2f}s starved, "
+                f"{event['blocked_seconds']:.2f}s blocked, queue peak {event['max_queue_depth']}\n"
+            )
+        elif event["event"] == "item":
+            status = "ok" if event["ok"] else "FAILED"
+            self.out.write(f"[{self.stage}] {event[self.item_key]}: {status} ({event['seconds']:.2f}s)\n")
+        else:
+            self.out.write(
+                f"[{self.stage}] {event['succeeded']}/{event['total']} succeeded "
+                f"in {event['seconds']:.2f}s ({event['items_per_second']:.2f}/s, "
+                f"p50 {event['p50_seconds']:.2f}s, p95 {event['p95_seconds']:.2f}s)\n"
+            )
+        self.out.flush()
+
+    def item(self, name, ok, seconds, **extra):
+        self.durations.append(seconds)
+        if not ok:
+            self.failed.append(name)
+        self._emit({
+            "event": "item", "stage": self.stage, self.item_key: name,
+            "ok": ok, "seconds": round(seconds, 4), **extra
+        })
+
+    def stages(self, stats):
+        """Emit per-stage throughput of a streaming run"""
+        for stage in stats:
+            self._emit({"event": "stage", **stage})
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.start
+        durations = sorted(self.durations)
+
+        def percentile(q):
+            if not durations:
+                return 0.0
+            return durations[min(len(durations) - 1, int(q / 100 * len(durations)))]
+
+        summary = {
+            "event": "summary",
+            "stage": self.stage,
+            "total": len(durations),
+            "succeeded": len(durations) - len(self.failed),
+            "failed": self.failed,
+            "seconds": round(elapsed, 4),
+            "items_per_second": round(len(durations) / elapsed, 4) if elapsed > 0 else 0.0,
+            "p50_seconds": round(percentile(50), 4),
+            "p95_seconds": round(percentile(95), 4)
+        }
+        self._emit(summary)
+        return summary
+
+def read_usernames(args):
+    """Collect usernames from positional arguments, --file, or stdin ('-')"""
+    usernames = list(args.usernames or [])
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            usernames.extend(f.read().replace(',', '\n').splitlines())
+    if "-" in usernames:
+        usernames.extend(sys.stdin.read().replace(',', '\n').splitlines())
+
+    seen = set()
+    result = []
+    for username in (u.strip().lstrip('@') for u in usernames):
+        if username and username != "-" and username not in seen:
+            seen.add(username)
+            result.append(username)
+    return result
+
+def available_usernames(suffix='_profile.json'):
+    if not os.path.exists(DATA_DIR):
+        return []
+    return sorted(f[:-len(suffix)] for f in os.listdir(DATA_DIR) if f.endswith(suffix))
+
+_thread_local = threading.local()
+_hashtag_index = None
+_hashtag_index_lock = threading.Lock()
+
+HASHTAG_INDEX = os.path.join(DATA_DIR, "hashtags", "index.npz")
+
+def shared_hashtag_index():
+    """The roster-wide hashtag index, loaded once and shared by scrape threads"""
+    global _hashtag_index
+    with _hashtag_index_lock:
+        if _hashtag_index is None:
+            from scripts.hashtag_index import HashtagIndex
+            _hashtag_index = HashtagIndex(HASHTAG_INDEX)
+        return _hashtag_index
+
+_timeseries_store = None
+_timeseries_store_lock = threading.Lock()
+
+TIMESERIES_DIR = os.path.join(DATA_DIR, "timeseries")
+
+def shared_timeseries_store():
+    """The follower/engagement history store, shared by scrape threads"""
+    global _timeseries_store
+    with _timeseries_store_lock:
+        if _timeseries_store is None:
+            from scripts.timeseries_store import TimeSeriesStore
+            _timeseries_store = TimeSeriesStore(TIMESERIES_DIR)
+        return _timeseries_store
+
+def _scrape_one(username):
+    # Instaloader sessions aren't thread-safe, so each worker thread keeps its own scraper
+    scraper = getattr(_thread_local, "scraper", None)
+    if scraper is None:
+        scraper = _thread_local.scraper = InfluencerScraper(
+            save_dir=DATA_DIR, hashtag_index=shared_hashtag_index(), timeseries_store=shared_timeseries_store()
+        )
+    start = time.perf_counter()
+    profile_data = scraper.scrape_profile(username)
+    extra = {}
+    if profile_data:
+        extra = {"followers": profile_data["followers"], "engagement_rate": profile_data["engagement_rate"]}
+    return username, profile_data is not None, time.perf_counter() - start, extra
+
+_worker_analyzer = None
+
+def _analysis_options(args):
+    """InfluencerAnalyzer keyword arguments from the analyze/pipeline flags"""
+    options = {"comment_sample_margin": getattr(args, "comment_margin", None)}
+    if getattr(args, "category_cascade", False):
+        options["category_cascade"] = {
+            "lexicon_threshold": args.lexicon_threshold,
+            "small_threshold": args.small_threshold,
+            "audit_rate": args.audit_rate
+        }
+    return options
+
+def _init_analysis_worker(quiet, options=None):
+    global _worker_analyzer
+    if quiet:
+        sys.stdout = sys.stderr
+    _worker_analyzer = InfluencerAnalyzer(data_dir=DATA_DIR, timeseries_store=shared_timeseries_store(),
+                                          **(options or {}))
+
+def _analyze_one(username, with_report=True):
+    start = time.perf_counter()
+    ok = False
+    extra = {}
+    analysis = _worker_analyzer.analyze_influencer(username)
+    if analysis:
+        ok = _worker_analyzer.generate_visualizations(username)
+        if with_report:
+            report_file = _worker_analyzer.generate_report(username)
+            ok = ok and bool(report_file)
+            extra["report"] = report_file
+    return username, bool(ok), time.perf_counter() - start, extra
+
+def _report_one(username):
+    start = time.perf_counter()
+    report_file = _worker_analyzer.generate_report(username)
+    return username, bool(report_file), time.perf_counter() - start, {"report": report_file}
+
+# Streaming pipeline stages. Each takes and returns a username (None on
+# failure); profiles and analyses are handed over through DATA_DIR.
+
+def _stage_scrape(username):
+    scraper = getattr(_thread_local, "pipeline_scraper", None)
+    if scraper is None:
+        # Languages are detected by their own stage
+        scraper = _thread_local.pipeline_scraper = InfluencerScraper(
+            save_dir=DATA_DIR, detect_languages=False, hashtag_index=shared_hashtag_index(),
+            timeseries_store=shared_timeseries_store()
+        )
+    return username if scraper.scrape_profile(username) else None
+
+_worker_language_detector = None
+
+def _init_language_worker(quiet):
+    global _worker_language_detector
+    if quiet:
+        sys.stdout = sys.stderr
+    _worker_language_detector = load_language_detector()
+
+def _stage_languages(username):
+    profile_file = os.path.join(DATA_DIR, f"{username}_profile.json")
+    with open(profile_file, 'r', encoding='utf-8') as f:
+        profile_data = json.load(f)
+    detect_post_languages(profile_data, _worker_language_detector)
+    with open(profile_file, 'w', encoding='utf-8') as f:
+        json.dump(profile_data, f, ensure_ascii=False, indent=4)
+    return username
+
+def _stage_analyze(username):
+    return username if _worker_analyzer.analyze_influencer(username) else None
+
+def _stage_visualize(username):
+    return username if _worker_analyzer.generate_visualizations(username) else None
+
+def _stage_report(username):
+    return username if _worker_analyzer.generate_report(username) else None
+
+def _with_worker_metrics(fn, username):
+    """Run fn in a pool process and ship that process's metrics back with the result"""
+    username, ok, seconds, extra = fn(username)
+    if metrics.is_enabled():
+        extra["_metrics"] = metrics.snapshot()
+        metrics.reset()
+    return username, ok, seconds, extra
+
+def _with_run_state(stage, fn, username):
+    """Record a batch worker's item (username, ok, seconds, extra) in the run-state store"""
+    with shared_run_state().track(stage, username) as task:
+        result = fn(username)
+        task.ok = result[1]
+        task.error = result[3].get("error")
+    return result
+
+def _tracked_stage(name, fn, username):
+    """Record a pipeline stage's item in the run-state store; stages return None on failure"""
+    with shared_run_state().track(name, username) as task:
+        result = fn(username)
+        task.ok = bool(result)
+    return result
+
+def _run_pool(executor, fn, usernames, reporter):
+    futures = {executor.submit(fn, username): username for username in usernames}
+    for future in as_completed(futures):
+        try:
+            username, ok, seconds, extra = future.result()
+        except Exception as e:
+            username, ok, seconds, extra = futures[future], False, 0.0, {"error": str(e)}
+        metrics.merge(extra.pop("_metrics", None))
+        reporter.item(username, ok, seconds, **extra)
+
+def batch_collect(args, reporter):
+    usernames = read_usernames(args)
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        _run_pool(executor, partial(_with_run_state, "collect", _scrape_one), usernames, reporter)
+    # Fold the journaled updates into a fresh snapshot
+    shared_hashtag_index().save()
+    if len(reporter.failed) < len(usernames):
+        update_progress("step_1_data_collection", "completed")
+
+def _analysis_pool(args, fn, usernames, reporter):
+    fn = partial(_with_run_state, args.command, fn)
+    if args.workers <= 1:
+        # Run in-process so a single worker doesn't pay for a process pool
+        _init_analysis_worker(False, _analysis_options(args))
+        for username in usernames:
+            try:
+                username, ok, seconds, extra = fn(username)
+            except Exception as e:
+                ok, seconds, extra = False, 0.0, {"error": str(e)}
+            reporter.item(username, ok, seconds, **extra)
+        return
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_analysis_worker,
+                             initargs=(args.json, _analysis_options(args))) as executor:
+        _run_pool(executor, partial(_with_worker_metrics, fn), usernames, reporter)
+
+def print_cascade_summary(usernames):
+    """Print how many captions each categorization tier settled and how often cheap tiers agreed with BART"""
+    from collections import Counter
+    from scripts.category_cascade import cascade_stats
+
+    counts = Counter()
+    for username in usernames:
+        analysis_file = os.path.join(DATA_DIR, f"{username}_analysis.json")
+        if os.path.exists(analysis_file):
+            with open(analysis_file, 'r', encoding='utf-8') as f:
+                counts.update(json.load(f)["content_analysis"].get("category_tiers", {}))
+    stats = cascade_stats(counts)
+    if not stats["captions"]:
+        return stats
+
+    shares = ", ".join(f"{tier} {share:.1%}" for tier, share in stats["shares"].items())
+    print(f"Category cascade: {stats['captions']} captions ({shares}); "
+          f"{stats['escalated_share']:.1%} escalated to the full model")
+    for tier, agreement in stats["agreement"].items():
+        print(f"  {tier} agreement with the full model: {agreement['agreement']:.1%} "
+              f"of {agreement['audited']} audited")
+    return stats
+
+def batch_analyze(args, reporter):
+    usernames = read_usernames(args) or available_usernames()
+    _analysis_pool(args, partial(_analyze_one, with_report=not args.no_report), usernames, reporter)
+    if args.category_cascade:
+        print_cascade_summary(usernames)
+    if len(reporter.failed) < len(usernames):
+        update_progress("step_2_data_analysis", "completed")
+
+def batch_report(args, reporter):
+    from scripts.roster_analytics import RosterAnalytics
+
+    usernames = read_usernames(args) or available_usernames('_analysis.json')
+    # Refresh the roster aggregates once so report workers only read the cache
+    RosterAnalytics(DATA_DIR).refresh()
+    _analysis_pool(args, _report_one, usernames, reporter)
+    if args.print:
+        for username in usernames:
+            report_file = os.path.join(DATA_DIR, f"{username}_report.md")
+            if os.path.exists(report_file):
+                with open(report_file, 'r', encoding='utf-8') as f:
+                    sys.stderr.write(f.read() + "\n")
+
+def batch_pipeline(args, reporter):
+    usernames = read_usernames(args)
+    if args.skip_collect:
+        usernames = usernames or available_usernames()
+    quiet = args.json
+    options = _analysis_options(args)
+    # Charts may be drawn off the main thread, which GUI backends don't allow
+    import matplotlib
+    matplotlib.use("Agg")
+
+    def stage(name, fn, workers, initializer=None, initargs=()):
+        # Model and chart stages use processes once they have more than one
+        # worker: the pipelines and pyplot aren't safe to share across threads
+        return Stage(name, partial(_tracked_stage, name, fn), workers=workers, processes=workers > 1,
+                     initializer=initializer, initargs=initargs)
+
+    stages = []
+    if not args.skip_collect:
+        # Scraping waits on the network, so it always uses threads
+        stages.append(Stage("collect", partial(_tracked_stage, "collect", _stage_scrape), workers=args.collect_workers))
+        stages.append(stage("languages", _stage_languages, args.language_workers,
+                            _init_language_worker, (quiet and args.language_workers > 1,)))
+    stages.append(stage("analyze", _stage_analyze, args.analysis_workers,
+                        _init_analysis_worker, (quiet and args.analysis_workers > 1, options)))
+    # Chart and report workers never touch the models, which load lazily
+    stages.append(stage("visualize", _stage_visualize, args.viz_workers,
+                        _init_analysis_worker, (quiet and args.viz_workers > 1, options)))
+    stages.append(stage("report", _stage_report, args.report_workers,
+                        _init_analysis_worker, (quiet and args.report_workers > 1, options)))
+
+    pipeline = Pipeline(stages, queue_size=args.queue_size)
+    for username, ok, seconds, extra in pipeline.run(usernames):
+        reporter.item(username, ok, seconds, **extra)
+    reporter.stages(pipeline.stats())
+    if args.category_cascade:
+        print_cascade_summary(usernames)
+    if not args.skip_collect:
+        shared_hashtag_index().save()
+
+    if len(reporter.failed) < len(usernames):
+        if not args.skip_collect:
+            update_progress("step_1_data_collection", "completed")
+        update_progress("step_2_data_analysis", "completed")
+
+LOOKALIKE_INDEX = os.path.join(DATA_DIR, "lookalike", "influencers.faiss")
+
+def batch_embed(args, reporter):
+    from scripts.lookalike import build_index
+
+    usernames = read_usernames(args) or available_usernames()
+    start = time.perf_counter()
+    index, indexed = build_index(DATA_DIR, usernames, args.index, index_type=args.index_type, nlist=args.nlist)
+    seconds = time.perf_counter() - start
+    indexed = set(indexed)
+    for username in usernames:
+        reporter.item(username, username in indexed, seconds / max(len(usernames), 1))
+    if index is not None:
+        print(f"Lookalike index at {args.index} holds {len(index)} influencers")
+
+def batch_lookalike(args, reporter):
+    from scripts.lookalike import LookalikeIndex
+
+    if not os.path.exists(args.index):
+        print(f"No lookalike index at {args.index}. Run the embed command first.")
+        return
+    index = LookalikeIndex.load(args.index, nprobe=args.nprobe)
+    for username in read_usernames(args):
+        start = time.perf_counter()
+        if username not in index:
+            print(f"{username} is not in the lookalike index")
+            reporter.item(username, False, time.perf_counter() - start)
+            continue
+        lookalikes = index.lookalikes(username, k=args.top_k)
+        reporter.item(username, True, time.perf_counter() - start, lookalikes=[
+            {"username": name, "similarity": round(similarity, 4)} for name, similarity in lookalikes
+        ])
+        if not args.json:
+            for name, similarity in lookalikes:
+                print(f"  @{name}: {similarity:.3f}")
+
+def batch_hashtags(args, reporter):
+    from scripts.hashtag_index import build_from_profiles
+
+    index = shared_hashtag_index()
+    if args.update:
+        with metrics.span("hashtags.update"):
+            indexed = build_from_profiles(DATA_DIR, index, available_usernames())
+        index.save()
+        print(f"Indexed {indexed} new or changed posts; {len(index)} posts in the hashtag index")
+
+    for tag in args.hashtags:
+        start = time.perf_counter()
+        influencers = index.influencers_using(tag, since=args.since, until=args.until, days=args.days)
+        related = index.cooccurring(tag, k=args.top_k, since=args.since, until=args.until, days=args.days)
+        reporter.item(tag, bool(influencers), time.perf_counter() - start,
+                      influencers=[{"username": name, "posts": count} for name, count in influencers],
+                      cooccurring=[{"hashtag": other, "posts": count} for other, count in related])
+        if not args.json:
+            print(f"#{tag.lstrip('#')}: used by " + (", ".join(f"@{name} ({count})" for name, count in influencers) or "nobody"))
+            if related:
+                print("  often with " + ", ".join(f"#{other} ({count})" for other, count in related))
+
+def batch_history(args, reporter):
+    from datetime import datetime, timedelta, timezone
+    from scripts.timeseries_store import RetentionPolicy, backfill_from_profiles
+
+    store = shared_timeseries_store()
+    if args.backfill:
+        recorded = backfill_from_profiles(DATA_DIR, store, available_usernames())
+        print(f"Recorded {recorded} saved profiles as snapshots")
+    usernames = read_usernames(args) or store.usernames()
+    if args.compact:
+        store.policy = RetentionPolicy(raw_days=args.raw_days, daily_days=args.daily_days, max_days=args.max_days)
+        with metrics.span("timeseries.compact"):
+            counts = store.apply_policy(usernames)
+        print(f"Compacted {counts['before']} snapshots to {counts['after']}")
+
+    start, end = args.since, None
+    if args.days:
+        start = datetime.now(timezone.utc) - timedelta(days=args.days)
+    if args.until:
+        # Inclusive of the whole day
+        end = datetime.fromisoformat(args.until) + timedelta(days=1, seconds=-1)
+    for username in usernames:
+        began = time.perf_counter()
+        history = store.profile_history(username, start=start, end=end)
+        points = [
+            {"date": datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m-%d"), args.metric: round(value.item(), 2)}
+            for ts, value in zip(history["timestamp"], history[args.metric])
+        ]
+        reporter.item(username, bool(points), time.perf_counter() - began, history=points)
+        if not args.json and points:
+            first, last = points[0][args.metric], points[-1][args.metric]
+            change = f" ({(last - first) / first * 100:+.1f}%)" if first else ""
+            print(f"  @{username}: {args.metric} {first:,} -> {last:,}{change} over {len(points)} snapshots")
+
+def batch_match(args, reporter):
+    from scripts.sponsor_match import Brand, Influencer, get_matches_with_pricing, rank_brands_to_influencers
+    from scripts.sharded_match import get_matches_with_pricing_sharded
+
+    with open(args.brands, 'r', encoding='utf-8') as f:
+        brands = [Brand(**record) for record in json.load(f)]
+    if args.influencers:
+        with open(args.influencers, 'r', encoding='utf-8') as f:
+            influencers = [Influencer(**record) for record in json.load(f)]
+    else:
+        from scripts.analysis_cache import load_analyzed_influencers
+        # Matcher records straight from the stored analyses; profiles are never analyzed here
+        influencers, _ = load_analyzed_influencers(DATA_DIR) if os.path.exists(DATA_DIR) else ([], [])
+        analyzed = {influencer.name for influencer in influencers}
+        missing = [username for username in available_usernames() if username not in analyzed]
+        if missing:
+            print(f"{len(missing)} scraped profiles have no usable analysis and are not matched "
+                  f"(run 'analyze' first): {', '.join(missing)}")
+
+    start = time.perf_counter()
+    if args.top_k:
+        ranked = rank_brands_to_influencers(brands, influencers, k=args.top_k)
+        result = {
+            brand.name: [{"influencer": influencer.name, "score": round(score, 4)} for influencer, score in shortlist]
+            for brand, shortlist in ranked.items()
+        }
+    else:
+        if args.workers > 1:
+            matches = get_matches_with_pricing_sharded(brands, influencers, processes=args.workers)
+        else:
+            matches = get_matches_with_pricing(brands, influencers)
+        result = {
+            brand.name: {influencer.name: pricing for influencer, pricing in pricing_details.items()}
+            for brand, pricing_details in matches.items()
+        }
+    seconds = time.perf_counter() - start
+
+    for brand_name, brand_matches in result.items():
+        reporter.item(brand_name, True, seconds / max(len(result), 1), matches=len(brand_matches))
+
+    output = args.output or os.path.join(DATA_DIR, "brand_matches.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=4)
+    update_progress("step_3_brand_matching", "completed")
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Influencer-Brand Matching System. Run without a command for the interactive menu."
+    )
+    parser.add_argument("--json", action="store_true", help="emit progress and summary as JSON lines on stdout")
+    parser.add_argument("--model-server", metavar="SOCKET", help="run models on the shared model server at this Unix socket")
+    parser.add_argument("--metrics", metavar="DIR", help="collect timings and counters; write run_summary.json and metrics.prom to DIR")
+    subparsers = parser.add_subparsers(dest="command")
+
+    def add_usernames(sub):
+        sub.add_argument("usernames", nargs="*", help="usernames, or '-' to read them from stdin")
+        sub.add_argument("-f", "--file", help="file with one username per line")
+
+    def add_analysis_options(sub):
+        sub.add_argument("--comment-margin", type=float, metavar="MARGIN",
+                         help="estimate comment sentiment from a sample to this margin of error (e.g. 0.03)")
+        sub.add_argument("--category-cascade", action="store_true",
+                         help="categorize with a hashtag lexicon and a small model first, escalating to BART when unsure")
+        sub.add_argument("--lexicon-threshold", type=float, default=0.75, help="lexicon vote share needed to skip the models")
+        sub.add_argument("--small-threshold", type=float, default=0.5, help="small model score needed to skip BART")
+        sub.add_argument("--audit-rate", type=float, default=0.0,
+                         help="share of cheap-tier results also run through BART to measure agreement")
+
+    collect = subparsers.add_parser("collect", help="scrape profiles")
+    add_usernames(collect)
+    collect.add_argument("-w", "--workers", type=int, default=2, help="concurrent scrape threads")
+    collect.set_defaults(handler=batch_collect)
+
+    analyze = subparsers.add_parser("analyze", help="analyze scraped profiles (default: all)")
+    add_usernames(analyze)
+    analyze.add_argument("-w", "--workers", type=int, default=1, help="analysis processes")
+    analyze.add_argument("--no-report", action="store_true", help="skip report generation")
+    add_analysis_options(analyze)
+    analyze.set_defaults(handler=batch_analyze)
+
+    report = subparsers.add_parser("report", help="generate reports from analyses (default: all)")
+    add_usernames(report)
+    report.add_argument("-w", "--workers", type=int, default=1, help="report processes")
+    report.add_argument("--print", action="store_true", help="print reports to stderr")
+    report.set_defaults(handler=batch_report)
+
+    stream = subparsers.add_parser("pipeline", help="scrape, analyze, chart and report as one streaming pipeline")
+    add_usernames(stream)
+    stream.add_argument("--skip-collect", action="store_true", help="start from already scraped profiles (default: all)")
+    stream.add_argument("--collect-workers", type=int, default=2, help="scrape threads")
+    stream.add_argument("--language-workers", type=int, default=1, help="language detection workers")
+    stream.add_argument("--analysis-workers", type=int, default=1, help="sentiment/category inference workers")
+    stream.add_argument("--viz-workers", type=int, default=1, help="chart workers")
+    stream.add_argument("--report-workers", type=int, default=1, help="report workers")
+    stream.add_argument("--queue-size", type=int, default=4, help="items buffered between stages")
+    add_analysis_options(stream)
+    stream.set_defaults(handler=batch_pipeline)
+
+    embed = subparsers.add_parser("embed", help="embed scraped profiles into the lookalike index (default: all)")
+    add_usernames(embed)
+    embed.add_argument("--index", default=LOOKALIKE_INDEX, help="index file")
+    embed.add_argument("--index-type", choices=["flat", "ivfflat", "ivfpq"], default="flat",
+                       help="index type when creating a new index (ivfflat/ivfpq for large rosters)")
+    embed.add_argument("--nlist", type=int, default=1024, help="IVF cells when creating an ivf index")
+    embed.set_defaults(handler=batch_embed)
+
+    lookalike = subparsers.add_parser("lookalike", help="find influencers similar to the given ones")
+    add_usernames(lookalike)
+    lookalike.add_argument("-k", "--top-k", type=int, default=10, help="lookalikes per influencer")
+    lookalike.add_argument("--index", default=LOOKALIKE_INDEX, help="index file")
+    lookalike.add_argument("--nprobe", type=int, help="IVF cells searched per query")
+    lookalike.set_defaults(handler=batch_lookalike)
+
+    hashtags = subparsers.add_parser("hashtags", help="who used a hashtag, and what it is used with")
+    hashtags.add_argument("hashtags", nargs="*", help="hashtags to look up")
+    hashtags.add_argument("--update", action="store_true", help="index scraped profiles not yet in the index first")
+    hashtags.add_argument("--days", type=int, help="only posts from the last N days")
+    hashtags.add_argument("--since", help="only posts on or after this date (YYYY-MM-DD)")
+    hashtags.add_argument("--until", help="only posts on or before this date (YYYY-MM-DD)")
+    hashtags.add_argument("-k", "--top-k", type=int, default=10, help="co-occurring hashtags to show")
+    hashtags.set_defaults(handler=batch_hashtags)
+
+    history = subparsers.add_parser("history", help="follower and engagement history across scrapes")
+    add_usernames(history)
+    history.add_argument("--metric", default="followers",
+                         choices=["followers", "following", "posts_count", "engagement_rate"], help="metric to show")
+    history.add_argument("--days", type=int, help="only snapshots from the last N days")
+    history.add_argument("--since", help="only snapshots on or after this date (YYYY-MM-DD)")
+    history.add_argument("--until", help="only snapshots on or before this date (YYYY-MM-DD)")
+    history.add_argument("--backfill", action="store_true", help="record the saved profiles as snapshots first")
+    history.add_argument("--compact", action="store_true", help="downsample and expire old snapshots first")
+    history.add_argument("--raw-days", type=int, default=30, help="keep every snapshot this many days")
+    history.add_argument("--daily-days", type=int, default=365, help="then one per day until this age, then one per week")
+    history.add_argument("--max-days", type=int, help="drop snapshots older than this")
+    history.set_defaults(handler=batch_history)
+
+    match = subparsers.add_parser("match", help="match brands to influencers")
+    match.add_argument("--brands", required=True, help="JSON list of Brand records")
+    match.add_argument("--influencers", help="JSON list of Influencer records (default: all analyzed profiles)")
+    match.add_argument("-k", "--top-k", type=int, default=0, help="rank and keep the top k per brand")
+    match.add_argument("-w", "--workers", type=int, default=1, help="matching processes")
+    match.add_argument("-o", "--output", help="output JSON file (default: data/brand_matches.json)")
+    match.set_defaults(handler=batch_match)
+
+    return parser
+
+def run_batch(args):
+    """Run one batch subcommand and return the process exit code"""
+    if args.metrics:
+        # Set in the environment too so spawned pool workers collect as well
+        os.environ["BRANDEX_METRICS"] = "1"
+        metrics.enable()
+
+    if args.model_server:
+        # Read by load_pipeline() here and in pool workers
+        os.environ["BRANDEX_MODEL_SERVER"] = args.model_server
+
+    events_out = sys.stdout
+    if args.json:
+        # Keep stdout clean for JSON lines; module chatter goes to stderr
+        sys.stdout = sys.stderr
+    run_id = None
+    try:
+        init_project()
+        state = shared_run_state()
+        run_id = state.start_run(args.command)
+        # Read by the run-state store here and in pool workers
+        os.environ[RUN_ENV] = str(run_id)
+        item_key = {"match": "brand", "hashtags": "hashtag"}.get(args.command, "username")
+        reporter = BatchReporter(args.command, json_output=args.json, out=events_out, item_key=item_key)
+        with metrics.span(f"batch.{args.command}"):
+            args.handler(args, reporter)
+        summary = reporter.summary()
+        state.finish_run(run_id)
+        run_id = None
+    finally:
+        sys.stdout = events_out
+        if run_id is not None:
+            shared_run_state().finish_run(run_id, "aborted")
+
+    if args.metrics:
+        metrics.export_json(os.path.join(args.metrics, "run_summary.json"), extra={"run": summary})
+        metrics.export_prometheus(os.path.join(args.metrics, "metrics.prom"))
+    return 1 if summary["failed"] or summary["total"] == 0 else 0
 
 if __name__ == "__main__":
+    args = build_parser().parse_args()
+    if args.command:
+        sys.exit(run_batch(args))
+
     init_project()
     
     while True:
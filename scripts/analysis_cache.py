@@ -0,0 +1,227 @@
+"""
+In-Process Analysis Cache and Matcher Loader
+
+Visualizations, reports and matching all need an influencer's analysis,
+and each used to load or recompute it on its own. AnalysisCache keeps
+recent analyses in memory, keyed by username and a hash of the profile
+file's contents. A rescrape changes the hash, so stale analyses are never
+served. Concurrent requests for the same key wait for a single
+computation, so each profile version is analyzed at most once per process.
+The cache is bounded by the approximate serialized size of the analyses
+it holds and evicts the least recently used first.
+
+influencer_from_analysis(), load_influencer_table() and
+load_analyzed_influencers() turn analyses into sponsor_match records, so
+matching can run on analyzed profiles directly.
+"""
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from scripts import instrumentation as metrics
+from scripts.sponsor_match import Influencer, InfluencerTable
+
+# Audience age buckets, as used in Brand.target_audience: (low, next bucket's low, label).
+# Estimated ages are fractional, so a bucket covers low <= age < high
+AGE_BUCKETS = ((13, 18, "13-17"), (18, 26, "18-25"), (26, 36, "26-35"), (36, 46, "36-45"))
+OLDEST_BUCKET = (46, "46+")
+
+def profile_hash(content: bytes) -> str:
+    """Content hash identifying one version of a scraped profile"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+class _Pending:
+    """One in-flight computation: waiters block on lock, then read result"""
+    __slots__ = ("lock", "done", "result")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = False
+        self.result = None
+
+class AnalysisCache:
+    """
+    LRU cache of analyses keyed by (username, profile hash).
+
+    Args:
+        max_bytes: evict least recently used analyses beyond this total
+            serialized size
+    """
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()  # username -> (hash, analysis, size); only the latest version
+        self._pending = {}             # (username, hash) -> _Pending while computing
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, username, version):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(username)
+            return entry[1]
+
+    def put(self, username, version, analysis, size=None):
+        if size is None:
+            size = len(json.dumps(analysis, ensure_ascii=False))
+        with self._lock:
+            # Only the current version of a profile is worth keeping
+            if username in self._entries:
+                self.bytes -= self._entries.pop(username)[2]
+            if size > self.max_bytes:
+                return
+            self._entries[username] = (version, analysis, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                metrics.count("analysis_cache.evictions")
+
+    def get_or_compute(self, username, version, compute):
+        """
+        Cached analysis for this profile version, or compute() it once.
+        compute returns the analysis (or None, which isn't cached), or an
+        (analysis, serialized size) pair when the size is already known.
+        Threads waiting on the computation get its result even when it is
+        too big to cache.
+        """
+        key = (username, version)
+        while True:
+            analysis = self.get(username, version)
+            if analysis is not None:
+                metrics.count("analysis_cache.hits")
+                return analysis
+            with self._lock:
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = _Pending()
+                    pending.lock.acquire()
+                    break
+            # Another thread is computing this version; wait for it and take its result
+            with pending.lock:
+                pass
+            if pending.done and pending.result is not None:
+                metrics.count("analysis_cache.hits")
+                return pending.result
+            # It failed or returned nothing: look again, and compute if nobody else is
+
+        metrics.count("analysis_cache.misses")
+        try:
+            result = compute()
+            size = None
+            if isinstance(result, tuple):
+                result, size = result
+            if result is not None:
+                self.put(username, version, result, size)
+            pending.result = result
+            pending.done = True
+            return result
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.lock.release()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes}
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_analysis_cache():
+    """Process-wide cache shared by every InfluencerAnalyzer"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AnalysisCache()
+        return _shared
+
+def _age_bucket(age):
+    # Ages under 13 (below the platform minimum) are treated as an unusable estimate
+    if age is None:
+        return None
+    for low, high, label in AGE_BUCKETS:
+        if low <= age < high:
+            return label
+    return OLDEST_BUCKET[1] if age >= OLDEST_BUCKET[0] else None
+
+def influencer_from_analysis(analysis):
+    """
+    Matcher record for one analysis: the main content category, audience
+    from the estimated demographics (location is the scraped location, or
+    the most frequent post location) and follower count as reach
+    """
+    content = analysis.get("content_analysis", {})
+    categories = content.get("categories", {})
+    demographics = analysis.get("demographics", {})
+    locations = analysis.get("geographic_reach", {})
+
+    audience = {
+        "age": _age_bucket(demographics.get("estimated_age")),
+        "gender": demographics.get("gender"),
+        "location": demographics.get("location") or (max(locations, key=locations.get) if locations else None)
+    }
+    return Influencer(
+        name=analysis["username"],
+        content_type=max(categories, key=categories.get) if categories else "Uncategorized",
+        audience_stats={key: value for key, value in audience.items() if value is not None},
+        average_reach=int(analysis["basic_metrics"]["followers"]),
+        engagement_rate=float(analysis["basic_metrics"].get("engagement_rate") or 0.0)
+    )
+
+def load_influencers(usernames, analyzer=None):
+    """
+    Influencer records for the given usernames from their analyses, served
+    from the analyzer's cache when present. Profiles without an analysis
+    are analyzed first; ones that can't be are skipped.
+    """
+    if analyzer is None:
+        from scripts.data_analysis import InfluencerAnalyzer
+        analyzer = InfluencerAnalyzer()
+    influencers = []
+    for username in usernames:
+        analysis = analyzer.get_analysis(username)
+        if analysis:
+            influencers.append(influencer_from_analysis(analysis))
+    return influencers
+
+def load_analyzed_influencers(data_dir):
+    """
+    Influencer records for every {username}_analysis.json in data_dir, read
+    as stored: profiles are not re-read, re-hashed or analyzed.
+    Returns the records and the usernames whose analysis couldn't be read.
+    """
+    suffix = "_analysis.json"
+    influencers, unreadable = [], []
+    for name in sorted(os.listdir(data_dir)):
+        if not name.endswith(suffix):
+            continue
+        try:
+            with open(os.path.join(data_dir, name), 'rb') as f:
+                content = f.read()
+            influencers.append(influencer_from_analysis(json.loads(content)))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Skipping unreadable analysis {name}: {e}")
+            unreadable.append(name[:-len(suffix)])
+            continue
+        metrics.count("io.bytes_read", len(content))
+    return influencers, unreadable
+
+def load_influencer_table(usernames, analyzer=None):
+    """Column-backed InfluencerTable built straight from analyses (see load_influencers)"""
+    return InfluencerTable.from_influencers(load_influencers(usernames, analyzer))
+
+# Example usage
+if __name__ == "__main__":
+    from config import DATA_DIR
+
+    suffix = "_analysis.json"
+    usernames = [f[:-len(suffix)] for f in os.listdir(DATA_DIR) if f.endswith(suffix)]
+    table = load_influencer_table(usernames)
+    print(f"Loaded {len(table)} influencers ({table.nbytes} bytes of columns)")
+    print(shared_analysis_cache().stats())
@@ -0,0 +1,207 @@
+"""
+HTTP API for the Influencer-Brand Matching System
+
+Serves profile metrics, analysis summaries and brand matches from the files
+in DATA_DIR. A TTL'd in-memory LRU sits in front of the store and every
+response carries an ETag, so repeat requests are answered from memory and
+unchanged resources return 304 Not Modified.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import Flask, Response, abort, request
+from config import DATA_DIR
+from scripts import instrumentation as metrics
+from .incremental_match import IncrementalMatcher
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds"""
+    def __init__(self, maxsize=1024, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                metrics.count("api.cache_misses")
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            metrics.count("api.cache_hits")
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class ProfileStore:
+    """
+    Read-through access to the stored profile, analysis and match data.
+    Responses are cached as (body, etag) so a hit costs no JSON work at all.
+    """
+    def __init__(self, data_dir=DATA_DIR, ttl=30.0, maxsize=1024):
+        self.data_dir = data_dir
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._matcher = None
+        self._matcher_version = None
+        self._matcher_checked = 0.0
+        self._matcher_lock = threading.Lock()
+
+    def _load_json(self, filename):
+        file_path = os.path.join(self.data_dir, filename)
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _cached(self, key, build):
+        entry = self.cache.get(key)
+        if entry is None:
+            payload = build()
+            if payload is None:
+                return None
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            entry = (body, hashlib.sha1(body).hexdigest())
+            self.cache.set(key, entry)
+        return entry
+
+    @property
+    def matcher(self) -> IncrementalMatcher:
+        """The match state, kept warm and reloaded only when its files change"""
+        with self._matcher_lock:
+            now = time.monotonic()
+            if self._matcher is not None and now - self._matcher_checked < self.cache.ttl:
+                return self._matcher
+            self._matcher_checked = now
+
+            state_file = os.path.join(self.data_dir, "match_state.json")
+            version = tuple(
+                os.stat(path).st_mtime_ns if os.path.exists(path) else None
+                for path in (state_file, state_file + ".journal")
+            )
+            if self._matcher is None or version != self._matcher_version:
+                self._matcher = IncrementalMatcher(state_file)
+                self._matcher_version = version
+            return self._matcher
+
+    def usernames(self):
+        return self._cached("influencers", lambda: sorted(
+            f.replace('_profile.json', '')
+            for f in os.listdir(self.data_dir) if f.endswith('_profile.json')
+        ) if os.path.exists(self.data_dir) else [])
+
+    def profile(self, username):
+        return self._cached(("profile", username), lambda: self._profile_summary(username))
+
+    def analysis(self, username):
+        return self._cached(("analysis", username), lambda: self._load_json(f"{username}_analysis.json"))
+
+    def matches(self, username):
+        return self._cached(("matches", username), lambda: self.matcher.matches_for_influencer(username))
+
+    def _profile_summary(self, username):
+        """Profile metrics in the shape the dashboard's ProfileSummary expects"""
+        profile = self._load_json(f"{username}_profile.json")
+        if profile is None:
+            return None
+        analysis = self._load_json(f"{username}_analysis.json") or {}
+
+        sentiment = analysis.get("content_analysis", {}).get("comment_sentiment", {})
+        total_sentiment = sum(sentiment.values())
+        sentiment_score = (
+            round(sentiment.get("positive", 0) / total_sentiment * 100, 1)
+            if total_sentiment > 0 else None
+        )
+
+        demographics = profile.get("demographics", {})
+        geographic_reach = profile.get("geographic_reach", {})
+        top_location, location_percent = None, None
+        if geographic_reach:
+            top_location = max(geographic_reach, key=geographic_reach.get)
+            location_percent = round(
+                geographic_reach[top_location] / sum(geographic_reach.values()) * 100, 1
+            )
+
+        return {
+            "username": username,
+            "followers": profile.get("followers"),
+            "engagement_rate": profile.get("engagement_rate"),
+            "sentiment_score": sentiment_score,
+            "age_range": demographics.get("estimated_age"),
+            "age_percent": None,
+            "gender": demographics.get("gender"),
+            "gender_percent": None,
+            "top_location": top_location,
+            "location_percent": location_percent,
+            "scrape_date": profile.get("scrape_date")
+        }
+
+def create_app(data_dir=DATA_DIR, ttl=30.0, maxsize=1024):
+    """Build the Flask app over the given data directory"""
+    app = Flask(__name__)
+    store = ProfileStore(data_dir, ttl=ttl, maxsize=maxsize)
+    app.config["store"] = store
+
+    def respond(entry):
+        if entry is None:
+            abort(404)
+        body, etag = entry
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=0, must-revalidate'
+        return response.make_conditional(request)
+
+    @app.route("/health")
+    def health():
+        return {
+            "status": "ok",
+            "cache_hits": store.cache.hits,
+            "cache_misses": store.cache.misses
+        }
+
+    @app.route("/api/influencers")
+    def influencers():
+        return respond(store.usernames())
+
+    @app.route("/api/influencer/<username>/profile")
+    def profile(username):
+        return respond(store.profile(username))
+
+    @app.route("/api/influencer/<username>/analysis")
+    def analysis(username):
+        return respond(store.analysis(username))
+
+    @app.route("/api/influencer/<username>/matches")
+    def matches(username):
+        return respond(store.matches(username))
+
+    return app
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve influencer data over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "5000")))
+    parser.add_argument("--ttl", type=float, default=30.0, help="cache TTL in seconds")
+    args = parser.parse_args()
+
+    create_app(ttl=args.ttl).run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,202 @@
+"""
+Tiered Post Categorization
+
+Categorizes captions with the cheapest tier that is confident enough:
+1. a hashtag/keyword lexicon (#ootd -> Fashion, #gymlife -> Fitness)
+2. a small distilled zero-shot classifier
+3. the full zero-shot model (facebook/bart-large-mnli)
+A random share of the captions settled by the first two tiers can also be
+sent to the full model ("audited") to measure how often the cheap tiers
+agree with it, so the thresholds can be tuned against cost.
+"""
+import re
+import random
+from collections import Counter
+from scripts import instrumentation as metrics
+
+TIERS = ("lexicon", "small", "full")
+
+# Hashtags and caption words that strongly suggest a category
+LEXICON = {
+    "Fashion": ("ootd", "fashion", "style", "outfit", "streetstyle", "fashionista", "lookbook", "wiwt",
+                "menswear", "womenswear", "saree", "kurta", "sneakers", "dress", "outfitoftheday"),
+    "Beauty": ("makeup", "beauty", "skincare", "mua", "lipstick", "motd", "makeuptutorial", "nails",
+               "haircare", "glowingskin", "skincareroutine", "foundation", "eyeliner", "serum"),
+    "Lifestyle": ("lifestyle", "dailyvlog", "morningroutine", "selfcare", "minimalism", "homedecor",
+                  "dayinmylife", "vlog", "aesthetic"),
+    "Travel": ("travel", "wanderlust", "travelgram", "instatravel", "trip", "vacation", "backpacking",
+               "explore", "beach", "mountains", "roadtrip", "travelblogger", "itinerary"),
+    "Food": ("foodie", "food", "foodporn", "recipe", "instafood", "homecooking", "yummy", "delicious",
+             "biryani", "dessert", "streetfood", "foodblogger", "breakfast", "dinner", "vegan"),
+    "Fitness": ("gymlife", "fitness", "gym", "workout", "fitfam", "bodybuilding", "legday", "cardio",
+                "fitnessmotivation", "crossfit", "running", "yoga", "pushups", "gains"),
+    "Tech": ("tech", "technology", "gadgets", "smartphone", "unboxing", "coding", "programming",
+             "android", "iphone", "laptop", "ai", "developer", "techreview"),
+    "Gaming": ("gaming", "gamer", "esports", "twitch", "playstation", "xbox", "bgmi", "pubg",
+               "fortnite", "valorant", "minecraft", "gameplay", "streamer"),
+    "Business": ("business", "entrepreneur", "startup", "marketing", "hustle", "smallbusiness",
+                 "investing", "finance", "stocks", "founder", "sales", "branding"),
+    "Education": ("education", "study", "studygram", "learning", "exam", "upsc", "neet", "jee",
+                  "students", "teacher", "tutorial", "knowledge", "facts"),
+    "Entertainment": ("movie", "movies", "bollywood", "music", "comedy", "memes", "reels", "dance",
+                      "cinema", "trailer", "webseries", "standup", "song"),
+    "Arts": ("art", "artist", "drawing", "painting", "illustration", "sketch", "artwork", "digitalart",
+             "photography", "calligraphy", "craft", "design"),
+    "Sports": ("cricket", "football", "ipl", "soccer", "sports", "tennis", "badminton", "kabaddi",
+               "athlete", "match", "stadium", "olympics", "nba"),
+    "Health": ("health", "wellness", "mentalhealth", "nutrition", "healthyliving", "diet", "ayurveda",
+               "meditation", "healthylifestyle", "immunity", "doctor"),
+    "Parenting": ("parenting", "momlife", "dadlife", "baby", "toddler", "motherhood", "kids",
+                  "newborn", "momblogger", "parenthood", "pregnancy", "family")
+}
+
+_HASHTAG = re.compile(r"#(\w+)")
+_WORD = re.compile(r"[a-z]+")
+
+class LexiconClassifier:
+    """
+    Votes for categories from a caption's hashtags and words. An exact
+    hashtag match counts 2, a hashtag containing a term (#fitnessjourney)
+    or a matching word counts 1. Confidence is the winning category's share
+    of all votes.
+    """
+    def __init__(self, lexicon=None, categories=None):
+        lexicon = lexicon or LEXICON
+        if categories is not None:
+            lexicon = {category: terms for category, terms in lexicon.items() if category in categories}
+        self.terms = {}
+        for category, terms in lexicon.items():
+            for term in terms:
+                self.terms.setdefault(term.lower(), set()).add(category)
+        # Only longer terms are matched inside compound hashtags ("art" is in "party")
+        self.long_terms = [term for term in self.terms if len(term) >= 5]
+
+    def votes(self, caption):
+        votes = Counter()
+        lowered = caption.lower()
+        hashtags = _HASHTAG.findall(lowered)
+        for tag in hashtags:
+            if tag in self.terms:
+                for category in self.terms[tag]:
+                    votes[category] += 2
+                continue
+            for term in self.long_terms:
+                if term in tag:
+                    for category in self.terms[term]:
+                        votes[category] += 1
+        for word in _WORD.findall(_HASHTAG.sub(" ", lowered)):
+            for category in self.terms.get(word, ()):
+                votes[category] += 1
+        return votes
+
+    def __call__(self, caption):
+        """Return (label, confidence, top votes), or (None, 0.0, 0) with no votes"""
+        votes = self.votes(caption)
+        if not votes:
+            return None, 0.0, 0
+        label, top = votes.most_common(1)[0]
+        return label, top / sum(votes.values()), top
+
+class CategoryCascade:
+    """
+    Categorizes captions with the lexicon, then the small model, then the
+    full model, stopping at the first tier that is confident enough.
+
+    Args:
+        full_model: fn(captions) -> zero-shot results ({"labels", "scores"})
+            from the full model, e.g. the analyzer's batched BART front end
+        small_model: the same for the distilled model, or None to skip tier 2
+        categories: allowed labels; lexicon categories outside it are ignored
+        lexicon_threshold: minimum share of lexicon votes for the top category
+        min_votes: minimum lexicon votes for the top category
+        small_threshold: minimum top score from the small model
+        audit_rate: share of cheap-tier results also checked against the
+            full model to measure agreement (0 disables)
+        rng: random source for choosing audited captions
+    """
+    def __init__(self, full_model, small_model=None, categories=None, lexicon=None,
+                 lexicon_threshold=0.75, min_votes=2, small_threshold=0.5, audit_rate=0.0, rng=None):
+        self.full_model = full_model
+        self.small_model = small_model
+        self.lexicon = LexiconClassifier(lexicon, categories)
+        self.lexicon_threshold = lexicon_threshold
+        self.min_votes = min_votes
+        self.small_threshold = small_threshold
+        self.audit_rate = audit_rate
+        self.rng = rng or random.Random(0)
+        self.counts = Counter()
+
+    def __call__(self, captions):
+        """Return one {"label", "score", "tier"} per caption, in input order"""
+        results = [None] * len(captions)
+
+        pending = []
+        for i, caption in enumerate(captions):
+            label, confidence, top = self.lexicon(caption)
+            if label and top >= self.min_votes and confidence >= self.lexicon_threshold:
+                results[i] = {"label": label, "score": confidence, "tier": "lexicon"}
+            else:
+                pending.append(i)
+
+        if self.small_model is not None and pending:
+            escalate = []
+            for i, result in zip(pending, self.small_model([captions[i] for i in pending])):
+                if result["scores"][0] >= self.small_threshold:
+                    results[i] = {"label": result["labels"][0], "score": result["scores"][0], "tier": "small"}
+                else:
+                    escalate.append(i)
+            pending = escalate
+
+        audited = []
+        if self.audit_rate > 0:
+            audited = [i for i, r in enumerate(results) if r is not None and self.rng.random() < self.audit_rate]
+
+        full_results = self.full_model([captions[i] for i in pending + audited]) if pending or audited else []
+        for i, result in zip(pending, full_results):
+            results[i] = {"label": result["labels"][0], "score": result["scores"][0], "tier": "full"}
+        for i, result in zip(audited, full_results[len(pending):]):
+            tier = results[i]["tier"]
+            self.counts[f"{tier}.audited"] += 1
+            metrics.count(f"cascade.{tier}.audited")
+            if result["labels"][0] == results[i]["label"]:
+                self.counts[f"{tier}.agreed"] += 1
+                metrics.count(f"cascade.{tier}.agreed")
+
+        for result in results:
+            self.counts[result["tier"]] += 1
+            metrics.count(f"cascade.{result['tier']}")
+        return results
+
+    def stats(self):
+        """Share of captions settled by each tier and audited agreement with the full model"""
+        return cascade_stats(self.counts)
+
+def cascade_stats(counts):
+    """
+    Summarize tier counts ({"lexicon": n, "lexicon.audited": n,
+    "lexicon.agreed": n, ...}), e.g. summed over several profiles
+    """
+    total = sum(counts.get(tier, 0) for tier in TIERS)
+    stats = {
+        "captions": total,
+        "shares": {tier: counts.get(tier, 0) / total if total else 0.0 for tier in TIERS},
+        "escalated_share": counts.get("full", 0) / total if total else 0.0,
+        "agreement": {}
+    }
+    audited = agreed = 0
+    for tier in TIERS[:-1]:
+        n = counts.get(f"{tier}.audited", 0)
+        if n:
+            stats["agreement"][tier] = {"audited": n, "agreement": counts.get(f"{tier}.agreed", 0) / n}
+        audited += n
+        agreed += counts.get(f"{tier}.agreed", 0)
+    if audited:
+        stats["agreement"]["overall"] = {"audited": audited, "agreement": agreed / audited}
+    return stats
+
+# Example usage
+if __name__ == "__main__":
+    lexicon = LexiconClassifier()
+    for caption in ["Sunday fit check #ootd #streetstyle", "Leg day done 💪 #gymlife #fitfam",
+                    "Trying the new biryani place #foodie", "Had a great weekend with friends"]:
+        print(caption, "->", lexicon(caption))
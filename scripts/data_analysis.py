@@ -3,29 +3,56 @@ Data Analysis Module for Influencer-Brand Matching System
 """
 import os
 import json
+import random
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
-from transformers import pipeline
 from config import DATA_DIR, update_progress
+from scripts import instrumentation as metrics
+from scripts.text_preprocessing import BatchedTextModel
+from scripts.model_server import load_pipeline
+from scripts.category_cascade import CategoryCascade
+from scripts.sentiment_sampling import estimate_comment_sentiment
+from scripts.roster_analytics import RosterAnalytics, METRICS as ROSTER_METRICS, describe_group
+from scripts.analysis_cache import profile_hash, shared_analysis_cache
 
 class InfluencerAnalyzer:
-    def __init__(self, data_dir=DATA_DIR):
+    def __init__(self, data_dir=DATA_DIR, sentiment_analyzer=None, post_classifier=None,
+                 comment_sample_margin=None, comment_sample_confidence=0.95, category_cascade=None,
+                 timeseries_store=None, analysis_cache=None):
+        """
+        Initialize the analyzer. Pre-built pipelines (or callables with the
+        same interface) can be passed in to skip loading the default models.
+        With comment_sample_margin set (e.g. 0.03), comment sentiment is
+        estimated from a stratified sample to that margin of error instead
+        of classifying every comment. category_cascade (a dict of
+        CategoryCascade options, {} for the defaults) categorizes posts with
+        the lexicon and a small model first and only escalates ambiguous
+        captions to BART. With a TimeSeriesStore, charts also show the
+        follower and engagement history recorded across scrapes. Reports
+        place each influencer among its roster peers (see roster).
+        Analyses are kept in analysis_cache (by default one shared by all
+        analyzers in the process), so each profile version is analyzed at
+        most once however many charts, reports and matches ask for it.
+        """
         self.data_dir = data_dir
-        
-        # Initialize sentiment analysis pipeline
-        self.sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="nlptown/bert-base-multilingual-uncased-sentiment"
-        )
-        
-        # Initialize zero-shot classification pipeline for post categorization
-        self.post_classifier = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli"
-        )
+        self.comment_sample_margin = comment_sample_margin
+        self.comment_sample_confidence = comment_sample_confidence
+        self.category_cascade = category_cascade
+        self._cascade = None
+        self.timeseries_store = timeseries_store
+        self._roster = None
+        self.analysis_cache = analysis_cache if analysis_cache is not None else shared_analysis_cache()
+        
+        # Models are loaded on first use, so chart- and report-only callers
+        # don't pay for them; with BRANDEX_MODEL_SERVER set they run on the
+        # shared model server instead
+        self._sentiment_analyzer = sentiment_analyzer
+        self._post_classifier = post_classifier
+        self._batched_sentiment = None
+        self._batched_categorizer = None
         
         # Common post categories
         self.categories = [
@@ -34,18 +61,123 @@ class InfluencerAnalyzer:
             "Entertainment", "Arts", "Sports", "Health", "Parenting"
         ]
     
-    def load_influencer_data(self, username):
-        """Load the scraped data for a specific influencer"""
+    @property
+    def sentiment_analyzer(self):
+        """Sentiment analysis pipeline"""
+        if self._sentiment_analyzer is None:
+            self._sentiment_analyzer = load_pipeline("sentiment")
+        return self._sentiment_analyzer
+    
+    @property
+    def post_classifier(self):
+        """Zero-shot classification pipeline for post categorization"""
+        if self._post_classifier is None:
+            self._post_classifier = load_pipeline("category")
+        return self._post_classifier
+    
+    @property
+    def batched_sentiment(self):
+        """Deduplicating, length-batched front end to the sentiment model"""
+        if self._batched_sentiment is None:
+            self._batched_sentiment = BatchedTextModel(
+                self.sentiment_analyzer,
+                batch_size=32,
+                fallback={"label": "neutral", "score": 1.0},
+                name="sentiment"
+            )
+        return self._batched_sentiment
+    
+    @property
+    def batched_categorizer(self):
+        """Deduplicating, length-batched front end to the category model"""
+        if self._batched_categorizer is None:
+            self._batched_categorizer = BatchedTextModel(
+                self.post_classifier,
+                batch_size=8,
+                call=lambda model, batch: model(batch, self.categories, truncation=True),
+                fallback={"labels": ["Uncategorized"], "scores": [1.0]},
+                name="category"
+            )
+        return self._batched_categorizer
+    
+    @property
+    def cascade(self):
+        """Lexicon -> small model -> BART categorizer, used when category_cascade is set"""
+        if self._cascade is None:
+            small_model = BatchedTextModel(
+                load_pipeline("category_small"),
+                batch_size=16,
+                call=lambda model, batch: model(batch, self.categories, truncation=True),
+                fallback={"labels": ["Uncategorized"], "scores": [0.0]},
+                name="category_small"
+            )
+            self._cascade = CategoryCascade(
+                self.batched_categorizer,
+                small_model=small_model,
+                categories=self.categories,
+                **self.category_cascade
+            )
+        return self._cascade
+    
+    @property
+    def roster(self):
+        """Roster-wide percentile aggregates, loaded once and reused for every report"""
+        if self._roster is None:
+            self._roster = RosterAnalytics(self.data_dir).refresh()
+        return self._roster
+    
+    def _read_profile(self, username):
+        """Raw bytes of the scraped profile, or None if it hasn't been scraped"""
         file_path = os.path.join(self.data_dir, f"{username}_profile.json")
         
         if not os.path.exists(file_path):
-            print(f"No data found for {username}. Please scrape the data first.")
             return None
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with metrics.span("io.read_profile"):
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        metrics.count("io.bytes_read", len(content))
+        return content
+    
+    def load_influencer_data(self, username):
+        """Load the scraped data for a specific influencer"""
+        content = self._read_profile(username)
+        
+        if content is None:
+            print(f"No data found for {username}. Please scrape the data first.")
+            return None
         
-        return data
+        return json.loads(content)
+    
+    def _read_analysis(self, username):
+        """Saved analysis and its size in bytes, or (None, 0)"""
+        analysis_file = os.path.join(self.data_dir, f"{username}_analysis.json")
+        if not os.path.exists(analysis_file):
+            return None, 0
+        with open(analysis_file, 'rb') as f:
+            content = f.read()
+        metrics.count("io.bytes_read", len(content))
+        return json.loads(content), len(content)
+    
+    def get_analysis(self, username):
+        """
+        The analysis of the current profile version: from the cache, from
+        the saved analysis if it was made from this version, or computed now
+        """
+        content = self._read_profile(username)
+        if content is None:
+            # Nothing to check a saved analysis against; use it as is
+            return self._read_analysis(username)[0]
+        version = profile_hash(content)
+        
+        def load_or_analyze():
+            analysis, size = self._read_analysis(username)
+            # Analyses saved before profile hashes were recorded are trusted as is
+            if analysis and analysis.get("profile_hash", version) == version:
+                return analysis, size
+            return self._analyze_profile(username, json.loads(content), version)
+        
+        return self.analysis_cache.get_or_compute(username, version, load_or_analyze)
     
     def analyze_sentiment(self, text):
         """Analyze sentiment of the given text"""
@@ -53,19 +185,43 @@ class InfluencerAnalyzer:
             return {"label": "neutral", "score": 1.0}
         
         try:
-            result = self.sentiment_analyzer(text)[0]
+            with metrics.span("model.sentiment"):
+                result = self.sentiment_analyzer(text)[0]
+            metrics.count("model.sentiment.calls")
+            metrics.count("model.sentiment.texts")
+            metrics.observe("model.sentiment.batch_size", 1)
             return result
         except Exception as e:
             print(f"Error analyzing sentiment: {e}")
             return {"label": "neutral", "score": 1.0}
     
+    def analyze_sentiments(self, texts):
+        """Analyze sentiment of many texts at once, deduplicated and batched"""
+        results = [{"label": "neutral", "score": 1.0}] * len(texts)
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        for i, result in zip(indices, self.batched_sentiment([texts[i] for i in indices])):
+            results[i] = result
+        return results
+    
+    @staticmethod
+    def sentiment_category(label):
+        """Map a model label ("1 star".."5 stars", or positive/negative) to positive/neutral/negative"""
+        if "positive" in label or (label[0].isdigit() and int(label[0]) >= 4):
+            return "positive"
+        elif "negative" in label or (label[0].isdigit() and int(label[0]) <= 2):
+            return "negative"
+        return "neutral"
+    
     def categorize_post(self, caption):
         """Categorize a post based on its caption"""
         if not caption or len(caption.strip()) == 0:
             return {"label": "Uncategorized", "score": 1.0}
         
         try:
-            result = self.post_classifier(caption, self.categories)
+            with metrics.span("model.category"):
+                result = self.post_classifier(caption, self.categories)
+            metrics.count("model.category.calls")
+            metrics.count("model.category.texts")
             return {
                 "label": result["labels"][0],
                 "score": result["scores"][0]
@@ -74,16 +230,44 @@ class InfluencerAnalyzer:
             print(f"Error categorizing post: {e}")
             return {"label": "Uncategorized", "score": 1.0}
     
+    def categorize_posts(self, captions):
+        """Categorize many captions at once, deduplicated and batched"""
+        results = [{"label": "Uncategorized", "score": 1.0}] * len(captions)
+        indices = [i for i, caption in enumerate(captions) if caption and caption.strip()]
+        if self.category_cascade is not None:
+            for i, result in zip(indices, self.cascade([captions[i] for i in indices])):
+                results[i] = result
+            return results
+        for i, result in zip(indices, self.batched_categorizer([captions[i] for i in indices])):
+            results[i] = {"label": result["labels"][0], "score": result["scores"][0]}
+        return results
+    
     def analyze_influencer(self, username):
-        """Analyze the influencer data and generate insights"""
-        data = self.load_influencer_data(username)
+        """
+        Analyze the influencer data and generate insights. Repeated calls
+        for an unchanged profile return the cached analysis.
+        """
+        content = self._read_profile(username)
         
+        if content is None:
+            print(f"No data found for {username}. Please scrape the data first.")
+            return None
+        
+        version = profile_hash(content)
+        return self.analysis_cache.get_or_compute(
+            username, version, lambda: self._analyze_profile(username, json.loads(content), version)
+        )
+    
+    @metrics.timed("analysis.influencer")
+    def _analyze_profile(self, username, data, version):
+        """Run the models over one profile version and save the analysis"""
         if not data:
             return None
         
         # Create an analysis results dictionary
         analysis = {
             "username": username,
+            "profile_hash": version,
             "analysis_date": datetime.now().strftime("%Y-%m-%d"),
             "basic_metrics": {
                 "followers": data["followers"],
@@ -117,7 +301,11 @@ class InfluencerAnalyzer:
             print(f"No posts found for {username}")
             return analysis
         
-        # Process each post
+        # Collect captions and comments of posts with a caption, so every
+        # text goes through the models in one deduplicated, batched pass
+        captioned_posts = []
+        texts = []
+        comments_by_post = []
         for idx, post in posts_df.iterrows():
             caption = post.get("caption", "")
             
@@ -125,39 +313,61 @@ class InfluencerAnalyzer:
             if not caption or len(caption.strip()) == 0:
                 continue
             
-            # Analyze post sentiment
-            sentiment = self.analyze_sentiment(caption)
+            comment_texts = []
+            if "comment_data" in post and isinstance(post["comment_data"], list):
+                comment_texts = [
+                    comment.get("text", "") for comment in post["comment_data"]
+                    if comment.get("text", "")
+                ]
+            if self.comment_sample_margin:
+                # Comments are sampled separately below
+                comments_by_post.append(comment_texts)
+                comment_texts = []
+            captioned_posts.append((post, caption, len(texts), len(comment_texts)))
+            texts.append(caption)
+            texts.extend(comment_texts)
+        
+        sentiments = self.analyze_sentiments(texts)
+        if self.comment_sample_margin:
+            estimate = estimate_comment_sentiment(
+                comments_by_post,
+                lambda batch: [self.sentiment_category(r["label"]) for r in self.analyze_sentiments(batch)],
+                margin=self.comment_sample_margin,
+                confidence=self.comment_sample_confidence,
+                rng=random.Random(username)
+            )
+            metrics.count("analysis.comments_total", estimate["total"])
+            metrics.count("analysis.comments_sampled", estimate["sampled"])
+            analysis["content_analysis"]["comment_sentiment"] = {
+                category: round(share * estimate["total"])
+                for category, share in estimate["shares"].items()
+            }
+            analysis["content_analysis"]["comment_sentiment_estimate"] = estimate
+        if self.category_cascade is not None:
+            tier_counts = dict(self.cascade.counts)
+        categories = self.categorize_posts([caption for _, caption, _, _ in captioned_posts])
+        if self.category_cascade is not None:
+            # Tier and audit counts for this profile, for cascade_stats()
+            analysis["content_analysis"]["category_tiers"] = {
+                key: count - tier_counts.get(key, 0)
+                for key, count in self.cascade.counts.items()
+                if count - tier_counts.get(key, 0)
+            }
+        
+        # Process each post
+        for (post, caption, offset, n_comments), category in zip(captioned_posts, categories):
+            # Post sentiment
+            sentiment = sentiments[offset]
             sentiment_label = sentiment["label"]
-            
-            # Map sentiment labels to positive/neutral/negative
-            if "positive" in sentiment_label or int(sentiment_label[0]) >= 4:
-                sentiment_category = "positive"
-            elif "negative" in sentiment_label or int(sentiment_label[0]) <= 2:
-                sentiment_category = "negative"
-            else:
-                sentiment_category = "neutral"
-            
+            sentiment_category = self.sentiment_category(sentiment_label)
             analysis["content_analysis"]["sentiment"][sentiment_category] += 1
             
-            # Analyze comment sentiment if available
-            if "comment_data" in post and post["comment_data"]:
-                for comment in post["comment_data"]:
-                    comment_text = comment.get("text", "")
-                    if comment_text:
-                        comment_sentiment = self.analyze_sentiment(comment_text)
-                        comment_label = comment_sentiment["label"]
-                        
-                        if "positive" in comment_label or int(comment_label[0]) >= 4:
-                            comment_category = "positive"
-                        elif "negative" in comment_label or int(comment_label[0]) <= 2:
-                            comment_category = "negative"
-                        else:
-                            comment_category = "neutral"
-                        
-                        analysis["content_analysis"]["comment_sentiment"][comment_category] += 1
+            # Comment sentiment
+            for comment_sentiment in sentiments[offset + 1:offset + 1 + n_comments]:
+                comment_category = self.sentiment_category(comment_sentiment["label"])
+                analysis["content_analysis"]["comment_sentiment"][comment_category] += 1
             
-            # Categorize post
-            category = self.categorize_post(caption)
+            # Post category
             category_label = category["label"]
             
             if category_label in analysis["content_analysis"]["categories"]:
@@ -177,6 +387,8 @@ class InfluencerAnalyzer:
                 "engagement_rate": post.get("engagement_rate", 0),
                 "posted_on": post.get("posted_on", "")
             }
+            if "tier" in category:
+                post_analysis["category_tier"] = category["tier"]
             
             analysis["content_analysis"]["posts"].append(post_analysis)
         
@@ -197,23 +409,21 @@ class InfluencerAnalyzer:
         
         # Save analysis to file
         analysis_file = os.path.join(self.data_dir, f"{username}_analysis.json")
-        with open(analysis_file, 'w', encoding='utf-8') as f:
-            json.dump(analysis, f, ensure_ascii=False, indent=4)
+        with metrics.span("io.write_analysis"):
+            encoded = json.dumps(analysis, ensure_ascii=False, indent=4).encode('utf-8')
+            with open(analysis_file, 'wb') as f:
+                f.write(encoded)
+        metrics.count("io.bytes_written", len(encoded))
         
         print(f"Analysis for {username} saved to {analysis_file}")
-        return analysis
+        return analysis, len(encoded)
     
+    @metrics.timed("viz.generate")
     def generate_visualizations(self, username):
         """Generate visualizations from the analysis data"""
-        analysis_file = os.path.join(self.data_dir, f"{username}_analysis.json")
-        
-        if not os.path.exists(analysis_file):
-            analysis = self.analyze_influencer(username)
-            if not analysis:
-                return False
-        else:
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                analysis = json.load(f)
+        analysis = self.get_analysis(username)
+        if not analysis:
+            return False
         
         # Create visualization directory
         viz_dir = os.path.join(self.data_dir, f"{username}_visualizations")
@@ -242,7 +452,8 @@ class InfluencerAnalyzer:
             plt.axis('equal')
             plt.title(f'Content Category Distribution for @{username}')
             plt.tight_layout()
-            plt.savefig(os.path.join(viz_dir, "category_distribution.png"))
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "category_distribution.png"))
             plt.close()
         
         # 2. Sentiment Analysis Pie Charts
@@ -256,7 +467,8 @@ class InfluencerAnalyzer:
         plt.axis('equal')
         plt.title(f'Post Sentiment Distribution for @{username}')
         plt.tight_layout()
-        plt.savefig(os.path.join(viz_dir, "post_sentiment.png"))
+        with metrics.span("viz.savefig"):
+            plt.savefig(os.path.join(viz_dir, "post_sentiment.png"))
         plt.close()
         
         # Comment sentiment (if available)
@@ -269,7 +481,8 @@ class InfluencerAnalyzer:
             plt.axis('equal')
             plt.title(f'Comment Sentiment Distribution for @{username}')
             plt.tight_layout()
-            plt.savefig(os.path.join(viz_dir, "comment_sentiment.png"))
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "comment_sentiment.png"))
             plt.close()
         
         # 3. Language and Geographic Distribution Charts
@@ -291,7 +504,8 @@ class InfluencerAnalyzer:
             plt.title(f'Language Distribution for @{username}')
             plt.xticks(rotation=45)
             plt.tight_layout()
-            plt.savefig(os.path.join(viz_dir, "language_distribution.png"))
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "language_distribution.png"))
             plt.close()
             
         # Geographic reach
@@ -312,7 +526,8 @@ class InfluencerAnalyzer:
             plt.title(f'Geographic Reach for @{username}')
             plt.xticks(rotation=45)
             plt.tight_layout()
-            plt.savefig(os.path.join(viz_dir, "geographic_reach.png"))
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "geographic_reach.png"))
             plt.close()
         
         # 4. Engagement Rate Trend Line
@@ -333,9 +548,29 @@ class InfluencerAnalyzer:
             plt.xticks(rotation=45)
             plt.grid(True)
             plt.tight_layout()
-            plt.savefig(os.path.join(viz_dir, "engagement_trend.png"))
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "engagement_trend.png"))
             plt.close()
         
+        # 4b. Follower and Engagement History across scrapes
+        history = self.timeseries_store.profile_history(username) if self.timeseries_store else None
+        if history is not None and len(history["timestamp"]) >= 2:
+            dates = pd.to_datetime(history["timestamp"], unit="s")
+            fig, (followers_ax, engagement_ax) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+            followers_ax.plot(dates, history["followers"], marker='o')
+            followers_ax.set_ylabel('Followers')
+            followers_ax.set_title(f'Follower and Engagement History for @{username}')
+            followers_ax.grid(True)
+            engagement_ax.plot(dates, history["engagement_rate"], marker='o', color='tab:orange')
+            engagement_ax.set_xlabel('Scrape Date')
+            engagement_ax.set_ylabel('Engagement Rate (%)')
+            engagement_ax.grid(True)
+            fig.autofmt_xdate()
+            plt.tight_layout()
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "growth_history.png"))
+            plt.close(fig)
+        
         # 5. Likes vs Comments Scatter Plot
         if analysis["content_analysis"]["posts"]:
             plt.figure(figsize=(10, 6))
@@ -348,23 +583,19 @@ class InfluencerAnalyzer:
             plt.title(f'Likes vs Comments for @{username}')
             plt.grid(True)
             plt.tight_layout()
-            plt.savefig(os.path.join(viz_dir, "likes_vs_comments.png"))
+            with metrics.span("viz.savefig"):
+                plt.savefig(os.path.join(viz_dir, "likes_vs_comments.png"))
             plt.close()
         
         print(f"Visualizations for {username} generated in {viz_dir}")
         return True
     
+    @metrics.timed("report.generate")
     def generate_report(self, username):
         """Generate a markdown report from the analysis data"""
-        analysis_file = os.path.join(self.data_dir, f"{username}_analysis.json")
-        
-        if not os.path.exists(analysis_file):
-            analysis = self.analyze_influencer(username)
-            if not analysis:
-                return False
-        else:
-            with open(analysis_file, 'r', encoding='utf-8') as f:
-                analysis = json.load(f)
+        analysis = self.get_analysis(username)
+        if not analysis:
+            return False
         
         # Create visualization directory if it doesn't exist
         viz_dir = os.path.join(self.data_dir, f"{username}_visualizations")
@@ -424,8 +655,16 @@ class InfluencerAnalyzer:
         # Comment sentiment
         if total_comments > 0:
             report += "\n#### Comment Sentiment\n"
+            estimate = analysis["content_analysis"].get("comment_sentiment_estimate")
             for label, percentage in comment_sentiment.items():
-                report += f"- **{label.capitalize()}:** {percentage:.1f}%\n"
+                if estimate and not estimate["exact"]:
+                    error = estimate["margin_of_error"].get(label, 0.0) * 100
+                    report += f"- **{label.capitalize()}:** {percentage:.1f}% (±{error:.1f}%)\n"
+                else:
+                    report += f"- **{label.capitalize()}:** {percentage:.1f}%\n"
+            if estimate and not estimate["exact"]:
+                report += (f"\n*Estimated from {estimate['sampled']} of {estimate['total']} comments "
+                           f"at {estimate['confidence']:.0%} confidence*\n")
         else:
             report += "- No comment sentiment data available\n"
         
@@ -471,6 +710,31 @@ class InfluencerAnalyzer:
         else:
             report += "- No engagement data available\n"
         
+        # Add percentile context among comparable influencers
+        report += """
+### Roster Benchmarks
+"""
+        context = self.roster.context(analysis)
+        if context["metrics"]:
+            groups = {result["group"] for result in context["metrics"].values()}
+            if len(groups) == 1:
+                result = next(iter(context["metrics"].values()))
+                report += f"Compared with {result['peers']} {describe_group(result['group'])}:\n\n"
+            for metric, result in context["metrics"].items():
+                label = ROSTER_METRICS[metric]
+                if metric == "category_focus":
+                    label += f" ({context['category']})"
+                if metric == "engagement_rate":
+                    value, median = f"{result['value']:.2f}%", f"{result['median']:.2f}%"
+                else:
+                    value, median = f"{result['value']:.0%}", f"{result['median']:.0%}"
+                line = f"- **{label}:** {value} (percentile {result['percentile']:.0f}, median {median})"
+                if len(groups) > 1:
+                    line += f" among {result['peers']} {describe_group(result['group'])}"
+                report += line + "\n"
+        else:
+            report += "- Not enough analyzed influencers on the roster for benchmarks yet\n"
+        
         # Add top performing posts
         report += """
 ### Top Performing Posts
@@ -509,8 +773,10 @@ Report generated on: {datetime.now().strftime("%Y-%m-%d")}
         
         # Save report to file
         report_file = os.path.join(self.data_dir, f"{username}_report.md")
-        with open(report_file, 'w', encoding='utf-8') as f:
-            f.write(report)
+        encoded = report.encode('utf-8')
+        with open(report_file, 'wb') as f:
+            f.write(encoded)
+        metrics.count("io.bytes_written", len(encoded))
         
         print(f"Analysis report for {username} saved to {report_file}")
         return report_file
@@ -6,11 +6,44 @@ import json
 import instaloader
 import pandas as pd
 from datetime import datetime
-from transformers import pipeline
+from config import INSTAGRAM_USERNAME, INSTAGRAM_PASSWORD, GOOGLE_VISION_API_KEY
+from scripts import instrumentation as metrics
+from scripts.text_preprocessing import BatchedTextModel
+from scripts.model_server import load_pipeline
+
+def load_language_detector():
+    """Build the language detection pipeline (served remotely when BRANDEX_MODEL_SERVER is set)"""
+    return load_pipeline("language")
+
+def detect_post_languages(profile_data, language_detector, batch_size=32):
+    """
+    Set detected_language and language_confidence on every captioned post
+    of profile_data in one batched pass. Used when scraping runs with
+    detect_languages=False, e.g. as its own pipeline stage.
+    """
+    if not isinstance(language_detector, BatchedTextModel):
+        language_detector = BatchedTextModel(
+            language_detector,
+            batch_size=batch_size,
+            fallback={"label": "unknown", "score": 0.0},
+            name="language"
+        )
+    posts = [post for post in profile_data.get("posts", []) if post.get("caption")]
+    for post, result in zip(posts, language_detector([post["caption"] for post in posts])):
+        post["detected_language"] = result["label"]
+        post["language_confidence"] = result["score"]
+    return profile_data
 
 class InfluencerScraper:
-    def __init__(self, save_dir="data"):
-        """Initialize the scraper"""
+    def __init__(self, save_dir="data", language_detector=None, detect_languages=True, hashtag_index=None,
+                 timeseries_store=None):
+        """
+        Initialize the scraper, optionally with a pre-built language detector.
+        With detect_languages=False no detector is loaded and posts are saved
+        without language labels (see detect_post_languages). A HashtagIndex,
+        if given, is updated with every scraped profile, and a
+        TimeSeriesStore records a snapshot of its metrics.
+        """
         self.instance = instaloader.Instaloader(
             download_pictures=False,
             download_videos=False,
@@ -20,16 +53,17 @@ class InfluencerScraper:
             save_metadata=True
         )
         self.save_dir = save_dir
+        self.hashtag_index = hashtag_index
+        self.timeseries_store = timeseries_store
         
         # Create data directory if it doesn't exist
         if not os.path.exists(save_dir):
             os.makedirs(save_dir)
             
         # Initialize language detection pipeline
-        self.language_detector = pipeline(
-            "text-classification", 
-            model="papluca/xlm-roberta-base-language-detection"
-        )
+        self.language_detector = None
+        if detect_languages:
+            self.language_detector = language_detector or load_language_detector()
             
     def login(self, username, password):
         """Login to Instagram (optional, for private profiles)"""
@@ -41,12 +75,19 @@ class InfluencerScraper:
             print(f"Login failed: {e}")
             return False
             
+    def _rate_limit_wait(self, seconds):
+        """Sleep to stay under Instagram's rate limits, recording the wait"""
+        import time
+        with metrics.span("scrape.rate_limit_wait"):
+            time.sleep(seconds)
+        metrics.count("scrape.rate_limit_waits")
+
+    @metrics.timed("scrape.profile")
     def scrape_profile(self, username):
         """Scrape profile data for a given Instagram username"""
         try:
             # Add delay to avoid rate limiting
-            import time
-            time.sleep(5)
+            self._rate_limit_wait(5)
             
             # Try with login first if credentials exist
             if INSTAGRAM_USERNAME and INSTAGRAM_PASSWORD:
@@ -85,7 +126,7 @@ class InfluencerScraper:
             post_count = 0
             for post in profile.get_posts():
                 # Add delay between posts
-                time.sleep(2)
+                self._rate_limit_wait(2)
                 if post_count >= 7:
                     break
                 
@@ -104,6 +145,7 @@ class InfluencerScraper:
 
                 # Collect comments if available
                 if post.comments > 0:
+                    metrics.count("scrape.comments_requested", post.comments)
                     for comment in post.get_comments():
                         post_data["comment_data"].append({
                             "text": comment.text,
@@ -113,9 +155,12 @@ class InfluencerScraper:
                         })
                 
                 # Detect language and analyze demographics if profile pic available
-                if post.caption:
+                if post.caption and self.language_detector:
                     try:
-                        language_result = self.language_detector(post.caption)
+                        with metrics.span("model.language"):
+                            language_result = self.language_detector(post.caption)
+                        metrics.count("model.language.calls")
+                        metrics.count("model.language.texts")
                         post_data["detected_language"] = language_result[0]["label"]
                         post_data["language_confidence"] = language_result[0]["score"]
                     except:
@@ -179,8 +224,19 @@ class InfluencerScraper:
             
             # Save profile data to JSON
             profile_file = os.path.join(self.save_dir, f"{username}_profile.json")
-            with open(profile_file, 'w', encoding='utf-8') as f:
-                json.dump(profile_data, f, ensure_ascii=False, indent=4)
+            with metrics.span("io.write_profile"):
+                encoded = json.dumps(profile_data, ensure_ascii=False, indent=4).encode('utf-8')
+                with open(profile_file, 'wb') as f:
+                    f.write(encoded)
+            metrics.count("io.bytes_written", len(encoded))
+            metrics.count("scrape.posts", post_count)
+            
+            if self.hashtag_index is not None:
+                with metrics.span("hashtags.update"):
+                    self.hashtag_index.add_profile(profile_data)
+            if self.timeseries_store is not None:
+                with metrics.span("timeseries.record"):
+                    self.timeseries_store.record_profile(profile_data)
             
             print(f"Profile data for {username} saved to {profile_file}")
             return profile_data
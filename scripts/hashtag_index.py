@@ -0,0 +1,371 @@
+"""
+Inverted Hashtag Index
+
+Maps every hashtag to the posts (and so the influencers and dates) that
+used it, across all scraped profiles, so questions like "who used
+#skincare in the last 30 days" or "what gets tagged alongside #skincare"
+don't need to parse every profile JSON.
+
+Posting lists are sorted post ids stored as varint-encoded deltas and
+decoded with NumPy at query time. A forward index (post -> hashtags) in CSR
+layout backs the co-occurrence queries. New scrapes are appended in place;
+each change is journaled next to the snapshot file like IncrementalMatcher.
+"""
+import os
+import io
+import re
+import json
+import threading
+from array import array
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+_HASHTAG = re.compile(r"#(\w+)")
+
+def encode_varint(value: int, out: bytearray):
+    """Append value as a LEB128 varint (7 bits per byte, high bit = more bytes)"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def decode_deltas(buffer) -> np.ndarray:
+    """Decode a buffer of varint deltas into the sorted ids they encode"""
+    data = np.frombuffer(bytes(buffer), dtype=np.uint8)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Byte position of every byte within its varint
+    position = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    values = (data & 0x7F).astype(np.int64) << (7 * position)
+    return np.cumsum(np.add.reduceat(values, starts))
+
+def _ordinal(day) -> int:
+    if not day:
+        return 0
+    if isinstance(day, str):
+        try:
+            day = date.fromisoformat(day[:10])
+        except ValueError:
+            return 0
+    return day.toordinal()
+
+def normalize_hashtag(tag: str) -> str:
+    return tag.lstrip("#").strip().lower()
+
+def post_hashtags(post) -> List[str]:
+    """Unique normalized hashtags of a scraped post, from its hashtags field or its caption"""
+    tags = post.get("hashtags")
+    if tags is None:
+        tags = _HASHTAG.findall(post.get("caption") or "")
+    return sorted({normalize_hashtag(tag) for tag in tags if normalize_hashtag(tag)})
+
+class HashtagIndex:
+    """
+    Incrementally maintained hashtag -> (influencer, post, date) index.
+
+    Post ids are assigned in arrival order, so appending a post keeps every
+    posting list sorted. Re-scraped posts whose hashtags or date changed are
+    re-indexed under a new id and the old id is tombstoned.
+    """
+    def __init__(self, state_file: Optional[str] = None):
+        self.state_file = state_file
+        self._lock = threading.RLock()
+        self._replaying = False
+
+        self.influencers: List[str] = []
+        self._influencer_ids: Dict[str, int] = {}
+        self.hashtags: List[str] = []
+        self._hashtag_ids: Dict[str, int] = {}
+
+        # Per post
+        self._post_keys: List[str] = []
+        self._post_ids: Dict[str, int] = {}
+        self._post_influencer = array('I')
+        self._post_date = array('i')   # date ordinal, 0 if unknown
+        self._alive = bytearray()
+        # Forward index: hashtags of post p are _tags[_tag_offsets[p]:_tag_offsets[p + 1]]
+        self._tag_offsets = array('Q', [0])
+        self._tags = array('I')
+
+        # Per hashtag: varint gaps between its post ids (the first gap counted
+        # from 0), and the last id for appends
+        self._postings: List[bytearray] = []
+        self._last_post: List[int] = []
+
+        if state_file and (os.path.exists(state_file) or os.path.exists(self._journal_file)):
+            self.load()
+
+    @property
+    def _journal_file(self) -> str:
+        return self.state_file + ".journal"
+
+    def __len__(self):
+        """Number of live posts"""
+        return sum(self._alive)
+
+    def _journal(self, op: str, record):
+        if not self.state_file or self._replaying:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self._journal_file)), exist_ok=True)
+        with open(self._journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({"op": op, "record": record}, ensure_ascii=False) + "\n")
+
+    def _influencer_id(self, username: str) -> int:
+        if username not in self._influencer_ids:
+            self._influencer_ids[username] = len(self.influencers)
+            self.influencers.append(username)
+        return self._influencer_ids[username]
+
+    def _hashtag_id(self, tag: str) -> int:
+        if tag not in self._hashtag_ids:
+            self._hashtag_ids[tag] = len(self.hashtags)
+            self.hashtags.append(tag)
+            self._postings.append(bytearray())
+            self._last_post.append(0)
+        return self._hashtag_ids[tag]
+
+    def _same_post(self, post_id: int, tags: List[str], day: int) -> bool:
+        start, end = self._tag_offsets[post_id], self._tag_offsets[post_id + 1]
+        return (self._post_date[post_id] == day
+                and sorted(self.hashtags[t] for t in self._tags[start:end]) == tags)
+
+    def _append_post(self, key: str, influencer_id: int, tags: List[str], day: int):
+        post_id = len(self._post_keys)
+        self._post_keys.append(key)
+        self._post_ids[key] = post_id
+        self._post_influencer.append(influencer_id)
+        self._post_date.append(day)
+        self._alive.append(1)
+        for tag in tags:
+            tag_id = self._hashtag_id(tag)
+            encode_varint(post_id - self._last_post[tag_id], self._postings[tag_id])
+            self._last_post[tag_id] = post_id
+            self._tags.append(tag_id)
+        self._tag_offsets.append(len(self._tags))
+
+    # Updates
+
+    def add_profile(self, profile_data) -> int:
+        """
+        Index the posts of a scraped profile. Posts already indexed with the
+        same hashtags and date are skipped; posts missing from this scrape
+        stay indexed. Returns the number of posts (re)indexed.
+        """
+        username = profile_data["username"]
+        posts = [
+            {"post_id": post.get("post_id") or f"{username}/{i}",
+             "posted_on": post.get("posted_on"),
+             "hashtags": post_hashtags(post)}
+            for i, post in enumerate(profile_data.get("posts", []))
+        ]
+        with self._lock:
+            influencer_id = self._influencer_id(username)
+            changed = []
+            for post in posts:
+                day = _ordinal(post["posted_on"])
+                existing = self._post_ids.get(post["post_id"])
+                if existing is not None and self._alive[existing]:
+                    if self._same_post(existing, post["hashtags"], day):
+                        continue
+                    self._alive[existing] = 0
+                self._append_post(post["post_id"], influencer_id, post["hashtags"], day)
+                changed.append(post)
+            if changed:
+                self._journal("add_profile", {"username": username, "posts": changed})
+            return len(changed)
+
+    def remove_influencer(self, username: str) -> int:
+        """Tombstone every post of an influencer; returns the number removed"""
+        with self._lock:
+            influencer_id = self._influencer_ids.get(username)
+            if influencer_id is None:
+                return 0
+            removed = 0
+            for post_id in np.flatnonzero(np.frombuffer(self._post_influencer, dtype=np.uint32) == influencer_id):
+                if self._alive[post_id]:
+                    self._alive[post_id] = 0
+                    removed += 1
+            self._journal("remove_influencer", username)
+            return removed
+
+    # Queries
+
+    def _post_ids_for(self, tag: str, since=None, until=None, days=None) -> np.ndarray:
+        tag_id = self._hashtag_ids.get(normalize_hashtag(tag))
+        if tag_id is None:
+            return np.zeros(0, dtype=np.int64)
+        post_ids = decode_deltas(self._postings[tag_id])
+        keep = np.frombuffer(self._alive, dtype=np.uint8)[post_ids].astype(bool)
+        if days is not None:
+            since = date.today() - timedelta(days=days)
+        if since is not None or until is not None:
+            dates = np.frombuffer(self._post_date, dtype=np.int32)[post_ids]
+            if since is not None:
+                keep &= dates >= _ordinal(since)
+            if until is not None:
+                keep &= (dates <= _ordinal(until)) & (dates > 0)
+        return post_ids[keep]
+
+    def postings(self, tag: str, since=None, until=None, days=None) -> List[Tuple[str, str, Optional[str]]]:
+        """(influencer, post_id, posted_on) for every post using `tag`, optionally within a date range"""
+        with self._lock:
+            post_ids = self._post_ids_for(tag, since, until, days)
+            return [
+                (self.influencers[self._post_influencer[p]], self._post_keys[p],
+                 date.fromordinal(self._post_date[p]).isoformat() if self._post_date[p] else None)
+                for p in post_ids.tolist()
+            ]
+
+    def influencers_using(self, tag: str, since=None, until=None, days=None) -> List[Tuple[str, int]]:
+        """Influencers who used `tag` with their post counts, most frequent first"""
+        with self._lock:
+            post_ids = self._post_ids_for(tag, since, until, days)
+            owners = np.frombuffer(self._post_influencer, dtype=np.uint32)[post_ids]
+            counts = np.bincount(owners, minlength=0)
+            found = np.flatnonzero(counts)
+            order = found[np.argsort(-counts[found], kind="stable")]
+            return [(self.influencers[i], int(counts[i])) for i in order]
+
+    def cooccurring(self, tag: str, k: int = 10, since=None, until=None, days=None) -> List[Tuple[str, int]]:
+        """The k hashtags most often used on the same posts as `tag`, with post counts"""
+        with self._lock:
+            post_ids = self._post_ids_for(tag, since, until, days)
+            if len(post_ids) == 0:
+                return []
+            offsets = np.frombuffer(self._tag_offsets, dtype=np.uint64).astype(np.int64)
+            starts = offsets[post_ids]
+            lengths = offsets[post_ids + 1] - starts
+            # Gather every hashtag of every matching post in one vectorized pass
+            total = int(lengths.sum())
+            gather = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths) + np.arange(total)
+            counts = np.bincount(np.frombuffer(self._tags, dtype=np.uint32)[gather], minlength=len(self.hashtags))
+            counts[self._hashtag_ids[normalize_hashtag(tag)]] = 0
+
+            k = min(k, int(np.count_nonzero(counts)))
+            if k == 0:
+                return []
+            top = np.argpartition(-counts, k - 1)[:k]
+            top = top[np.argsort(-counts[top], kind="stable")]
+            return [(self.hashtags[i], int(counts[i])) for i in top]
+
+    def top_hashtags(self, k: int = 10) -> List[Tuple[str, int]]:
+        """The k hashtags on the most live posts"""
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            offsets = np.frombuffer(self._tag_offsets, dtype=np.uint64).astype(np.int64)
+            per_tag = np.repeat(alive, np.diff(offsets))
+            counts = np.bincount(np.frombuffer(self._tags, dtype=np.uint32)[per_tag], minlength=len(self.hashtags))
+            k = min(k, int(np.count_nonzero(counts)))
+            if k == 0:
+                return []
+            top = np.argpartition(-counts, k - 1)[:k]
+            top = top[np.argsort(-counts[top], kind="stable")]
+            return [(self.hashtags[i], int(counts[i])) for i in top]
+
+    # Persistence
+
+    def save(self):
+        """Write a full snapshot of the index and clear the journal"""
+        if not self.state_file:
+            return False
+
+        with self._lock:
+            postings = b"".join(self._postings)
+            posting_offsets = np.cumsum([0] + [len(p) for p in self._postings], dtype=np.int64)
+            meta = {
+                "influencers": self.influencers,
+                "hashtags": self.hashtags,
+                "post_keys": self._post_keys
+            }
+            buffer = io.BytesIO()
+            np.savez_compressed(
+                buffer,
+                meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+                post_influencer=np.frombuffer(self._post_influencer, dtype=np.uint32),
+                post_date=np.frombuffer(self._post_date, dtype=np.int32),
+                alive=np.frombuffer(self._alive, dtype=np.uint8),
+                tag_offsets=np.frombuffer(self._tag_offsets, dtype=np.uint64),
+                tags=np.frombuffer(self._tags, dtype=np.uint32),
+                postings=np.frombuffer(postings, dtype=np.uint8),
+                posting_offsets=posting_offsets,
+                last_post=np.array(self._last_post, dtype=np.int64)
+            )
+            os.makedirs(os.path.dirname(os.path.abspath(self.state_file)), exist_ok=True)
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_file, self.state_file)
+
+            if os.path.exists(self._journal_file):
+                os.remove(self._journal_file)
+        return True
+
+    def load(self):
+        """Restore the snapshot, then replay any journaled changes on top"""
+        self._replaying = True
+        try:
+            if os.path.exists(self.state_file):
+                with np.load(self.state_file) as state:
+                    meta = json.loads(state["meta"].tobytes().decode("utf-8"))
+                    self.influencers = meta["influencers"]
+                    self._influencer_ids = {name: i for i, name in enumerate(self.influencers)}
+                    self.hashtags = meta["hashtags"]
+                    self._hashtag_ids = {tag: i for i, tag in enumerate(self.hashtags)}
+                    self._post_keys = meta["post_keys"]
+                    # A re-indexed post shares its key with the superseded one; the newest id wins
+                    self._post_ids = {key: i for i, key in enumerate(self._post_keys)}
+                    self._post_influencer = array('I', state["post_influencer"].tobytes())
+                    self._post_date = array('i', state["post_date"].tobytes())
+                    self._alive = bytearray(state["alive"].tobytes())
+                    self._tag_offsets = array('Q', state["tag_offsets"].tobytes())
+                    self._tags = array('I', state["tags"].tobytes())
+                    postings = state["postings"].tobytes()
+                    offsets = state["posting_offsets"].tolist()
+                    self._postings = [bytearray(postings[a:b]) for a, b in zip(offsets, offsets[1:])]
+                    self._last_post = state["last_post"].tolist()
+
+            if os.path.exists(self._journal_file):
+                with open(self._journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            if entry["op"] == "add_profile":
+                                self.add_profile(entry["record"])
+                            elif entry["op"] == "remove_influencer":
+                                self.remove_influencer(entry["record"])
+        finally:
+            self._replaying = False
+
+def build_from_profiles(data_dir: str, index: HashtagIndex, usernames=None) -> int:
+    """Index every {username}_profile.json in data_dir (or just `usernames`); returns posts indexed"""
+    suffix = "_profile.json"
+    if usernames is None:
+        usernames = sorted(f[:-len(suffix)] for f in os.listdir(data_dir) if f.endswith(suffix))
+    indexed = 0
+    for username in usernames:
+        profile_file = os.path.join(data_dir, f"{username}{suffix}")
+        if not os.path.exists(profile_file):
+            print(f"No data found for {username}. Please scrape the data first.")
+            continue
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            indexed += index.add_profile(json.load(f))
+    return indexed
+
+# Example usage
+if __name__ == "__main__":
+    from config import DATA_DIR
+
+    index = HashtagIndex(os.path.join(DATA_DIR, "hashtags", "index.npz"))
+    print(f"Indexed {build_from_profiles(DATA_DIR, index)} new or changed posts")
+    index.save()
+
+    tag = input("Hashtag to look up: ")
+    print("\nInfluencers (last 30 days):")
+    for username, count in index.influencers_using(tag, days=30):
+        print(f"@{username}: {count} posts")
+    print("\nOften used with:")
+    for other, count in index.cooccurring(tag):
+        print(f"#{other}: {count}")
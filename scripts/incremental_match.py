@@ -0,0 +1,257 @@
+"""
+Incremental Brand-Influencer Matching
+
+Keeps the current match set and pricing between runs and recomputes only the
+brand-influencer pairs touched by an add, update or remove.
+"""
+import os
+import json
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Set
+from .sponsor_match import Brand, Influencer, is_match
+from .pricing_calculator import calculate_pricing
+
+@dataclass(frozen=True, slots=True)
+class MatchEvent:
+    """A change to the match set, delivered to subscribers such as outreach"""
+    kind: str  # "added", "removed" or "repriced"
+    brand: str
+    influencer: str
+    pricing: Optional[Dict[str, float]] = None
+
+class IncrementalMatcher:
+    """
+    Stateful matcher holding brands, influencers and their priced matches.
+    Influencers are indexed by audience location, which every match must
+    share, so adding a brand only scans influencers in its location.
+    Each change is appended to a journal next to the state file; `save`
+    writes a full snapshot and truncates the journal.
+    """
+    def __init__(self, state_file: Optional[str] = None):
+        self.state_file = state_file
+        self.brands: Dict[str, Brand] = {}
+        self.influencers: Dict[str, Influencer] = {}
+        self.matches: Dict[str, Dict[str, Dict[str, float]]] = {}  # brand -> influencer -> pricing
+        self._by_location: Dict[Optional[str], Set[str]] = {}
+        self._matched_brands: Dict[str, Set[str]] = {}  # influencer -> brands
+        self._subscribers: List[Callable[[MatchEvent], None]] = []
+        self._replaying = False
+
+        if state_file and (os.path.exists(state_file) or os.path.exists(self._journal_file)):
+            self.load()
+
+    @property
+    def _journal_file(self) -> str:
+        return self.state_file + ".journal"
+
+    def subscribe(self, callback: Callable[[MatchEvent], None]):
+        """Register a callback invoked with every MatchEvent"""
+        self._subscribers.append(callback)
+
+    def _emit(self, event: MatchEvent):
+        if self._replaying:
+            return
+        for callback in self._subscribers:
+            callback(event)
+
+    def _journal(self, op: str, record):
+        if not self.state_file or self._replaying:
+            return
+        entry = {"op": op, "record": record if isinstance(record, str) else asdict(record)}
+        with open(self._journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _set_pair(self, brand: Brand, influencer: Influencer):
+        pricing = calculate_pricing(brand, influencer)
+        brand_matches = self.matches.setdefault(brand.name, {})
+        previous = brand_matches.get(influencer.name)
+        brand_matches[influencer.name] = pricing
+        self._matched_brands.setdefault(influencer.name, set()).add(brand.name)
+
+        if previous is None:
+            self._emit(MatchEvent("added", brand.name, influencer.name, pricing))
+        elif previous != pricing:
+            self._emit(MatchEvent("repriced", brand.name, influencer.name, pricing))
+
+    def _drop_pair(self, brand_name: str, influencer_name: str):
+        if self.matches.get(brand_name, {}).pop(influencer_name, None) is None:
+            return
+        self._matched_brands.get(influencer_name, set()).discard(brand_name)
+        self._emit(MatchEvent("removed", brand_name, influencer_name))
+
+    # Influencers
+
+    def add_influencer(self, influencer: Influencer):
+        """Add an influencer and match it against every brand"""
+        if influencer.name in self.influencers:
+            return self.update_influencer(influencer)
+
+        self._journal("add_influencer", influencer)
+        self.influencers[influencer.name] = influencer
+        location = influencer.audience_stats.get('location')
+        self._by_location.setdefault(location, set()).add(influencer.name)
+
+        for brand in self.brands.values():
+            if is_match(brand, influencer):
+                self._set_pair(brand, influencer)
+
+    def update_influencer(self, influencer: Influencer):
+        """Replace an influencer and re-evaluate only its pairs"""
+        previous = self.influencers.get(influencer.name)
+        if previous is None:
+            return self.add_influencer(influencer)
+        if previous == influencer:
+            return
+
+        self._journal("update_influencer", influencer)
+        old_location = previous.audience_stats.get('location')
+        new_location = influencer.audience_stats.get('location')
+        if old_location != new_location:
+            self._by_location[old_location].discard(influencer.name)
+            self._by_location.setdefault(new_location, set()).add(influencer.name)
+        self.influencers[influencer.name] = influencer
+
+        for brand in self.brands.values():
+            if is_match(brand, influencer):
+                self._set_pair(brand, influencer)
+            else:
+                self._drop_pair(brand.name, influencer.name)
+
+    def remove_influencer(self, name: str):
+        """Remove an influencer and all of its matches"""
+        influencer = self.influencers.pop(name, None)
+        if influencer is None:
+            return
+
+        self._journal("remove_influencer", name)
+        self._by_location[influencer.audience_stats.get('location')].discard(name)
+        for brand_name in list(self._matched_brands.pop(name, set())):
+            if self.matches.get(brand_name, {}).pop(name, None) is not None:
+                self._emit(MatchEvent("removed", brand_name, name))
+
+    # Brands
+
+    def _candidates(self, brand: Brand):
+        location = brand.target_audience.get('location')
+        for name in self._by_location.get(location, ()):
+            yield self.influencers[name]
+
+    def add_brand(self, brand: Brand):
+        """Add a brand and match it against influencers in its location"""
+        if brand.name in self.brands:
+            return self.update_brand(brand)
+
+        self._journal("add_brand", brand)
+        self.brands[brand.name] = brand
+        self.matches[brand.name] = {}
+        for influencer in self._candidates(brand):
+            if is_match(brand, influencer):
+                self._set_pair(brand, influencer)
+
+    def update_brand(self, brand: Brand):
+        """Replace a brand and re-evaluate only its pairs"""
+        previous = self.brands.get(brand.name)
+        if previous is None:
+            return self.add_brand(brand)
+        if previous == brand:
+            return
+
+        self._journal("update_brand", brand)
+        self.brands[brand.name] = brand
+        matched = set()
+        for influencer in self._candidates(brand):
+            if is_match(brand, influencer):
+                self._set_pair(brand, influencer)
+                matched.add(influencer.name)
+        for influencer_name in list(self.matches.get(brand.name, {})):
+            if influencer_name not in matched:
+                self._drop_pair(brand.name, influencer_name)
+
+    def remove_brand(self, name: str):
+        """Remove a brand and all of its matches"""
+        if self.brands.pop(name, None) is None:
+            return
+
+        self._journal("remove_brand", name)
+        for influencer_name in self.matches.pop(name, {}):
+            self._matched_brands.get(influencer_name, set()).discard(name)
+            self._emit(MatchEvent("removed", name, influencer_name))
+
+    def matches_for_influencer(self, name: str) -> Dict[str, Dict[str, float]]:
+        """Brands currently matched to an influencer, with pricing"""
+        return {
+            brand_name: self.matches[brand_name][name]
+            for brand_name in self._matched_brands.get(name, ())
+            if name in self.matches.get(brand_name, {})
+        }
+
+    # Persistence
+
+    def save(self):
+        """Write a full snapshot of the state and clear the journal"""
+        if not self.state_file:
+            return False
+
+        state = {
+            "brands": [asdict(brand) for brand in self.brands.values()],
+            "influencers": [asdict(influencer) for influencer in self.influencers.values()],
+            "matches": self.matches
+        }
+        tmp_file = self.state_file + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_file, self.state_file)
+
+        if os.path.exists(self._journal_file):
+            os.remove(self._journal_file)
+        return True
+
+    def load(self):
+        """Restore the snapshot, then replay any journaled changes on top"""
+        self._replaying = True
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+
+                for record in state["brands"]:
+                    self.brands[record["name"]] = Brand(**record)
+                for record in state["influencers"]:
+                    influencer = Influencer(**record)
+                    self.influencers[influencer.name] = influencer
+                    location = influencer.audience_stats.get('location')
+                    self._by_location.setdefault(location, set()).add(influencer.name)
+                self.matches = state["matches"]
+                for brand_name, brand_matches in self.matches.items():
+                    for influencer_name in brand_matches:
+                        self._matched_brands.setdefault(influencer_name, set()).add(brand_name)
+
+            if os.path.exists(self._journal_file):
+                with open(self._journal_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            self._replay(json.loads(line))
+        finally:
+            self._replaying = False
+
+    def _replay(self, entry):
+        op, record = entry["op"], entry["record"]
+        if op.endswith("_brand") and not op.startswith("remove"):
+            record = Brand(**record)
+        elif op.endswith("_influencer") and not op.startswith("remove"):
+            record = Influencer(**record)
+        getattr(self, op)(record)
+
+# Example usage
+if __name__ == "__main__":
+    from config import DATA_DIR
+
+    if not os.path.exists(DATA_DIR):
+        os.makedirs(DATA_DIR)
+
+    matcher = IncrementalMatcher(os.path.join(DATA_DIR, "match_state.json"))
+    matcher.subscribe(lambda event: print(f"{event.kind}: {event.brand} <-> {event.influencer}"))
+
+    matcher.add_brand(Brand("UrbanVogue", "Fashion", {"age": "18-25", "location": "IN"}, 1500, 20))
+    matcher.add_influencer(Influencer("style_diaries", "Fashion", {"age": "18-25", "location": "IN"}, 25000, 3.2))
+    matcher.save()
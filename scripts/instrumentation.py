@@ -0,0 +1,203 @@
+"""
+Lightweight Instrumentation for the Influencer-Brand Matching System
+
+Timing spans, counters and value observations that cost a single global
+check when disabled. Enable with BRANDEX_METRICS=1 or enable(), then export
+a JSON run summary and a Prometheus text file.
+
+Per-stage profiling: set BRANDEX_PROFILE to a comma-separated list of span
+names (or "all") to wrap those spans in cProfile, and BRANDEX_PYSPY likewise
+to attach py-spy while they run. Output goes to BRANDEX_PROFILE_DIR.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager, nullcontext
+
+_enabled = os.getenv("BRANDEX_METRICS", "") not in ("", "0", "false")
+_lock = threading.Lock()
+_counters = {}
+_summaries = {}  # name -> [count, sum, min, max]
+_NULL_SPAN = nullcontext()
+
+def _names(env_var):
+    return {name.strip() for name in os.getenv(env_var, "").split(",") if name.strip()}
+
+_profile_spans = _names("BRANDEX_PROFILE")
+_pyspy_spans = _names("BRANDEX_PYSPY")
+PROFILE_DIR = os.getenv("BRANDEX_PROFILE_DIR", "profiles")
+
+def enable(flag=True):
+    """Turn metric collection on or off for this process"""
+    global _enabled
+    _enabled = flag
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Clear all collected metrics"""
+    with _lock:
+        _counters.clear()
+        _summaries.clear()
+
+def count(name, value=1):
+    """Add value to the counter `name`"""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def observe(name, value):
+    """Record one observation (e.g. a batch size or duration) of `name`"""
+    if not _enabled:
+        return
+    with _lock:
+        summary = _summaries.get(name)
+        if summary is None:
+            _summaries[name] = [1, value, value, value]
+        else:
+            summary[0] += 1
+            summary[1] += value
+            if value < summary[2]:
+                summary[2] = value
+            if value > summary[3]:
+                summary[3] = value
+
+@contextmanager
+def _timed_span(name):
+    profiler = _start_profiler(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name + ".seconds", time.perf_counter() - start)
+        if profiler:
+            profiler()
+
+def span(name):
+    """Context manager timing the enclosed block under `name`"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _timed_span(name)
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorator(fn):
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _timed_span(name):
+                return fn(*args, **kwargs)
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+    return decorator
+
+def _start_profiler(name):
+    """Start cProfile and/or py-spy for this span if requested; returns a stop callback"""
+    use_cprofile = name in _profile_spans or "all" in _profile_spans
+    use_pyspy = name in _pyspy_spans or "all" in _pyspy_spans
+    if not (use_cprofile or use_pyspy):
+        return None
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = f"{name}.{os.getpid()}.{time.time_ns()}"
+    stops = []
+
+    if use_cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def stop_cprofile():
+            profiler.disable()
+            profiler.dump_stats(os.path.join(PROFILE_DIR, stamp + ".prof"))
+        stops.append(stop_cprofile)
+
+    if use_pyspy:
+        import shutil
+        import subprocess
+        if shutil.which("py-spy"):
+            process = subprocess.Popen(
+                ["py-spy", "record", "--pid", str(os.getpid()), "--output",
+                 os.path.join(PROFILE_DIR, stamp + ".svg")],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+
+            def stop_pyspy():
+                # py-spy writes its flame graph when interrupted
+                import signal
+                process.send_signal(signal.SIGINT)
+                process.wait(timeout=30)
+            stops.append(stop_pyspy)
+
+    def stop():
+        for fn in stops:
+            fn()
+    return stop
+
+def snapshot():
+    """Copy of the current metrics as a JSON-serializable dict"""
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "summaries": {
+                name: {"count": s[0], "sum": s[1], "min": s[2], "max": s[3]}
+                for name, s in _summaries.items()
+            }
+        }
+
+def merge(other):
+    """Fold a snapshot from another process (e.g. a pool worker) into this one"""
+    if not _enabled or not other:
+        return
+    with _lock:
+        for name, value in other.get("counters", {}).items():
+            _counters[name] = _counters.get(name, 0) + value
+        for name, s in other.get("summaries", {}).items():
+            summary = _summaries.get(name)
+            if summary is None:
+                _summaries[name] = [s["count"], s["sum"], s["min"], s["max"]]
+            else:
+                summary[0] += s["count"]
+                summary[1] += s["sum"]
+                summary[2] = min(summary[2], s["min"])
+                summary[3] = max(summary[3], s["max"])
+
+def export_json(path, extra=None):
+    """Write the run summary as JSON"""
+    data = snapshot()
+    for summary in data["summaries"].values():
+        summary["mean"] = summary["sum"] / summary["count"] if summary["count"] else 0.0
+    if extra:
+        data.update(extra)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+    return path
+
+def _prometheus_name(name):
+    return "brandex_" + "".join(c if c.isalnum() else "_" for c in name)
+
+def export_prometheus(path):
+    """Write metrics in the Prometheus text exposition format"""
+    data = snapshot()
+    lines = []
+    for name, value in sorted(data["counters"].items()):
+        metric = _prometheus_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, s in sorted(data["summaries"].items()):
+        metric = _prometheus_name(name)
+        lines.append(f"# TYPE {metric} summary")
+        lines.append(f"{metric}_count {s['count']}")
+        lines.append(f"{metric}_sum {s['sum']}")
+        lines.append(f"# TYPE {metric}_max gauge")
+        lines.append(f"{metric}_max {s['max']}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+    return path
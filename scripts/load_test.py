@@ -0,0 +1,78 @@
+"""
+Load Test for the HTTP API
+
+Fires concurrent GET requests at an endpoint of scripts.api_server and reports
+latency percentiles. With --conditional each client replays the ETag it was
+given, the way a browser revalidates.
+
+Usage:
+    python -m scripts.load_test http://127.0.0.1:5000/api/influencer/<username>/profile
+"""
+import time
+import argparse
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+def _client(url, n_requests, conditional):
+    latencies = []
+    statuses = {}
+    etag = None
+    for _ in range(n_requests):
+        req = urllib.request.Request(url)
+        if conditional and etag:
+            req.add_header("If-None-Match", etag)
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req) as response:
+                response.read()
+                status = response.status
+                etag = response.headers.get("ETag", etag)
+        except urllib.error.HTTPError as e:
+            status = e.code
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+    return latencies, statuses
+
+def run_load_test(url, n_requests=2000, concurrency=8, conditional=False):
+    """
+    Run the load test and return a summary dict with request count,
+    throughput and p50/p90/p99/max latency in milliseconds
+    """
+    per_client = max(1, n_requests // concurrency)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda _: _client(url, per_client, conditional), range(concurrency)
+        ))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([np.asarray(latency) for latency, _ in results])
+    statuses = {}
+    for _, client_statuses in results:
+        for status, count in client_statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+
+    return {
+        "requests": int(len(latencies)),
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p90_ms": round(float(np.percentile(latencies, 90)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "max_ms": round(float(latencies.max()), 2)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test an API endpoint")
+    parser.add_argument("url")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--conditional", action="store_true", help="send If-None-Match with the last ETag")
+    args = parser.parse_args()
+
+    summary = run_load_test(args.url, args.requests, args.concurrency, args.conditional)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
@@ -0,0 +1,364 @@
+"""
+Lookalike Influencer Search
+
+Embeds each post caption once, pools the post vectors into one vector per
+influencer and keeps them in a persisted FAISS index, so "more creators
+like @x" is a single nearest-neighbour query. Vectors are L2-normalized and
+compared by inner product (cosine similarity).
+
+Index types:
+- "flat": exact search, 4 bytes per dimension per influencer; fine up to
+  tens of thousands of influencers
+- "ivfflat": inverted lists over the same full vectors; searches only
+  nprobe cells, so queries stay in the low milliseconds at hundreds of
+  thousands of influencers
+- "ivfpq": inverted lists with product quantization, m bytes per
+  influencer, for memory-constrained hosts
+The IVF types need a training sample: until train() is given one, or
+enough influencers have been added to train on (~39 per IVF cell and per
+PQ codebook entry), vectors are kept in a flat index and moved
+into the IVF index once it is trained. An index that grows to
+RETRAIN_GROWTH times its training set is retrained on everything it holds.
+"""
+import os
+import json
+import numpy as np
+import faiss
+from scripts import instrumentation as metrics
+from scripts.model_server import MODELS, RemoteModel, load_pipeline
+from scripts.text_preprocessing import BatchedTextModel
+
+# faiss warns below this many training points per centroid
+POINTS_PER_CENTROID = 39
+# Retrain an IVF index once it holds this many times the vectors it was trained on
+RETRAIN_GROWTH = 4
+
+class CaptionEmbedder:
+    """
+    Encodes captions into normalized float32 vectors by mean-pooling the
+    token vectors of a feature-extraction pipeline, truncated to max_length
+    tokens.
+
+    Batched pipelines return padded token vectors, so each caption is
+    pooled over its own tokens only (counted with the model's tokenizer)
+    and its vector doesn't depend on which batch it ran in. Without a
+    tokenizer, captions are sent one at a time, unpadded.
+    """
+    def __init__(self, model=None, batch_size=32, max_length=128, tokenizer=None):
+        model = model or load_pipeline("embedding")
+        self.max_length = max_length
+        self.tokenizer = tokenizer or getattr(model, "tokenizer", None)
+        if self.tokenizer is None and isinstance(model, RemoteModel):
+            # Only the tokenizer is loaded locally; the weights stay on the server
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(MODELS["embedding"][1])
+        self.model = BatchedTextModel(
+            model,
+            batch_size=batch_size,
+            max_length=max_length,
+            call=self._pool,
+            name="embedding"
+        )
+
+    def _pool(self, model, batch):
+        tokenize_kwargs = {"truncation": True, "max_length": self.max_length}
+        if self.tokenizer is None:
+            results = [model(text, tokenize_kwargs=tokenize_kwargs) for text in batch]
+            lengths = [None] * len(batch)
+        else:
+            results = model(batch, batch_size=len(batch), tokenize_kwargs=tokenize_kwargs)
+            lengths = [len(ids) for ids in self.tokenizer(batch, **tokenize_kwargs)["input_ids"]]
+        vectors = []
+        for tokens, length in zip(results, lengths):
+            tokens = np.asarray(tokens, dtype=np.float32).reshape(-1, np.shape(tokens)[-1])
+            # Padding sits after the tokens
+            vectors.append(tokens[:length].mean(axis=0))
+        return vectors
+
+    def __call__(self, captions):
+        if not captions:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize(np.stack(self.model(captions)))
+
+def normalize(vectors):
+    """L2-normalize rows, leaving all-zero rows as they are"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def embed_profile(profile_data, embedder, cache_dir):
+    """
+    Pooled caption vector for one scraped profile, or None if it has no
+    captions. Post vectors are cached in cache_dir/{username}.npz, so only
+    posts not seen before are encoded.
+    """
+    posts = [post for post in profile_data.get("posts", []) if post.get("caption")]
+    if not posts:
+        return None
+
+    cache_file = os.path.join(cache_dir, f"{profile_data['username']}.npz")
+    cached = {}
+    if os.path.exists(cache_file):
+        with np.load(cache_file) as f:
+            cached = dict(zip(f["post_ids"].tolist(), f["vectors"]))
+
+    new_posts = [post for post in posts if post.get("post_id") not in cached]
+    metrics.count("lookalike.posts_cached", len(posts) - len(new_posts))
+    metrics.count("lookalike.posts_embedded", len(new_posts))
+    if new_posts:
+        for post, vector in zip(new_posts, embedder([post["caption"] for post in new_posts])):
+            cached[post.get("post_id")] = vector
+        os.makedirs(cache_dir, exist_ok=True)
+        post_ids = [post.get("post_id") for post in posts]
+        np.savez(cache_file, post_ids=np.array(post_ids), vectors=np.stack([cached[i] for i in post_ids]))
+
+    vectors = np.stack([cached[post.get("post_id")] for post in posts])
+    return normalize(vectors.mean(axis=0, keepdims=True))[0]
+
+class LookalikeIndex:
+    """
+    FAISS index of pooled influencer vectors keyed by username.
+
+    Args:
+        dim: vector dimension
+        index_type: "flat" (exact), "ivfflat" or "ivfpq" (approximate)
+        nlist: IVF cells; the training sample should hold ~40x this many vectors
+        m: PQ sub-quantizers (must divide dim); bytes per vector with nbits=8
+        nbits: bits per sub-quantizer code
+        nprobe: IVF cells searched per query (recall vs latency)
+
+    An IVF index starts out flat and is trained on everything added so far
+    once it holds training_size() vectors (or when train() is called), and
+    retrained as it outgrows its training set.
+    """
+    def __init__(self, dim, index_type="flat", nlist=1024, m=48, nbits=8, nprobe=16):
+        if index_type not in ("flat", "ivfflat", "ivfpq"):
+            raise ValueError(f"Unknown index type: {index_type}")
+        self.dim = dim
+        self.index_type = index_type
+        self.options = {"nlist": nlist, "m": m, "nbits": nbits, "nprobe": nprobe, "trained_on": 0}
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        self.ids = {}       # username -> id
+        self.names = {}     # id -> username
+        self._next_id = 0
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def __contains__(self, username):
+        return username in self.ids
+
+    @property
+    def is_trained(self):
+        """False while an IVF index is still held in its flat stand-in"""
+        return self.index_type == "flat" or not isinstance(self.index, faiss.IndexIDMap2)
+
+    def _codebook_size(self):
+        return 2 ** self.options["nbits"] if self.index_type == "ivfpq" else 0
+
+    def training_size(self):
+        """Vectors added before an IVF index trains itself"""
+        return POINTS_PER_CENTROID * max(self.options["nlist"], self._codebook_size())
+
+    def _ivf_index(self):
+        nlist, m, nbits = self.options["nlist"], self.options["m"], self.options["nbits"]
+        quantizer = faiss.IndexFlatIP(self.dim)
+        if self.index_type == "ivfflat":
+            index = faiss.IndexIVFFlat(quantizer, self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFPQ(quantizer, self.dim, nlist, m, nbits, faiss.METRIC_INNER_PRODUCT)
+        # Lets ids be looked up (reconstruct) and replaced (remove_ids)
+        index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        index.nprobe = self.options["nprobe"]
+        return index
+
+    def _stored(self):
+        ids = np.array(sorted(self.names), dtype=np.int64)
+        if not len(ids):
+            return ids, np.zeros((0, self.dim), dtype=np.float32)
+        return ids, np.stack([self.index.reconstruct(int(i)) for i in ids])
+
+    def train(self, vectors=None):
+        """
+        Fit (or refit) the IVF cells and PQ codebooks on `vectors` (default:
+        everything indexed so far) and move the indexed vectors into the new
+        IVF index. No-op for flat indexes. On a trained ivfpq index the
+        indexed vectors are the approximate stored ones.
+        """
+        if self.index_type == "flat":
+            return
+        ids, stored = self._stored()
+        vectors = stored if vectors is None else normalize(vectors)
+        minimum = max(self.options["nlist"], self._codebook_size())
+        if len(vectors) < minimum:
+            raise ValueError(f"Training this {self.index_type} index needs at least {minimum} vectors "
+                             f"(nlist and 2**nbits), got {len(vectors)}; use a flat index or smaller nlist/nbits")
+        index = self._ivf_index()
+        with metrics.span("lookalike.train"):
+            index.train(vectors)
+        if len(ids):
+            index.add_with_ids(stored, ids)
+        self.index = index
+        self.options["trained_on"] = len(vectors)
+        metrics.count("lookalike.trained")
+
+    def add(self, usernames, vectors):
+        """Add or replace the vectors of the given influencers"""
+        vectors = normalize(np.atleast_2d(vectors))
+        if len(usernames) != len(vectors):
+            raise ValueError("usernames and vectors must have the same length")
+
+        replaced = np.array([self.ids[u] for u in usernames if u in self.ids], dtype=np.int64)
+        if len(replaced):
+            self.index.remove_ids(replaced)
+        ids = []
+        for username in usernames:
+            if username not in self.ids:
+                self.ids[username] = self._next_id
+                self.names[self._next_id] = username
+                self._next_id += 1
+            ids.append(self.ids[username])
+        with metrics.span("lookalike.add"):
+            self.index.add_with_ids(vectors, np.array(ids, dtype=np.int64))
+        metrics.count("lookalike.added", len(ids))
+        if not self.is_trained:
+            if len(self) >= self.training_size():
+                # Enough vectors to fit the IVF cells and codebooks on
+                self.train()
+        elif self.index_type != "flat" and len(self) > RETRAIN_GROWTH * self.options["trained_on"]:
+            # Cells fitted on a much smaller roster no longer split it evenly
+            self.train()
+
+    def remove(self, usernames):
+        ids = np.array([self.ids.pop(u) for u in usernames if u in self.ids], dtype=np.int64)
+        for i in ids.tolist():
+            del self.names[i]
+        if len(ids):
+            self.index.remove_ids(ids)
+
+    def vector(self, username):
+        """Stored (for ivfpq, approximate) vector of an indexed influencer"""
+        return self.index.reconstruct(self.ids[username])
+
+    def search(self, vectors, k=10, exclude=()):
+        """
+        Top-k influencers for each query vector.
+        Returns one [(username, similarity)] list per query
+        """
+        vectors = normalize(np.atleast_2d(vectors))
+        exclude = set(exclude)
+        k_search = min(k + len(exclude), len(self))
+        if k_search == 0:
+            return [[] for _ in vectors]
+        with metrics.span("lookalike.search"):
+            scores, ids = self.index.search(vectors, k_search)
+        metrics.count("lookalike.queries", len(vectors))
+        results = []
+        for row_scores, row_ids in zip(scores, ids):
+            row = [(self.names[i], float(s)) for s, i in zip(row_scores, row_ids)
+                   if i != -1 and self.names[i] not in exclude]
+            results.append(row[:k])
+        return results
+
+    def lookalikes(self, username, k=10):
+        """Influencers most similar to an indexed one, excluding itself"""
+        return self.search(self.vector(username), k, exclude=(username,))[0]
+
+    def save(self, path):
+        """Write the index to `path` and its username mapping to `path`.json"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        faiss.write_index(self.index, path + ".tmp")
+        with open(path + ".json.tmp", 'w', encoding='utf-8') as f:
+            json.dump({
+                "dim": self.dim,
+                "index_type": self.index_type,
+                "options": self.options,
+                "next_id": self._next_id,
+                "ids": self.ids
+            }, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        os.replace(path + ".json.tmp", path + ".json")
+
+    @classmethod
+    def load(cls, path, nprobe=None):
+        with open(path + ".json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        lookalike = cls.__new__(cls)
+        lookalike.dim = meta["dim"]
+        lookalike.index_type = meta["index_type"]
+        lookalike.options = meta.get("options", {})
+        lookalike.index = faiss.read_index(path)
+        if nprobe:
+            lookalike.options["nprobe"] = nprobe
+        if lookalike.is_trained and lookalike.index_type != "flat":
+            index = lookalike.index
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            # Indexes saved without options: read them off the index
+            lookalike.options.setdefault("nlist", index.nlist)
+            if lookalike.index_type == "ivfpq":
+                pq = faiss.downcast_index(index).pq
+                lookalike.options.setdefault("m", pq.M)
+                lookalike.options.setdefault("nbits", pq.nbits)
+            lookalike.options.setdefault("trained_on", index.ntotal)
+            index.nprobe = lookalike.options.setdefault("nprobe", index.nprobe)
+        lookalike.ids = meta["ids"]
+        lookalike.names = {i: name for name, i in lookalike.ids.items()}
+        lookalike._next_id = meta["next_id"]
+        return lookalike
+
+def build_index(data_dir, usernames, index_path, embedder=None, index_type="flat", **index_options):
+    """
+    Embed the given scraped profiles and add them to the index at
+    index_path, creating it if needed. Returns the index and the usernames
+    that were (re)indexed.
+    """
+    embedder = embedder or CaptionEmbedder()
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(index_path)), "embeddings")
+
+    names, vectors = [], []
+    for username in usernames:
+        profile_file = os.path.join(data_dir, f"{username}_profile.json")
+        if not os.path.exists(profile_file):
+            print(f"No data found for {username}. Please scrape the data first.")
+            continue
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            profile_data = json.load(f)
+        with metrics.span("lookalike.embed_profile"):
+            vector = embed_profile(profile_data, embedder, cache_dir)
+        if vector is not None:
+            names.append(username)
+            vectors.append(vector)
+
+    if os.path.exists(index_path):
+        index = LookalikeIndex.load(index_path)
+    elif vectors:
+        index = LookalikeIndex(len(vectors[0]), index_type=index_type, **index_options)
+    else:
+        return None, []
+    if vectors:
+        index.add(names, np.stack(vectors))
+        index.save(index_path)
+    return index, names
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    n, dim = 200_000, 384
+    # Caption embeddings cluster by niche; isotropic noise would be a worst case for IVF
+    centers = rng.standard_normal((2000, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    usernames = [f"creator_{i}" for i in range(n)]
+
+    exact = None
+    for index_type in ("flat", "ivfflat", "ivfpq"):
+        index = LookalikeIndex(dim, index_type=index_type)
+        index.train(vectors[:50_000])
+        index.add(usernames, vectors)
+        start = time.perf_counter()
+        results = [index.search(vectors[i], k=10)[0] for i in range(100)]
+        elapsed = (time.perf_counter() - start) * 10
+        found = [{name for name, _ in row} for row in results]
+        exact = exact or found
+        recall = np.mean([len(a & b) / 10 for a, b in zip(found, exact)])
+        print(f"{index_type}: {elapsed:.2f} ms per query over {len(index)} influencers, recall@10 {recall:.2f}")
@@ -0,0 +1,283 @@
+"""
+Shared Local Model Server
+
+Holds one copy of each Hugging Face model in a single process and serves
+inference over a Unix socket, so any number of scraper and analyzer
+processes can share it instead of each loading gigabytes of weights.
+Requests from all clients for the same model are micro-batched: a batch is
+sent to the model once it holds max_batch texts or its oldest request has
+waited max_wait_ms.
+
+Start the server, then point clients at it with BRANDEX_MODEL_SERVER:
+    python -m scripts.model_server --socket /tmp/brandex-models.sock
+    BRANDEX_MODEL_SERVER=/tmp/brandex-models.sock python main.py analyze --workers 4
+
+Connections are authenticated with a shared key: BRANDEX_MODEL_SERVER_KEY
+if set, otherwise a random key the server writes to <socket>.key (mode
+0600), so only the user who started the server can send it requests.
+"""
+import os
+import time
+import queue
+import secrets
+import argparse
+import threading
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+from transformers import pipeline
+from scripts import instrumentation as metrics
+
+# Name -> (task, model) for every model the project uses
+MODELS = {
+    "sentiment": ("sentiment-analysis", "nlptown/bert-base-multilingual-uncased-sentiment"),
+    "category": ("zero-shot-classification", "facebook/bart-large-mnli"),
+    "category_small": ("zero-shot-classification", "typeform/distilbert-base-uncased-mnli"),
+    "language": ("text-classification", "papluca/xlm-roberta-base-language-detection"),
+    "embedding": ("feature-extraction", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+}
+
+SERVER_ENV = "BRANDEX_MODEL_SERVER"
+KEY_ENV = "BRANDEX_MODEL_SERVER_KEY"
+
+def server_authkey(address, create=False):
+    """
+    Shared key for the server at `address`: BRANDEX_MODEL_SERVER_KEY, else
+    the contents of <address>.key, which the server (create=True) writes
+    with a fresh random key, readable by its owner only
+    """
+    key = os.getenv(KEY_ENV)
+    if key:
+        return key.encode("utf-8")
+    key_file = f"{address}.key"
+    if create:
+        if os.path.exists(key_file):
+            os.remove(key_file)
+        key = secrets.token_hex(32).encode("ascii")
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+    try:
+        with open(key_file, "rb") as f:
+            return f.read().strip()
+    except OSError as e:
+        raise ConnectionError(f"No key for the model server at {address}: set {KEY_ENV} or make {key_file} readable ({e})") from e
+
+def load_pipeline(name):
+    """
+    The pipeline for model `name`: a client of the model server when
+    BRANDEX_MODEL_SERVER is set, otherwise a local copy
+    """
+    address = os.getenv(SERVER_ENV)
+    if address:
+        return RemoteModel(name, address)
+    task, model = MODELS[name]
+    return pipeline(task, model=model)
+
+class _Batcher:
+    """Collects requests for one model (and one set of call arguments) into micro-batches"""
+    def __init__(self, name, model, args, kwargs, max_batch, max_wait):
+        self.name = name
+        self.model = model
+        self.args = args
+        self.kwargs = kwargs
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True).start()
+
+    def submit(self, texts):
+        future = Future()
+        self.requests.put((texts, future, time.perf_counter()))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0][0])
+            deadline = batch[0][2] + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request[0])
+
+            texts = [text for request_texts, _, _ in batch for text in request_texts]
+            started = time.perf_counter()
+            try:
+                with metrics.span(f"server.{self.name}"):
+                    results = self.model(texts, *self.args, batch_size=self.max_batch, **self.kwargs)
+                if isinstance(results, dict):
+                    results = [results]
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            metrics.count(f"server.{self.name}.batches")
+            metrics.observe(f"server.{self.name}.batch_texts", len(texts))
+            metrics.observe(f"server.{self.name}.batch_requests", len(batch))
+            offset = 0
+            for request_texts, future, queued in batch:
+                metrics.observe(f"server.{self.name}.queue_seconds", started - queued)
+                future.set_result(results[offset:offset + len(request_texts)])
+                offset += len(request_texts)
+
+class ModelServer:
+    """
+    Serves the models in MODELS over a Unix socket.
+
+    Args:
+        address: Unix socket path
+        max_batch: texts per model call
+        max_wait_ms: longest a request waits for a batch to fill
+        preload: model names to load before accepting connections
+    """
+    def __init__(self, address, max_batch=32, max_wait_ms=10, preload=()):
+        self.address = address
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._models = {}
+        self._batchers = {}
+        self._lock = threading.Lock()
+        for name in preload:
+            self._model(name)
+
+    def _model(self, name):
+        with self._lock:
+            if name not in self._models:
+                if name not in MODELS:
+                    raise KeyError(f"Unknown model: {name}")
+                task, model = MODELS[name]
+                print(f"Loading {name} model ({model})...")
+                self._models[name] = pipeline(task, model=model)
+            return self._models[name]
+
+    def _batcher(self, name, args, kwargs):
+        # Requests can only share a model call if they pass the same arguments,
+        # e.g. the same zero-shot candidate labels
+        key = (name, repr(args), repr(sorted(kwargs.items())))
+        model = self._model(name)
+        with self._lock:
+            if key not in self._batchers:
+                self._batchers[key] = _Batcher(name, model, args, kwargs, self.max_batch, self.max_wait)
+            return self._batchers[key]
+
+    def _serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    request = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if request["op"] == "ping":
+                        reply = ("ok", sorted(self._models))
+                    elif request["op"] == "stats":
+                        reply = ("ok", metrics.snapshot())
+                    else:
+                        kwargs = dict(request.get("kwargs", {}))
+                        kwargs.pop("batch_size", None)
+                        batcher = self._batcher(request["model"], tuple(request.get("args", ())), kwargs)
+                        reply = ("ok", batcher.submit(request["texts"]).result())
+                except Exception as e:
+                    reply = ("error", f"{type(e).__name__}: {e}")
+                connection.send(reply)
+
+    def serve_forever(self):
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        authkey = server_authkey(self.address, create=True)
+        # Create the socket owner-only from the start rather than chmod-ing it after bind
+        umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, family="AF_UNIX", authkey=authkey)
+        finally:
+            os.umask(umask)
+        with listener:
+            print(f"Model server listening on {self.address}")
+            while True:
+                try:
+                    connection = listener.accept()
+                except AuthenticationError as e:
+                    print(f"Rejected model server client: {e}")
+                    continue
+                threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+class RemoteModel:
+    """
+    Client-side stand-in for a Hugging Face pipeline whose calls run on the
+    model server. Accepts the same inputs (a string or a list of strings,
+    plus extra arguments such as zero-shot candidate labels) and returns
+    the same shapes. Each thread gets its own connection.
+    """
+    def __init__(self, name, address):
+        if name not in MODELS:
+            raise KeyError(f"Unknown model: {name}")
+        self.name = name
+        self.task = MODELS[name][0]
+        self.address = address
+        self.authkey = server_authkey(address)
+        self._local = threading.local()
+        self._request({"op": "ping"})
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            try:
+                connection = self._local.connection = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            except AuthenticationError as e:
+                raise ConnectionError(f"Model server at {self.address} rejected the key: {e}") from e
+            except OSError as e:
+                raise ConnectionError(f"Model server not reachable at {self.address}: {e}") from e
+        return connection
+
+    def _request(self, request):
+        connection = self._connection()
+        try:
+            connection.send(request)
+            status, result = connection.recv()
+        except (EOFError, OSError) as e:
+            self._local.connection = None
+            raise ConnectionError(f"Lost connection to model server at {self.address}: {e}") from e
+        if status != "ok":
+            raise RuntimeError(result)
+        return result
+
+    def __call__(self, inputs, *args, **kwargs):
+        single = isinstance(inputs, str)
+        results = self._request({
+            "op": "infer",
+            "model": self.name,
+            "texts": [inputs] if single else list(inputs),
+            "args": args,
+            "kwargs": kwargs
+        })
+        if single:
+            # Classifiers return a one-item list for one input; zero-shot returns
+            # a dict and feature extraction the token vectors themselves
+            return results[:1] if self.task in ("sentiment-analysis", "text-classification") else results[0]
+        return results
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the project's models to local worker processes")
+    parser.add_argument("--socket", default="/tmp/brandex-models.sock", help="Unix socket path")
+    parser.add_argument("--models", default=",".join(MODELS), help="comma-separated models to preload")
+    parser.add_argument("--max-batch", type=int, default=32, help="texts per model call")
+    parser.add_argument("--max-wait-ms", type=float, default=10, help="longest a request waits for a batch to fill")
+    args = parser.parse_args()
+
+    metrics.enable()
+    preload = [name.strip() for name in args.models.split(",") if name.strip()]
+    server = ModelServer(args.socket, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, preload=preload)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Model server stopped")
@@ -0,0 +1,236 @@
+"""
+Streaming Pipeline for the Influencer-Brand Matching System
+
+Chains stages (scrape, language detection, inference, charts, report) with
+bounded queues so each item moves on as soon as its stage finishes, instead
+of every stage waiting for the whole batch. Each stage has its own worker
+count; a full downstream queue blocks the upstream workers (backpressure),
+which keeps memory flat when the scraper outpaces the models or vice versa.
+"""
+import time
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from scripts import instrumentation as metrics
+
+_DONE = object()
+
+def _call_with_metrics(fn, value):
+    """Run fn in a pool process and ship that process's metrics back with the result"""
+    result = fn(value)
+    snapshot = None
+    if metrics.is_enabled():
+        snapshot = metrics.snapshot()
+        metrics.reset()
+    return result, snapshot
+
+class Stage:
+    """
+    One pipeline step. fn(value) returns the value handed to the next stage;
+    a falsy return or an exception fails the item at this stage.
+
+    Args:
+        name: stage name used in stats and metrics
+        fn: the work function; must be picklable when processes=True
+        workers: concurrent workers for this stage
+        processes: run fn in a process pool of `workers` processes instead
+            of threads (for CPU-bound or non-thread-safe work)
+        initializer, initargs: per-process setup, or run once in-process
+            when processes=False
+        queue_size: capacity of this stage's input queue (default: the
+            pipeline's queue_size)
+    """
+    def __init__(self, name, fn, workers=1, processes=False, initializer=None, initargs=(), queue_size=None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.processes = processes
+        self.initializer = initializer
+        self.initargs = initargs
+        self.queue_size = queue_size
+
+class _StageStats:
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0      # seconds spent in fn, summed over workers
+        self.starved = 0.0   # seconds waiting for input
+        self.blocked = 0.0   # seconds waiting on a full downstream queue
+        self.max_depth = 0
+        self.first_start = None
+        self.last_end = None
+
+    def as_dict(self):
+        wall = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+        capacity = wall * self.workers
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "seconds": round(wall, 4),
+            "items_per_second": round(self.processed / wall, 4) if wall > 0 else 0.0,
+            "utilization": round(self.busy / capacity, 4) if capacity > 0 else 0.0,
+            "busy_seconds": round(self.busy, 4),
+            "starved_seconds": round(self.starved, 4),
+            "blocked_seconds": round(self.blocked, 4),
+            "max_queue_depth": self.max_depth
+        }
+
+class Pipeline:
+    """
+    Runs items through a list of Stages.
+
+    run() yields one (item, ok, seconds, extra) tuple per input item as soon
+    as it leaves the pipeline, where extra holds failed_stage and error
+    for failed items. stats() returns per-stage throughput, utilization,
+    starvation and backpressure once the run has finished.
+    """
+    def __init__(self, stages, queue_size=4):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = queue_size
+        self._stats = []
+
+    def stats(self):
+        return [s.as_dict() for s in self._stats]
+
+    def run(self, items):
+        stages = self.stages
+        queues = [queue.Queue(maxsize=stage.queue_size or self.queue_size) for stage in stages]
+        results = queue.Queue()
+        self._stats = [_StageStats(stage.name, stage.workers) for stage in stages]
+        executors = []
+        threads = []
+
+        for stage in stages:
+            if stage.processes:
+                executors.append(ProcessPoolExecutor(
+                    max_workers=stage.workers, initializer=stage.initializer, initargs=stage.initargs
+                ))
+            else:
+                if stage.initializer:
+                    stage.initializer(*stage.initargs)
+                executors.append(None)
+
+        def feed():
+            for item in items:
+                queues[0].put((item, item, time.perf_counter()))
+            for _ in range(stages[0].workers):
+                queues[0].put(_DONE)
+
+        remaining = [stage.workers for stage in stages]
+        remaining_lock = threading.Lock()
+
+        def work(index):
+            stage = stages[index]
+            stats = self._stats[index]
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(stages) else None
+            executor = executors[index]
+
+            while True:
+                depth = inbox.qsize()
+                t0 = time.perf_counter()
+                envelope = inbox.get()
+                t1 = time.perf_counter()
+                if envelope is _DONE:
+                    break
+                item, value, started = envelope
+
+                error = None
+                try:
+                    with metrics.span(f"pipeline.{stage.name}"):
+                        if executor:
+                            value, snapshot = executor.submit(_call_with_metrics, stage.fn, value).result()
+                            metrics.merge(snapshot)
+                        else:
+                            value = stage.fn(value)
+                except Exception as e:
+                    value, error = None, str(e)
+                t2 = time.perf_counter()
+
+                ok = bool(value)
+                with stats.lock:
+                    stats.starved += t1 - t0
+                    stats.busy += t2 - t1
+                    stats.max_depth = max(stats.max_depth, depth)
+                    if stats.first_start is None:
+                        stats.first_start = t1
+                    stats.last_end = t2
+                    if ok:
+                        stats.processed += 1
+                    else:
+                        stats.failed += 1
+                metrics.count(f"pipeline.{stage.name}.items")
+                metrics.observe(f"pipeline.{stage.name}.queue_depth", depth)
+
+                if not ok:
+                    metrics.count(f"pipeline.{stage.name}.failed")
+                    extra = {"failed_stage": stage.name}
+                    if error:
+                        extra["error"] = error
+                    results.put((item, False, time.perf_counter() - started, extra))
+                elif outbox is None:
+                    results.put((item, True, time.perf_counter() - started, {}))
+                else:
+                    outbox.put((item, value, started))
+                    blocked = time.perf_counter() - t2
+                    with stats.lock:
+                        stats.blocked += blocked
+                    metrics.observe(f"pipeline.{stage.name}.blocked_seconds", blocked)
+
+            # The last worker out tells the next stage's workers to stop
+            with remaining_lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last:
+                if outbox is None:
+                    results.put(_DONE)
+                else:
+                    for _ in range(stages[index + 1].workers):
+                        outbox.put(_DONE)
+
+        threads.append(threading.Thread(target=feed, name="pipeline-feed", daemon=True))
+        for index, stage in enumerate(stages):
+            for n in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=work, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True
+                ))
+        try:
+            for thread in threads:
+                thread.start()
+            while True:
+                result = results.get()
+                if result is _DONE:
+                    break
+                yield result
+            for thread in threads:
+                thread.join()
+        finally:
+            for executor in executors:
+                if executor:
+                    executor.shutdown(wait=True, cancel_futures=True)
+
+# Example usage
+if __name__ == "__main__":
+    def slow_fetch(n):
+        time.sleep(0.05)
+        return n
+
+    def square(n):
+        return n * n
+
+    pipeline = Pipeline([
+        Stage("fetch", slow_fetch, workers=4),
+        Stage("square", square, workers=1)
+    ], queue_size=2)
+
+    for item, ok, seconds, extra in pipeline.run(range(1, 21)):
+        print(f"{item}: {'ok' if ok else 'failed'} ({seconds:.3f}s)")
+    for stage in pipeline.stats():
+        print(stage)
@@ -1,6 +1,7 @@
 """
 Pricing Calculator for Influencer Partnerships
 """
+import numpy as np
 
 def calculate_pricing(brand, influencer) -> dict:
     """
@@ -31,8 +32,34 @@ def calculate_pricing(brand, influencer) -> dict:
         (brand.product_cost * (1 + brand.roi_expectation/100))
     )
     
+    # Round with NumPy so single pairs agree with calculate_pricing_arrays
     return {
-        'min_price': round(min_price, 2),
-        'max_price': round(max_price, 2),
-        'recommended_price': round((min_price + max_price) / 2, 2)
+        'min_price': float(np.round(min_price, 2)),
+        'max_price': float(np.round(max_price, 2)),
+        'recommended_price': float(np.round((min_price + max_price) / 2, 2))
+    }
+
+
+def calculate_pricing_arrays(product_cost, roi_expectation, average_reach) -> dict:
+    """
+    Vectorized form of calculate_pricing for many pairs at once.
+    Arguments may be scalars or NumPy arrays that broadcast together, e.g.
+    one brand's cost and ROI against an array of influencer reaches.
+
+    Returns:
+        dict: {'min_price': ndarray, 'max_price': ndarray, 'recommended_price': ndarray}
+    """
+    value_per_conversion = np.asarray(product_cost, dtype=np.float64) * (
+        1 + np.asarray(roi_expectation, dtype=np.float64) / 100
+    )
+    reach = np.asarray(average_reach, dtype=np.float64)
+
+    # Same worst/best case scenarios as calculate_pricing
+    min_price = (0.05 * reach) * 0.01 * value_per_conversion
+    max_price = (0.15 * reach) * 0.03 * value_per_conversion
+
+    return {
+        'min_price': np.round(min_price, 2),
+        'max_price': np.round(max_price, 2),
+        'recommended_price': np.round((min_price + max_price) / 2, 2)
     }
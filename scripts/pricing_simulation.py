@@ -0,0 +1,197 @@
+"""
+Monte Carlo Pricing Simulation for Influencer Partnerships
+
+Replaces the fixed worst/best case of calculate_pricing with price percentiles
+sampled from each influencer's measured per-post engagement.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from .sponsor_match import (
+    Brand, Influencer, BrandTable, InfluencerTable, BrandsLike, InfluencersLike,
+    as_brand_table, as_influencer_table, match_indices
+)
+
+def engagement_history_from_profile(profile_data) -> List[float]:
+    """Per-post engagement rates (in percent) from a scraped profile dict"""
+    if not profile_data or "posts" not in profile_data:
+        return []
+    return [post.get("engagement_rate", 0) for post in profile_data["posts"]]
+
+def _beta_params(mean: np.ndarray, std: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Method-of-moments Beta(a, b) parameters for rates in (0, 1)"""
+    mean = np.clip(mean, 1e-4, 1 - 1e-4)
+    var = np.clip(std ** 2, 1e-8, mean * (1 - mean) * 0.99)
+    concentration = mean * (1 - mean) / var - 1
+    return mean * concentration, (1 - mean) * concentration
+
+class MonteCarloPricer:
+    """
+    Vectorized Monte Carlo pricing.
+    Per post, expected revenue is reach x engagement x conversion x value per
+    conversion. Engagement is drawn from a Beta fitted to the influencer's
+    per-post history and conversion from a Beta around `conversion_mean`.
+    Reach and brand value scale the result linearly, so only the percentiles
+    of engagement x conversion are simulated. They are cached per engagement
+    (mean, std) bucket and reused for every influencer and brand in it.
+    """
+    def __init__(self, n_samples: int = 4000, percentiles: Sequence[float] = (10, 50, 90),
+                 conversion_mean: float = 0.02, conversion_std: float = 0.01,
+                 default_engagement: Tuple[float, float] = (0.10, 0.04),
+                 engagement_step: float = 0.001, seed: Optional[int] = None):
+        self.n_samples = n_samples
+        self.percentiles = tuple(percentiles)
+        self.conversion_mean = conversion_mean
+        self.conversion_std = conversion_std
+        self.default_engagement = default_engagement  # used when nothing was measured
+        self.engagement_step = engagement_step  # bucket width as a fraction
+        self.rng = np.random.default_rng(seed)
+        self._cache: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def engagement_stats(self, influencers: InfluencerTable,
+                         engagement_history: Optional[Dict[str, Sequence[float]]] = None
+                         ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Mean and std of engagement per influencer as fractions.
+        Uses the measured per-post history when available, otherwise the
+        table's average engagement rate with a proportional spread.
+        """
+        mean = influencers.engagement_rate.astype(np.float64) / 100
+        std = mean * 0.5
+        if engagement_history and influencers.names is not None:
+            # Flatten every history into one array and reduce per row with bincount
+            rows, lengths, values = [], [], []
+            for row, name in enumerate(influencers.names):
+                history = engagement_history.get(name)
+                if history:
+                    rows.append(row)
+                    lengths.append(len(history))
+                    values.extend(history)
+            if rows:
+                rows = np.asarray(rows)
+                lengths = np.asarray(lengths, dtype=np.float64)
+                rates = np.asarray(values, dtype=np.float64) / 100
+                group = np.repeat(np.arange(len(rows)), lengths.astype(np.int64))
+                sums = np.bincount(group, weights=rates, minlength=len(rows))
+                squares = np.bincount(group, weights=rates ** 2, minlength=len(rows))
+                history_mean = sums / lengths
+                history_std = np.sqrt(np.maximum(squares / lengths - history_mean ** 2, 0))
+                mean[rows] = history_mean
+                std[rows] = np.where(lengths > 1, history_std, history_mean * 0.5)
+
+        unmeasured = mean <= 0
+        mean[unmeasured] = self.default_engagement[0]
+        std[unmeasured] = self.default_engagement[1]
+        return mean, std
+
+    def _bucket(self, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+        keys = np.stack([
+            np.rint(mean / self.engagement_step),
+            np.rint(std / self.engagement_step)
+        ], axis=1).astype(np.int64)
+        return keys
+
+    def conversion_percentiles(self, mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+        """
+        Percentiles of engagement x conversion per influencer,
+        shape (n_influencers, len(percentiles))
+        """
+        if len(mean) == 0:
+            return np.empty((0, len(self.percentiles)))
+        keys = self._bucket(mean, std)
+        unique_keys, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        missing = [i for i, key in enumerate(map(tuple, unique_keys)) if key not in self._cache]
+        if missing:
+            bucket_mean = unique_keys[missing, 0] * self.engagement_step
+            bucket_std = unique_keys[missing, 1] * self.engagement_step
+            a, b = _beta_params(bucket_mean, bucket_std)
+            engagement = self.rng.beta(a[:, None], b[:, None], size=(len(missing), self.n_samples))
+
+            ca, cb = _beta_params(np.asarray(self.conversion_mean), np.asarray(self.conversion_std))
+            conversion = self.rng.beta(ca, cb, size=(len(missing), self.n_samples))
+
+            simulated = np.percentile(engagement * conversion, self.percentiles, axis=1).T
+            for n, i in enumerate(missing):
+                self._cache[tuple(unique_keys[i])] = simulated[n]
+
+        table = np.stack([self._cache[tuple(key)] for key in unique_keys])
+        return table[inverse]
+
+    def price_pairs(self, product_cost: np.ndarray, roi_expectation: np.ndarray,
+                    average_reach: np.ndarray, per_unit: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Price many pairs at once. All arguments are aligned per pair; per_unit
+        holds rows of conversion_percentiles for each pair's influencer.
+        Returns dict of price arrays keyed 'p10_price', 'p50_price', ...,
+        plus 'min_price', 'max_price' and 'recommended_price' taken from the
+        lowest, highest and middle percentile.
+        """
+        value_per_conversion = np.asarray(product_cost, dtype=np.float64) * (
+            1 + np.asarray(roi_expectation, dtype=np.float64) / 100
+        )
+        prices = np.round(
+            (np.asarray(average_reach, dtype=np.float64) * value_per_conversion)[:, None] * per_unit, 2
+        )
+
+        result = {f"p{q:g}_price": prices[:, n] for n, q in enumerate(self.percentiles)}
+        result['min_price'] = prices[:, 0]
+        result['max_price'] = prices[:, -1]
+        result['recommended_price'] = prices[:, len(self.percentiles) // 2]
+        return result
+
+    def price_matches(self, brands: BrandsLike, influencers: InfluencersLike,
+                      engagement_history: Optional[Dict[str, Sequence[float]]] = None,
+                      matches: Optional[Dict[int, np.ndarray]] = None
+                      ) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Simulate prices for every matched pair in one vectorized pass.
+        Returns (brand rows, influencer rows, price arrays) aligned per pair
+        """
+        brand_table = as_brand_table(brands)
+        influencer_table = as_influencer_table(influencers)
+        if matches is None:
+            matches = match_indices(brand_table, influencer_table)
+
+        brand_rows = np.concatenate(
+            [np.full(len(rows), b, dtype=np.int64) for b, rows in matches.items()] or [np.empty(0, np.int64)]
+        )
+        influencer_rows = np.concatenate(
+            [np.asarray(rows, dtype=np.int64) for rows in matches.values()] or [np.empty(0, np.int64)]
+        )
+
+        mean, std = self.engagement_stats(influencer_table, engagement_history)
+        per_unit = self.conversion_percentiles(mean, std)
+
+        prices = self.price_pairs(
+            brand_table.product_cost[brand_rows],
+            brand_table.roi_expectation[brand_rows],
+            influencer_table.average_reach[influencer_rows],
+            per_unit[influencer_rows]
+        )
+        return brand_rows, influencer_rows, prices
+
+def get_matches_with_simulated_pricing(brands: BrandsLike, influencers: InfluencersLike,
+                                       engagement_history: Optional[Dict[str, Sequence[float]]] = None,
+                                       pricer: Optional[MonteCarloPricer] = None
+                                       ) -> Dict[Brand, Dict[Influencer, Dict[str, float]]]:
+    """
+    Monte Carlo equivalent of sponsor_match.get_matches_with_pricing
+    Returns nested dictionary with price percentiles for each matched pair
+    """
+    pricer = pricer or MonteCarloPricer()
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    brand_records = brands if not isinstance(brands, BrandTable) else brand_table
+    influencer_records = influencers if not isinstance(influencers, InfluencerTable) else influencer_table
+
+    brand_rows, influencer_rows, prices = pricer.price_matches(
+        brand_table, influencer_table, engagement_history
+    )
+
+    result = {brand_records[b]: {} for b in range(len(brand_table))}
+    for n, (b, i) in enumerate(zip(brand_rows, influencer_rows)):
+        result[brand_records[int(b)]][influencer_records[int(i)]] = {
+            name: float(values[n]) for name, values in prices.items()
+        }
+    return result
@@ -0,0 +1,299 @@
+"""
+Roster-Wide Benchmarks and Percentiles
+
+Loads every {username}_analysis.json into one pandas frame (one row per
+influencer) and computes, with grouped quantiles, where engagement,
+sentiment and category focus fall by follower tier and content category.
+This is what answers "is 3.1% engagement good for a 50k-follower Food
+creator?".
+
+Rows and aggregates are cached in data/roster/roster_stats.json. A refresh
+re-reads only analysis files whose size or modification time changed and
+recomputes the aggregates only when a row changed, so reports can ask for
+percentile context without rescanning the roster. Each group keeps a
+101-point quantile grid per metric, which bounds the cache size whatever
+the roster size.
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+from config import DATA_DIR
+from scripts import instrumentation as metrics
+
+# (tier, minimum followers), in ascending order
+FOLLOWER_TIERS = (
+    ("nano", 0),
+    ("micro", 10_000),
+    ("mid", 100_000),
+    ("macro", 500_000),
+    ("mega", 1_000_000)
+)
+
+# Metric -> report label
+METRICS = {
+    "engagement_rate": "Engagement Rate",
+    "post_positive_share": "Positive Post Sentiment",
+    "comment_positive_share": "Positive Comment Sentiment",
+    "comment_negative_share": "Negative Comment Sentiment",
+    "category_focus": "Category Focus"
+}
+
+# Peer groups from most to least specific
+GROUP_LEVELS = (("tier", "category"), ("tier",), ("category",), ())
+
+QUANTILES = np.linspace(0, 1, 101)
+
+def follower_tier(followers):
+    """Tier name for a follower count"""
+    tier = FOLLOWER_TIERS[0][0]
+    for name, minimum in FOLLOWER_TIERS:
+        if followers >= minimum:
+            tier = name
+    return tier
+
+def tier_range(tier):
+    """Human-readable follower range of a tier, e.g. "10k-100k" """
+    def short(n):
+        return f"{n // 1_000_000}M" if n >= 1_000_000 else f"{n // 1_000}k"
+    names = [name for name, _ in FOLLOWER_TIERS]
+    i = names.index(tier)
+    low = FOLLOWER_TIERS[i][1]
+    if i + 1 < len(FOLLOWER_TIERS):
+        return f"{short(low) if low else '0'}-{short(FOLLOWER_TIERS[i + 1][1])}"
+    return f"{short(low)}+"
+
+def _share(counts, key):
+    total = sum(counts.values())
+    return counts.get(key, 0) / total if total else np.nan
+
+def analysis_row(analysis):
+    """Flatten one analysis into the roster frame's columns"""
+    content = analysis.get("content_analysis", {})
+    categories = content.get("categories", {})
+    total_posts = sum(categories.values())
+    category = max(categories, key=categories.get) if categories else "Uncategorized"
+    followers = analysis.get("basic_metrics", {}).get("followers") or 0
+    return {
+        "username": analysis["username"],
+        "followers": followers,
+        "tier": follower_tier(followers),
+        "category": category,
+        "engagement_rate": analysis.get("basic_metrics", {}).get("engagement_rate") or 0.0,
+        "post_positive_share": _share(content.get("sentiment", {}), "positive"),
+        "comment_positive_share": _share(content.get("comment_sentiment", {}), "positive"),
+        "comment_negative_share": _share(content.get("comment_sentiment", {}), "negative"),
+        "category_focus": categories[category] / total_posts if total_posts else np.nan,
+        "category_shares": {name: count / total_posts for name, count in categories.items()} if total_posts else {}
+    }
+
+def _group_key(level, values):
+    return "|".join(f"{name}={value}" for name, value in zip(level, values)) or "all"
+
+def compute_stats(frame):
+    """
+    Quantile grids per peer group and the mean category mix per tier.
+    Returns {"groups": {key: {"count", "counts": {metric: non-NaN count},
+    "quantiles": {metric: [101]}}}, "category_mix": {tier: {category: share}}}
+    """
+    stats = {"influencers": len(frame), "groups": {}, "category_mix": {}}
+    if frame.empty:
+        return stats
+    columns = list(METRICS)
+    for level in GROUP_LEVELS:
+        if level:
+            grouped = frame.groupby(list(level))
+            counts = grouped.size()
+            metric_counts = grouped[columns].count()
+            grids = grouped[columns].quantile(QUANTILES)
+            for values, count in counts.items():
+                values = values if isinstance(values, tuple) else (values,)
+                index = values if len(values) > 1 else values[0]
+                block = grids.loc[index]
+                stats["groups"][_group_key(level, values)] = {
+                    "count": int(count),
+                    "counts": {m: int(n) for m, n in metric_counts.loc[index].items()},
+                    "quantiles": {m: _grid(block[m].to_numpy()) for m in columns}
+                }
+        else:
+            block = frame[columns].quantile(QUANTILES)
+            stats["groups"]["all"] = {
+                "count": len(frame),
+                "counts": {m: int(n) for m, n in frame[columns].count().items()},
+                "quantiles": {m: _grid(block[m].to_numpy()) for m in columns}
+            }
+
+    # Mean share of posts in each category, by tier
+    shares = pd.DataFrame(frame["category_shares"].tolist(), index=frame.index).fillna(0.0)
+    mix = shares.groupby(frame["tier"]).mean()
+    stats["category_mix"] = {
+        tier: {category: round(float(share), 4) for category, share in row.items() if share > 0}
+        for tier, row in mix.iterrows()
+    }
+    return stats
+
+def _grid(values):
+    # All-NaN metrics (e.g. no comments anywhere in the group) are stored as None
+    return None if np.isnan(values).all() else [round(float(v), 6) for v in values]
+
+class RosterAnalytics:
+    """
+    Roster frame and percentile aggregates for the analyses in data_dir.
+
+    Args:
+        data_dir: directory holding the {username}_analysis.json files
+        cache_file: where rows and aggregates are cached
+        min_peers: smallest peer group used for percentiles; smaller groups
+            fall back to the next broader one (tier, category, whole roster)
+    """
+    def __init__(self, data_dir=DATA_DIR, cache_file=None, min_peers=5):
+        self.data_dir = data_dir
+        self.cache_file = cache_file or os.path.join(data_dir, "roster", "roster_stats.json")
+        self.min_peers = min_peers
+        self._rows = None
+        self._stats = None
+
+    def _load_cache(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+                return cache["rows"], cache["stats"]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ignoring unreadable roster cache {self.cache_file}: {e}")
+        return {}, None
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        # Per-process temp file: several workers may refresh at once
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({"rows": self._rows, "stats": self._stats}, f, ensure_ascii=False)
+        os.replace(tmp_file, self.cache_file)
+
+    def refresh(self):
+        """Re-read new or changed analyses and recompute the aggregates if anything changed"""
+        rows, stats = self._load_cache() if self._rows is None else (self._rows, self._stats)
+        suffix = "_analysis.json"
+        seen = set()
+        # Caches written before per-metric peer counts existed are recomputed
+        changed = stats is None or any("counts" not in group for group in stats["groups"].values())
+        with metrics.span("roster.refresh"):
+            for entry in os.scandir(self.data_dir):
+                if not entry.name.endswith(suffix):
+                    continue
+                username = entry.name[:-len(suffix)]
+                seen.add(username)
+                stat = entry.stat()
+                signature = [stat.st_mtime_ns, stat.st_size]
+                if username in rows and rows[username]["signature"] == signature:
+                    continue
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        row = analysis_row(json.load(f))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Skipping unreadable analysis {entry.name}: {e}")
+                    continue
+                row["signature"] = signature
+                rows[username] = row
+                metrics.count("roster.rows_loaded")
+                changed = True
+            for username in set(rows) - seen:
+                del rows[username]
+                changed = True
+
+            self._rows = rows
+            if changed:
+                with metrics.span("roster.aggregate"):
+                    self._stats = compute_stats(self.frame())
+                self._save_cache()
+            else:
+                self._stats = stats
+        return self
+
+    def frame(self):
+        """One row per analyzed influencer"""
+        if self._rows is None:
+            self.refresh()
+        frame = pd.DataFrame(list(self._rows.values()),
+                             columns=["username", "followers", "tier", "category", *METRICS, "category_shares"])
+        for metric in METRICS:
+            frame[metric] = frame[metric].astype(float)
+        return frame
+
+    @property
+    def stats(self):
+        """Cached aggregates, refreshed on first use only"""
+        if self._stats is None:
+            self.refresh()
+        return self._stats
+
+    def peer_group(self, tier, category, metric=None):
+        """
+        Most specific group with at least min_peers influencers (with a value
+        for `metric`, if given): (key, group) or (None, None)
+        """
+        for level in GROUP_LEVELS:
+            values = {"tier": tier, "category": category}
+            key = _group_key(level, [values[name] for name in level])
+            group = self.stats["groups"].get(key)
+            if group and _peers(group, metric) >= self.min_peers:
+                return key, group
+        return None, None
+
+    def percentile(self, metric, value, tier, category):
+        """
+        Where `value` of `metric` falls among peers:
+        {"group", "peers", "percentile", "median"}, or None without enough peers or data
+        """
+        key, group = self.peer_group(tier, category, metric)
+        if group is None or value is None or np.isnan(value):
+            return None
+        grid = group["quantiles"].get(metric)
+        if grid is None:
+            return None
+        grid = np.asarray(grid)
+        # Ties span a flat stretch of the grid; take its midpoint
+        low = np.searchsorted(grid, value, side="left")
+        high = np.searchsorted(grid, value, side="right")
+        if low == high:
+            percentile = float(np.interp(value, grid, QUANTILES * 100))
+        else:
+            percentile = (low + high - 1) / 2
+        return {"group": key, "peers": _peers(group, metric), "percentile": percentile, "median": float(grid[50])}
+
+    def context(self, analysis):
+        """Percentile context for one analysis: {"tier", "category", "metrics": {metric: percentile dict}}"""
+        row = analysis_row(analysis)
+        context = {"tier": row["tier"], "category": row["category"], "metrics": {}}
+        for metric in METRICS:
+            result = self.percentile(metric, row[metric], row["tier"], row["category"])
+            if result:
+                result["value"] = row[metric]
+                context["metrics"][metric] = result
+        return context
+
+def _peers(group, metric):
+    # Influencers in the group with a value for metric (e.g. only those with comments)
+    return group["count"] if metric is None else group["counts"].get(metric, 0)
+
+def describe_group(key):
+    """Readable description of a peer group key, e.g. "micro-tier (10k-100k) Food creators" """
+    if key == "all":
+        return "influencers on the roster"
+    parts = dict(part.split("=", 1) for part in key.split("|"))
+    description = ""
+    if "tier" in parts:
+        description = f"{parts['tier']}-tier ({tier_range(parts['tier'])} followers) "
+    if "category" in parts:
+        description += f"{parts['category']} "
+    return description + "creators"
+
+# Example usage
+if __name__ == "__main__":
+    roster = RosterAnalytics().refresh()
+    frame = roster.frame()
+    print(f"{len(frame)} analyzed influencers")
+    if not frame.empty:
+        summary = frame.groupby(["tier", "category"])[list(METRICS)].median()
+        print(summary.round(3).to_string())
@@ -0,0 +1,273 @@
+"""
+Run-State Store for Project Steps and Per-Influencer Progress
+
+Replaces the project_progress.json file, which every call rewrote in full
+and which lost updates when several processes wrote it at once. State is
+kept in a SQLite database in WAL mode: every update is one small
+transaction, readers never block writers, and any number of threads and
+worker processes can record progress concurrently.
+
+Besides the five project steps, each batch run records the status and
+timing of every (stage, influencer) it processes, so progress views can
+show live throughput per stage.
+"""
+import os
+import time
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from config import DATA_DIR, PROJECT_PROGRESS
+
+# Set by the batch runner so pool workers record into the same run
+RUN_ENV = "BRANDEX_RUN_ID"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS steps (
+    step TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS items (
+    run_id INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    item TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pid INTEGER,
+    started_at REAL,
+    finished_at REAL,
+    seconds REAL,
+    error TEXT,
+    PRIMARY KEY (run_id, stage, item)
+);
+CREATE INDEX IF NOT EXISTS items_by_item ON items (item);
+"""
+
+class _Task:
+    """Handle yielded by RunState.track; set ok = False (or error) to record a failure"""
+    __slots__ = ("ok", "error")
+
+    def __init__(self):
+        self.ok = True
+        self.error = None
+
+class RunState:
+    """
+    Project and batch-run progress in a SQLite database (data/run_state.db).
+    The database is switched to WAL once, by initialize() (called from
+    init_project and start_run). The tables are created at most once per
+    process, on its first connection, so the store also works without any
+    setup; later connections only open the database.
+
+    Args:
+        path: database file
+        timeout: seconds a writer waits for another writer's lock
+    """
+    def __init__(self, path=None, timeout=30.0):
+        self.path = path or os.path.join(DATA_DIR, "run_state.db")
+        self.timeout = timeout
+        self._local = threading.local()
+        self._schema_pid = None
+        self._schema_lock = threading.Lock()
+
+    def _connection(self):
+        # One connection per thread, and a fresh one after a fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            # Durable at checkpoints rather than every commit; a crash loses at most the last updates
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if self._schema_pid != os.getpid():
+                    # Idempotent; a no-op once the tables exist
+                    connection.executescript(_SCHEMA)
+                    self._schema_pid = os.getpid()
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def initialize(self):
+        """Switch the database to WAL (persistent, so done once per database)"""
+        self._connection().execute("PRAGMA journal_mode=WAL")
+        return self
+
+    # Project steps
+
+    def set_step(self, step, status):
+        self._connection().execute(
+            "INSERT INTO steps (step, status, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (step) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at",
+            (step, status, time.time())
+        )
+
+    def steps(self):
+        """Status of every project step, defaulting to PROJECT_PROGRESS"""
+        progress = dict(PROJECT_PROGRESS)
+        progress.update(self._connection().execute("SELECT step, status FROM steps").fetchall())
+        return progress
+
+    def import_progress_file(self, progress_file):
+        """Carry the steps of a legacy project_progress.json over, once"""
+        if not os.path.exists(progress_file):
+            return False
+        if self._connection().execute("SELECT COUNT(*) FROM steps").fetchone()[0]:
+            return False
+        with open(progress_file, 'r') as f:
+            for step, status in json.load(f).items():
+                self.set_step(step, status)
+        return True
+
+    # Batch runs
+
+    def start_run(self, command):
+        """Register a batch run and return its id"""
+        self.initialize()
+        cursor = self._connection().execute(
+            "INSERT INTO runs (command, status, started_at) VALUES (?, 'running', ?)", (command, time.time())
+        )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id, status="completed"):
+        self._connection().execute(
+            "UPDATE runs SET status = ?, finished_at = ? WHERE run_id = ?", (status, time.time(), run_id)
+        )
+
+    def runs(self, limit=10):
+        """Most recent runs, newest first"""
+        rows = self._connection().execute(
+            "SELECT run_id, command, status, started_at, finished_at FROM runs ORDER BY run_id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [dict(zip(("run_id", "command", "status", "started_at", "finished_at"), row)) for row in rows]
+
+    # Per-influencer progress
+
+    def item_started(self, stage, item, run_id=None):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO items (run_id, stage, item, status, pid, started_at) "
+            "VALUES (?, ?, ?, 'running', ?, ?)",
+            (_run_id(run_id), stage, item, os.getpid(), time.time())
+        )
+
+    def item_finished(self, stage, item, ok, seconds, error=None, run_id=None):
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO items (run_id, stage, item, status, pid, started_at, finished_at, seconds, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (run_id, stage, item) DO UPDATE SET status = excluded.status, "
+            "finished_at = excluded.finished_at, seconds = excluded.seconds, error = excluded.error",
+            (_run_id(run_id), stage, item, "completed" if ok else "failed", os.getpid(),
+             now - seconds, now, seconds, error)
+        )
+
+    @contextmanager
+    def track(self, stage, item, run_id=None):
+        """Record one item of a stage as running, then completed or failed (also on exceptions)"""
+        task = _Task()
+        start = time.perf_counter()
+        self.item_started(stage, item, run_id)
+        try:
+            yield task
+        except Exception as e:
+            self.item_finished(stage, item, False, time.perf_counter() - start, f"{type(e).__name__}: {e}", run_id)
+            raise
+        self.item_finished(stage, item, task.ok and task.error is None, time.perf_counter() - start,
+                           task.error, run_id)
+
+    def item_status(self, item):
+        """Latest status of one influencer in every stage it has been through"""
+        rows = self._connection().execute(
+            "SELECT stage, status, run_id, finished_at, seconds, error FROM items WHERE item = ? "
+            "ORDER BY run_id", (item,)
+        ).fetchall()
+        return {stage: {"status": status, "run_id": run_id, "finished_at": finished_at,
+                        "seconds": seconds, "error": error}
+                for stage, status, run_id, finished_at, seconds, error in rows}
+
+    def stage_summary(self, run_id, window=60.0):
+        """
+        Per-stage counts and throughput of a run: overall items/s since the
+        stage's first item, and over the last `window` seconds
+        """
+        now = time.time()
+        rows = self._connection().execute(
+            "SELECT stage, "
+            "SUM(status = 'completed'), SUM(status = 'failed'), SUM(status = 'running'), "
+            "MIN(started_at), MAX(finished_at), AVG(seconds), "
+            "SUM(status != 'running' AND finished_at >= ?) "
+            "FROM items WHERE run_id = ? GROUP BY stage ORDER BY MIN(started_at)",
+            (now - window, run_id)
+        ).fetchall()
+        summary = []
+        for stage, completed, failed, running, first, last, mean, recent in rows:
+            finished = completed + failed
+            elapsed = ((last or now) if not running else now) - first if first else 0.0
+            summary.append({
+                "stage": stage,
+                "completed": completed,
+                "failed": failed,
+                "running": running,
+                "items_per_second": finished / elapsed if elapsed > 0 else 0.0,
+                "recent_items_per_second": recent / window,
+                "mean_seconds": mean or 0.0
+            })
+        return summary
+
+    def prune(self, keep_runs=50):
+        """Drop the item records of all but the latest runs and shrink the WAL"""
+        connection = self._connection()
+        cutoff = connection.execute(
+            "SELECT run_id FROM runs ORDER BY run_id DESC LIMIT 1 OFFSET ?", (keep_runs - 1,)
+        ).fetchone()
+        deleted = 0
+        if cutoff:
+            deleted = connection.execute("DELETE FROM items WHERE run_id < ?", (cutoff[0],)).rowcount
+            connection.execute("DELETE FROM runs WHERE run_id < ?", (cutoff[0],))
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return deleted
+
+def _run_id(run_id):
+    # Items recorded outside a batch run (e.g. from the interactive menu) go to run 0
+    if run_id is not None:
+        return run_id
+    return int(os.getenv(RUN_ENV, "0"))
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_run_state():
+    """Process-wide RunState on the default database"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RunState()
+        return _shared
+
+# Example usage
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    state = RunState("/tmp/brandex_run_state.db")
+    run_id = state.start_run("demo")
+
+    def work(i):
+        with state.track("demo", f"creator_{i}", run_id) as task:
+            time.sleep(0.001)
+            task.ok = i % 10 != 0
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(work, range(2000)))
+    elapsed = time.perf_counter() - start
+    state.finish_run(run_id)
+    print(f"Recorded 2000 items from 8 threads in {elapsed:.2f}s")
+    print(state.stage_summary(run_id))
@@ -0,0 +1,160 @@
+"""
+Sampled Comment Sentiment Estimation
+
+Estimates the positive/neutral/negative share of an influencer's comments
+from a stratified random sample (one stratum per post, with posts that
+have only a few comments pooled into one) instead of running
+the model on every comment. Sampling proceeds in rounds and stops as soon
+as the confidence interval of every share is within the target margin.
+"""
+import math
+import random
+from statistics import NormalDist
+from typing import Callable, Dict, List, Optional, Sequence
+
+SENTIMENT_CATEGORIES = ("positive", "neutral", "negative")
+
+# Posts with fewer comments than this share one pooled stratum
+MIN_STRATUM_SIZE = 30
+
+def _allocate(batch_size: int, sizes: List[int], taken: List[int]) -> List[int]:
+    """Split batch_size draws across strata in proportion to their size, capped by what's left"""
+    remaining = [size - t for size, t in zip(sizes, taken)]
+    total = sum(remaining)
+    if total <= batch_size:
+        return remaining
+
+    quotas = [batch_size * r / total for r in remaining]
+    allocation = [min(int(q), r) for q, r in zip(quotas, remaining)]
+    # Hand out the rest by largest remainder
+    order = sorted(range(len(sizes)), key=lambda h: quotas[h] - int(quotas[h]), reverse=True)
+    left = batch_size - sum(allocation)
+    for h in order:
+        if left <= 0:
+            break
+        if allocation[h] < remaining[h]:
+            allocation[h] += 1
+            left -= 1
+    return allocation
+
+def stratified_estimate(sizes: Sequence[int], labels: Sequence[Sequence[str]], z: float) -> Dict[str, Dict[str, float]]:
+    """
+    Stratified share and margin of error for each category.
+    sizes[h] is the number of comments in stratum h, labels[h] the
+    categories sampled from it so far.
+
+    Shares are normalized by the weight of the strata sampled so far, and
+    the weight of strata not yet sampled counts as one block of worst-case
+    (0.25) variance, so an estimate that hasn't seen every stratum can't
+    look precise.
+    """
+    total = sum(sizes)
+    covered = sum(size for size, sampled in zip(sizes, labels) if size and sampled) / total if total else 0.0
+    estimate = {}
+    for category in SENTIMENT_CATEGORIES:
+        share = 0.0
+        variance = (1 - covered) ** 2 * 0.25
+        for size, sampled in zip(sizes, labels):
+            n = len(sampled)
+            if size == 0 or n == 0:
+                continue
+            weight = size / total
+            p = sum(1 for label in sampled if label == category) / n
+            share += weight * p
+            if n < size:
+                # Finite population correction; with a single draw assume the worst case
+                stratum_variance = p * (1 - p) / (n - 1) if n > 1 else 0.25
+                variance += weight ** 2 * (1 - n / size) * stratum_variance
+        estimate[category] = {"share": share / covered if covered else 0.0, "margin": z * math.sqrt(variance)}
+    return estimate
+
+def pool_strata(comments_by_post: Sequence[Sequence[str]], min_size: int = MIN_STRATUM_SIZE) -> List[Sequence[str]]:
+    """One stratum per post with at least min_size comments, plus one pooling all smaller posts"""
+    strata = [comments for comments in comments_by_post if len(comments) >= min_size]
+    pooled = [comment for comments in comments_by_post if len(comments) < min_size for comment in comments]
+    if pooled:
+        strata.append(pooled)
+    return strata
+
+def estimate_comment_sentiment(comments_by_post: Sequence[Sequence[str]],
+                               classify: Callable[[List[str]], List[str]],
+                               margin: float = 0.03, confidence: float = 0.95,
+                               batch_size: int = 64, min_samples: int = 100,
+                               max_samples: Optional[int] = None,
+                               rng: Optional[random.Random] = None) -> Dict:
+    """
+    Estimate comment sentiment shares with early stopping.
+
+    Args:
+        comments_by_post: comment texts grouped by post (the strata; posts
+            with few comments are pooled, see pool_strata)
+        classify: maps a list of texts to a list of categories from
+            SENTIMENT_CATEGORIES
+        margin: stop once every share's margin of error is at most this
+        confidence: confidence level of the margin
+        batch_size: comments classified per sampling round
+        min_samples: never stop before this many comments are sampled
+        max_samples: hard cap on comments classified
+        rng: random source, for reproducible samples
+
+    Returns:
+        dict with estimated 'shares', 'margin_of_error' per category,
+        'confidence', 'sampled', 'total' and 'exact' (everything classified)
+    """
+    rng = rng or random.Random()
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    comments_by_post = pool_strata(comments_by_post)
+    sizes = [len(comments) for comments in comments_by_post]
+    total = sum(sizes)
+    orders = [rng.sample(range(size), size) for size in sizes]
+    taken = [0] * len(sizes)
+    labels: List[List[str]] = [[] for _ in sizes]
+
+    estimate = None
+    sampled = 0
+    while sampled < total:
+        budget = batch_size
+        if max_samples is not None:
+            budget = min(budget, max_samples - sampled)
+            if budget <= 0:
+                break
+        # Seed unsampled strata with up to two draws each so their variance
+        # can be estimated, then spread the rest of the round proportionally
+        allocation = [0] * len(sizes)
+        for h, size in enumerate(sizes):
+            if taken[h] == 0 and size and budget:
+                allocation[h] = min(2, size, budget)
+                budget -= allocation[h]
+        if budget:
+            extra = _allocate(budget, sizes, [t + a for t, a in zip(taken, allocation)])
+            allocation = [a + e for a, e in zip(allocation, extra)]
+
+        batch, owners = [], []
+        for h, n in enumerate(allocation):
+            for i in orders[h][taken[h]:taken[h] + n]:
+                batch.append(comments_by_post[h][i])
+                owners.append(h)
+            taken[h] += n
+        if not batch:
+            break
+
+        for h, category in zip(owners, classify(batch)):
+            labels[h].append(category)
+        sampled += len(batch)
+
+        estimate = stratified_estimate(sizes, labels, z)
+        covered = all(t > 0 for t, size in zip(taken, sizes) if size)
+        if covered and sampled >= min_samples and all(e["margin"] <= margin for e in estimate.values()):
+            break
+
+    if estimate is None:
+        estimate = {category: {"share": 0.0, "margin": 0.0} for category in SENTIMENT_CATEGORIES}
+
+    return {
+        "shares": {category: e["share"] for category, e in estimate.items()},
+        "margin_of_error": {category: e["margin"] for category, e in estimate.items()},
+        "confidence": confidence,
+        "sampled": sampled,
+        "total": total,
+        "exact": sampled >= total
+    }
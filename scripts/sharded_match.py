@@ -0,0 +1,165 @@
+"""
+Sharded Multi-Process Brand-Influencer Matching
+
+Brands are split into shards across a process pool. The influencer table is
+placed in shared memory once and attached read-only by every worker instead
+of being pickled per task. Each shard streams its matches and prices back as
+compact index arrays.
+"""
+import os
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from .sponsor_match import (
+    Brand, Influencer, BrandTable, InfluencerTable, BrandsLike, InfluencersLike,
+    as_brand_table, as_influencer_table, brand_match_mask, _Categories, _decode_audience
+)
+from .pricing_calculator import calculate_pricing_arrays
+
+class SharedInfluencerTable:
+    """
+    Copies the numeric columns of an InfluencerTable into shared memory.
+    `spec` is the small picklable description workers use to attach; names
+    stay in the parent since workers only deal in row indices.
+    """
+    def __init__(self, table: InfluencerTable):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        columns = {
+            "content_type": table.content_type[1],
+            "average_reach": table.average_reach,
+            "engagement_rate": table.engagement_rate
+        }
+        for key, (_, codes) in table.audience.items():
+            columns["audience:" + key] = codes
+
+        self.spec = {
+            "columns": {name: self._share(array) for name, array in columns.items()},
+            "content_type": table.content_type[0].values,
+            "audience": {key: categories.values for key, (categories, _) in table.audience.items()}
+        }
+
+    def _share(self, array: np.ndarray):
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        self._blocks.append(block)
+        return block.name, array.dtype.str, array.shape
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _categories(values: List[str]) -> _Categories:
+    categories = _Categories()
+    for value in values:
+        categories.encode(value)
+    return categories
+
+def attach_influencer_table(spec) -> Tuple[InfluencerTable, List[shared_memory.SharedMemory]]:
+    """Rebuild a read-only InfluencerTable view over the shared blocks in spec"""
+    blocks = []
+    arrays = {}
+    for name, (block_name, dtype, shape) in spec["columns"].items():
+        # Pool workers share the parent's resource tracker, so attaching here
+        # does not hand ownership of the block to the worker
+        block = shared_memory.SharedMemory(name=block_name)
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        array.flags.writeable = False
+        arrays[name] = array
+        blocks.append(block)
+
+    table = InfluencerTable(
+        names=None,
+        content_type=(_categories(spec["content_type"]), arrays["content_type"]),
+        audience={
+            key: (_categories(values), arrays["audience:" + key])
+            for key, values in spec["audience"].items()
+        },
+        average_reach=arrays["average_reach"],
+        engagement_rate=arrays["engagement_rate"]
+    )
+    return table, blocks
+
+# Per-process state set up by _init_worker
+_worker_table: Optional[InfluencerTable] = None
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+def _init_worker(spec):
+    global _worker_table, _worker_blocks
+    _worker_table, _worker_blocks = attach_influencer_table(spec)
+
+def _match_shard(shard):
+    """Match and price one shard of (brand row, target audience, cost, roi) tuples"""
+    results = []
+    for b, target_audience, product_cost, roi_expectation in shard:
+        rows = np.flatnonzero(brand_match_mask(target_audience, _worker_table))
+        prices = calculate_pricing_arrays(product_cost, roi_expectation, _worker_table.average_reach[rows])
+        results.append((b, rows, prices))
+    return results
+
+def _shards(brand_table: BrandTable, shard_size: int):
+    shard = []
+    for b in range(len(brand_table)):
+        shard.append((
+            b,
+            _decode_audience(brand_table.target_audience, b),
+            float(brand_table.product_cost[b]),
+            float(brand_table.roi_expectation[b])
+        ))
+        if len(shard) == shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+def iter_sharded_matches(brands: BrandsLike, influencers: InfluencersLike,
+                         processes: Optional[int] = None, shard_size: Optional[int] = None
+                         ) -> Iterator[Tuple[int, np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Match and price brands against influencers across a process pool.
+    Yields (brand row, matched influencer rows, price arrays) as each shard
+    finishes, in completion order rather than brand order.
+    """
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    processes = processes or os.cpu_count() or 1
+    if not shard_size:
+        # A few shards per worker keeps the pool busy when brands differ in cost
+        shard_size = max(1, len(brand_table) // (processes * 4))
+
+    with SharedInfluencerTable(influencer_table) as shared:
+        with mp.Pool(processes, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+            for results in pool.imap_unordered(_match_shard, _shards(brand_table, shard_size)):
+                yield from results
+
+def get_matches_with_pricing_sharded(brands: BrandsLike, influencers: InfluencersLike,
+                                     processes: Optional[int] = None, shard_size: Optional[int] = None
+                                     ) -> Dict[Brand, Dict[Influencer, Dict[str, float]]]:
+    """
+    Sharded equivalent of sponsor_match.get_matches_with_pricing
+    Returns nested dictionary with pricing details, merged from all shards
+    """
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    brand_records = brands if not isinstance(brands, BrandTable) else brand_table
+    influencer_records = influencers if not isinstance(influencers, InfluencerTable) else influencer_table
+
+    result = {}
+    for b, rows, prices in iter_sharded_matches(brand_table, influencer_table, processes, shard_size):
+        pricing_details = {}
+        for n, i in enumerate(rows):
+            pricing_details[influencer_records[int(i)]] = {
+                name: float(values[n]) for name, values in prices.items()
+            }
+        result[brand_records[b]] = pricing_details
+
+    # Keep the brand order of the unsharded version
+    return {brand_records[b]: result[brand_records[b]] for b in range(len(brand_table))}
@@ -2,70 +2,466 @@
 Brand-Influencer Matching System
 """
 
-from dataclasses import dataclass
-from typing import List, Dict, Optional
-from .pricing_calculator import calculate_pricing
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Sequence, Union
+import numpy as np
+from .pricing_calculator import calculate_pricing, calculate_pricing_arrays
 
-@dataclass
+# Code used in categorical columns for an audience key the record doesn't set
+MISSING = -1
+
+@dataclass(frozen=True, slots=True)
 class Brand:
     """Represents a brand looking for influencer partnerships"""
     name: str
     industry: str  # Fashion, Tech, Food etc.
-    target_audience: Dict[str, str]  # {age: "18-25", gender: "male", location: "IN"}
+    target_audience: Dict[str, str] = field(hash=False)  # {age: "18-25", gender: "male", location: "IN"}
     product_cost: float  # Cost per product in ₹
     roi_expectation: float  # Expected ROI percentage (e.g., 20 for 20%)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Influencer:
     """Represents an influencer available for brand partnerships"""
     name: str
     content_type: str
-    audience_stats: Dict[str, str]  # {age: "18-25", gender: "male", location: "IN"}
+    audience_stats: Dict[str, str] = field(hash=False)  # {age: "18-25", gender: "male", location: "IN"}
     average_reach: int  # Average number of people reached per post
+    engagement_rate: float = 0.0  # Average engagement rate in percent
+
+class _Categories:
+    """Vocabulary mapping category strings to compact integer codes"""
+    __slots__ = ("values", "index")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self.index: Dict[str, int] = {}
+
+    def encode(self, value: Optional[str]) -> int:
+        """Return the code for value, adding it to the vocabulary if new"""
+        if value is None:
+            return MISSING
+        code = self.index.get(value)
+        if code is None:
+            code = len(self.values)
+            self.index[value] = code
+            self.values.append(value)
+        return code
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        """Return the code for value, or None if it was never seen"""
+        if value is None:
+            return MISSING
+        return self.index.get(value)
+
+    def decode(self, code: int) -> Optional[str]:
+        return None if code == MISSING else self.values[code]
+
+def _code_dtype(n_categories: int):
+    """Smallest signed integer dtype able to hold n_categories codes plus MISSING"""
+    if n_categories < 2**7:
+        return np.int8
+    if n_categories < 2**15:
+        return np.int16
+    return np.int32
+
+def _encode_column(values: Sequence[Optional[str]]):
+    categories = _Categories()
+    codes = [categories.encode(value) for value in values]
+    return categories, np.asarray(codes, dtype=_code_dtype(len(categories.values)))
+
+def _encode_audience(audiences: Sequence[Dict[str, str]]):
+    """Split a list of audience dicts into one categorical column per key"""
+    keys = []
+    for audience in audiences:
+        for key in audience:
+            if key not in keys:
+                keys.append(key)
+    columns = {}
+    for key in keys:
+        columns[key] = _encode_column([audience.get(key) for audience in audiences])
+    return columns
+
+def _decode_audience(columns, idx: int) -> Dict[str, str]:
+    audience = {}
+    for key, (categories, codes) in columns.items():
+        code = int(codes[idx])
+        if code != MISSING:
+            audience[key] = categories.values[code]
+    return audience
+
+def _audience_nbytes(columns) -> int:
+    return sum(codes.nbytes for _, codes in columns.values())
+
+class InfluencerTable:
+    """
+    Column-backed collection of influencers for bulk matching and pricing.
+    Text fields are stored as categorical codes against a shared vocabulary,
+    so each influencer costs a few bytes per audience key instead of a dict.
+    """
+    __slots__ = ("names", "content_type", "audience", "average_reach", "engagement_rate")
+
+    def __init__(self, names, content_type, audience, average_reach, engagement_rate=None):
+        self.names: List[str] = names
+        self.content_type = content_type  # (_Categories, codes)
+        self.audience = audience  # {key: (_Categories, codes)}
+        self.average_reach: np.ndarray = average_reach
+        if engagement_rate is None:
+            engagement_rate = np.zeros(len(names), dtype=np.float32)
+        self.engagement_rate: np.ndarray = engagement_rate
+
+    @classmethod
+    def from_influencers(cls, influencers: Sequence[Influencer]) -> "InfluencerTable":
+        """Build a table from a sequence of Influencer records"""
+        return cls(
+            names=[influencer.name for influencer in influencers],
+            content_type=_encode_column([influencer.content_type for influencer in influencers]),
+            audience=_encode_audience([influencer.audience_stats for influencer in influencers]),
+            average_reach=np.asarray(
+                [influencer.average_reach for influencer in influencers], dtype=np.int64
+            ),
+            engagement_rate=np.asarray(
+                [influencer.engagement_rate for influencer in influencers], dtype=np.float32
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self.average_reach)
+
+    def __getitem__(self, idx: int) -> Influencer:
+        categories, codes = self.content_type
+        return Influencer(
+            name=self.names[idx],
+            content_type=categories.decode(int(codes[idx])),
+            audience_stats=_decode_audience(self.audience, idx),
+            average_reach=int(self.average_reach[idx]),
+            engagement_rate=float(self.engagement_rate[idx])
+        )
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
 
-def match_brands_to_influencers(brands: List[Brand], influencers: List[Influencer]) -> Dict[Brand, List[Influencer]]:
+    def audience_mask(self, key: str, value: Optional[str]) -> np.ndarray:
+        """Boolean mask of influencers whose audience `key` equals `value`"""
+        if key not in self.audience:
+            return np.full(len(self), value is None)
+        categories, codes = self.audience[key]
+        code = categories.lookup(value)
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return codes == code
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns (names and vocabularies excluded)"""
+        return (
+            self.content_type[1].nbytes
+            + _audience_nbytes(self.audience)
+            + self.average_reach.nbytes
+            + self.engagement_rate.nbytes
+        )
+
+class BrandTable:
+    """Column-backed collection of brands, the counterpart of InfluencerTable"""
+    __slots__ = ("names", "industry", "target_audience", "product_cost", "roi_expectation")
+
+    def __init__(self, names, industry, target_audience, product_cost, roi_expectation):
+        self.names: List[str] = names
+        self.industry = industry  # (_Categories, codes)
+        self.target_audience = target_audience  # {key: (_Categories, codes)}
+        self.product_cost: np.ndarray = product_cost
+        self.roi_expectation: np.ndarray = roi_expectation
+
+    @classmethod
+    def from_brands(cls, brands: Sequence[Brand]) -> "BrandTable":
+        """Build a table from a sequence of Brand records"""
+        return cls(
+            names=[brand.name for brand in brands],
+            industry=_encode_column([brand.industry for brand in brands]),
+            target_audience=_encode_audience([brand.target_audience for brand in brands]),
+            product_cost=np.asarray([brand.product_cost for brand in brands], dtype=np.float64),
+            roi_expectation=np.asarray([brand.roi_expectation for brand in brands], dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, idx: int) -> Brand:
+        categories, codes = self.industry
+        return Brand(
+            name=self.names[idx],
+            industry=categories.decode(int(codes[idx])),
+            target_audience=_decode_audience(self.target_audience, idx),
+            product_cost=float(self.product_cost[idx]),
+            roi_expectation=float(self.roi_expectation[idx])
+        )
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the numeric columns (names and vocabularies excluded)"""
+        return (
+            self.industry[1].nbytes
+            + _audience_nbytes(self.target_audience)
+            + self.product_cost.nbytes
+            + self.roi_expectation.nbytes
+        )
+
+BrandsLike = Union[Sequence[Brand], BrandTable]
+InfluencersLike = Union[Sequence[Influencer], InfluencerTable]
+
+def as_brand_table(brands: BrandsLike) -> BrandTable:
+    return brands if isinstance(brands, BrandTable) else BrandTable.from_brands(brands)
+
+def as_influencer_table(influencers: InfluencersLike) -> InfluencerTable:
+    if isinstance(influencers, InfluencerTable):
+        return influencers
+    return InfluencerTable.from_influencers(influencers)
+
+def is_match(brand: Brand, influencer: Influencer) -> bool:
+    """
+    Scalar version of the rule in brand_match_mask, for per-pair checks such
+    as IncrementalMatcher's; the two are kept in step by the test suite
+    """
+    audience_match = all(
+        key in influencer.audience_stats and influencer.audience_stats[key] == value
+        for key, value in brand.target_audience.items()
+    )
+    location_match = (
+        influencer.audience_stats.get('location') ==
+        brand.target_audience.get('location')
+    )
+    return audience_match and location_match
+
+def brand_match_mask(target_audience: Dict[str, str], influencers: InfluencerTable) -> np.ndarray:
+    """
+    Boolean mask of influencers matching one brand's target audience.
+    Every target key must match exactly, and the location must agree even
+    when neither side sets one.
+    """
+    mask = np.ones(len(influencers), dtype=bool)
+    for key, value in target_audience.items():
+        if key not in influencers.audience:
+            return np.zeros(len(influencers), dtype=bool)
+        mask &= influencers.audience_mask(key, value)
+    if 'location' not in target_audience:
+        mask &= influencers.audience_mask('location', None)
+    return mask
+
+def match_indices(brands: BrandsLike, influencers: InfluencersLike) -> Dict[int, np.ndarray]:
+    """
+    Match brands to influencers on table row indices
+    Returns dictionary of brand row to array of matched influencer rows
+    """
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+
+    matches = {}
+    for b in range(len(brand_table)):
+        target_audience = _decode_audience(brand_table.target_audience, b)
+        mask = brand_match_mask(target_audience, influencer_table)
+        matches[b] = np.flatnonzero(mask)
+    return matches
+
+def match_brands_to_influencers(brands: BrandsLike, influencers: InfluencersLike) -> Dict[Brand, List[Influencer]]:
     """
     Match brands to suitable influencers based on:
     - Audience demographics alignment
     - Location alignment
+    Accepts lists of records or BrandTable/InfluencerTable
     Returns dictionary of brand to list of matched influencers
     """
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    brand_records = brands if not isinstance(brands, BrandTable) else brand_table
+    influencer_records = influencers if not isinstance(influencers, InfluencerTable) else influencer_table
+
     matches = {}
-    
-    for brand in brands:
-        matched_influencers = []
-        for influencer in influencers:
-            # Check audience match
-            audience_match = all(
-                influencer.audience_stats[key] == brand.target_audience[key]
-                for key in brand.target_audience
-            )
-            
-            # Check location match
-            location_match = (
-                influencer.audience_stats.get('location') == 
-                brand.target_audience.get('location')
-            )
-            
-            if audience_match and location_match:
-                matched_influencers.append(influencer)
-        
-        matches[brand] = matched_influencers
-    
+    for b, rows in match_indices(brand_table, influencer_table).items():
+        matches[brand_records[b]] = [influencer_records[int(i)] for i in rows]
     return matches
 
-def get_matches_with_pricing(brands: List[Brand], influencers: List[Influencer]) -> Dict[Brand, Dict[Influencer, Dict[str, float]]]:
+def get_matches_with_pricing(brands: BrandsLike, influencers: InfluencersLike) -> Dict[Brand, Dict[Influencer, Dict[str, float]]]:
     """
     Get matches with pricing suggestions for each brand-influencer pair
+    Accepts lists of records or BrandTable/InfluencerTable
     Returns nested dictionary with pricing details
     """
-    matches = match_brands_to_influencers(brands, influencers)
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    brand_records = brands if not isinstance(brands, BrandTable) else brand_table
+    influencer_records = influencers if not isinstance(influencers, InfluencerTable) else influencer_table
+
     result = {}
-    
-    for brand, matched_influencers in matches.items():
+    for b, rows in match_indices(brand_table, influencer_table).items():
+        prices = calculate_pricing_arrays(
+            brand_table.product_cost[b],
+            brand_table.roi_expectation[b],
+            influencer_table.average_reach[rows]
+        )
         pricing_details = {}
-        for influencer in matched_influencers:
-            pricing_details[influencer] = calculate_pricing(brand, influencer)
-        result[brand] = pricing_details
-    
+        for n, i in enumerate(rows):
+            pricing_details[influencer_records[int(i)]] = {
+                name: float(values[n]) for name, values in prices.items()
+            }
+        result[brand_records[b]] = pricing_details
+
     return result
+
+# Default weights for ranked matching; audience keys not listed weigh 1.0
+DEFAULT_SCORE_WEIGHTS = {
+    "age": 1.0,
+    "gender": 1.0,
+    "location": 1.5,
+    "reach": 1.0,
+    "engagement": 1.0
+}
+
+def influencer_base_scores(influencers: InfluencerTable, weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Brand-independent part of the match score: log-scaled reach and
+    engagement rate, each normalized to [0, 1] across the table and weighted
+    """
+    weights = {**DEFAULT_SCORE_WEIGHTS, **(weights or {})}
+    reach = np.log1p(influencers.average_reach.astype(np.float64))
+    engagement = influencers.engagement_rate.astype(np.float64)
+
+    scores = np.zeros(len(influencers), dtype=np.float64)
+    if len(influencers) and reach.max() > 0:
+        scores += weights["reach"] * reach / reach.max()
+    if len(influencers) and engagement.max() > 0:
+        scores += weights["engagement"] * engagement / engagement.max()
+    return scores
+
+def _audience_score(target_audience: Dict[str, str], influencers: InfluencerTable, rows: np.ndarray, weights: Dict[str, float]) -> np.ndarray:
+    """Weighted count of the brand's audience dimensions matched by each row"""
+    scores = np.zeros(len(rows), dtype=np.float64)
+    for key, value in target_audience.items():
+        if key not in influencers.audience:
+            continue
+        categories, codes = influencers.audience[key]
+        code = categories.lookup(value)
+        if code is None:
+            continue
+        scores += weights.get(key, 1.0) * (codes[rows] == code)
+    return scores
+
+def rank_indices(brands: BrandsLike, influencers: InfluencersLike, k: int = 10,
+                 weights: Optional[Dict[str, float]] = None, block_size: int = 4096) -> Dict[int, List[tuple]]:
+    """
+    Rank influencers for each brand by weighted similarity and keep the top k.
+    Influencers are visited in descending order of their brand-independent
+    score, one block at a time, and a bounded heap holds the current top k.
+    Scanning stops as soon as the next candidate cannot beat the heap minimum
+    even with a full audience match.
+    Returns dictionary of brand row to list of (influencer row, score) pairs,
+    best first, with scores normalized to [0, 1]
+    """
+    import heapq
+
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    weights = {**DEFAULT_SCORE_WEIGHTS, **(weights or {})}
+
+    base = influencer_base_scores(influencer_table, weights)
+    order = np.argsort(-base, kind="stable")
+    base_max = weights["reach"] + weights["engagement"]
+
+    ranked = {}
+    for b in range(len(brand_table)):
+        if k <= 0:
+            ranked[b] = []
+            continue
+        target_audience = _decode_audience(brand_table.target_audience, b)
+        audience_max = sum(weights.get(key, 1.0) for key in target_audience)
+        total_max = (audience_max + base_max) or 1.0
+
+        heap = []  # (score, -row) so ties keep the lower row
+        for start in range(0, len(order), block_size):
+            rows = order[start:start + block_size]
+            if len(heap) == k and base[rows[0]] + audience_max <= heap[0][0]:
+                break
+            scores = base[rows] + _audience_score(target_audience, influencer_table, rows, weights)
+            if len(rows) > k:
+                best = np.argpartition(-scores, k - 1)[:k]
+            else:
+                best = np.arange(len(rows))
+            for i in best:
+                entry = (float(scores[i]), -int(rows[i]))
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        ranked[b] = [(-row, score / total_max) for score, row in sorted(heap, reverse=True)]
+    return ranked
+
+def rank_brands_to_influencers(brands: BrandsLike, influencers: InfluencersLike, k: int = 10,
+                               weights: Optional[Dict[str, float]] = None) -> Dict[Brand, List[tuple]]:
+    """
+    Ranked alternative to match_brands_to_influencers based on:
+    - Weighted partial audience alignment (each matching dimension counts)
+    - Average reach
+    - Engagement rate
+    Returns dictionary of brand to its top k (influencer, score) pairs
+    """
+    brand_table = as_brand_table(brands)
+    influencer_table = as_influencer_table(influencers)
+    brand_records = brands if not isinstance(brands, BrandTable) else brand_table
+    influencer_records = influencers if not isinstance(influencers, InfluencerTable) else influencer_table
+
+    ranked = {}
+    for b, shortlist in rank_indices(brand_table, influencer_table, k, weights).items():
+        ranked[brand_records[b]] = [(influencer_records[row], score) for row, score in shortlist]
+    return ranked
+
+def measure_memory(n_influencers: int = 100_000) -> Dict[str, int]:
+    """
+    Measure bytes used by n_influencers as records and as an InfluencerTable
+    Returns dictionary with 'records' and 'table' byte counts
+    """
+    import tracemalloc
+
+    ages = ["13-17", "18-25", "26-35", "36-45", "45+"]
+    genders = ["male", "female"]
+    locations = ["IN", "US", "UK", "AE", "SG"]
+    types = ["Fashion", "Tech", "Food", "Fitness", "Travel"]
+
+    def make_influencers():
+        return [
+            Influencer(
+                name=f"influencer_{i}",
+                content_type=types[i % len(types)],
+                audience_stats={
+                    "age": ages[i % len(ages)],
+                    "gender": genders[i % len(genders)],
+                    "location": locations[i % len(locations)]
+                },
+                average_reach=1000 + i
+            )
+            for i in range(n_influencers)
+        ]
+
+    tracemalloc.start()
+    influencers = make_influencers()
+    records_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    table = InfluencerTable.from_influencers(influencers)
+    del influencers
+    table_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"records": records_bytes, "table": table_bytes, "table_columns": table.nbytes}
+
+# Example usage
+if __name__ == "__main__":
+    memory = measure_memory(100_000)
+    print("Memory per 100k influencers:")
+    print(f"Records: {memory['records'] / 1024**2:.1f} MiB")
+    print(f"Table: {memory['table'] / 1024**2:.1f} MiB "
+          f"({memory['table_columns'] / 1024**2:.2f} MiB in numeric columns)")
@@ -0,0 +1,106 @@
+"""
+Text Preprocessing for Model Inference
+
+Normalizes and deduplicates texts before they reach a model, within a call
+and across calls (e.g. across profiles in one run). Long texts are
+truncated to the model's token limit and unique texts are sorted by length
+into batches, so each forward pass pads as little as possible. Results are
+fanned back out to every original occurrence.
+"""
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+from scripts import instrumentation as metrics
+
+_WHITESPACE = re.compile(r"\s+")
+_REPEATS = re.compile(r"(.)\1{3,}")
+
+def normalize_text(text: str) -> str:
+    """
+    Canonical form used as the dedup key: NFKC, lowercased, whitespace
+    collapsed and character runs capped at three ("soooo" -> "sooo",
+    "🔥🔥🔥🔥🔥" -> "🔥🔥🔥")
+    """
+    text = unicodedata.normalize("NFKC", text).lower().strip()
+    text = _WHITESPACE.sub(" ", text)
+    return _REPEATS.sub(r"\1\1\1", text)
+
+class BatchedTextModel:
+    """
+    Wraps a Hugging Face pipeline (or compatible callable) with dedup,
+    truncation and length-bucketed batching.
+
+    Args:
+        model: the pipeline to call
+        batch_size: texts per forward pass
+        max_length: model token limit passed to the tokenizer
+        cache_size: normalized texts remembered across calls (0 disables)
+        call: optional fn(model, batch) for pipelines needing extra
+            arguments, e.g. zero-shot candidate labels
+        fallback: result used for a batch the model fails on
+        name: metrics name prefix
+    """
+    # Rough upper bound on characters per token, used to cut very long
+    # texts before tokenization; the tokenizer still enforces max_length
+    CHARS_PER_TOKEN = 8
+
+    def __init__(self, model, batch_size: int = 32, max_length: int = 512, cache_size: int = 100_000,
+                 call: Optional[Callable] = None, fallback=None, name: str = "model"):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self.call = call or self._default_call
+        self.fallback = fallback
+        self.name = name
+        self._cache = OrderedDict()
+
+    def _default_call(self, model, batch):
+        return model(batch, batch_size=len(batch), truncation=True, max_length=self.max_length)
+
+    def _run_batch(self, batch: List[str]):
+        try:
+            with metrics.span(f"model.{self.name}"):
+                results = self.call(self.model, batch)
+            if isinstance(results, dict):
+                results = [results]
+            ok = True
+        except Exception as e:
+            print(f"Error running {self.name} model on a batch: {e}")
+            results = [self.fallback] * len(batch)
+            ok = False
+        metrics.count(f"model.{self.name}.calls")
+        metrics.count(f"model.{self.name}.texts", len(batch))
+        metrics.observe(f"model.{self.name}.batch_size", len(batch))
+        return results, ok
+
+    def __call__(self, texts: Sequence[str]) -> list:
+        """Return one model result per input text, in input order"""
+        keys = [normalize_text(text) for text in texts]
+
+        results = {}
+        pending = {}  # normalized key -> text sent to the model
+        for text, key in zip(texts, keys):
+            if key in results or key in pending:
+                continue
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                results[key] = self._cache[key]
+            else:
+                pending[key] = text[: self.max_length * self.CHARS_PER_TOKEN]
+        metrics.count(f"text.{self.name}.duplicates", len(texts) - len(pending))
+
+        # Sort by length so each batch holds similar lengths and pads little
+        ordered = sorted(pending, key=lambda key: len(pending[key]))
+        for start in range(0, len(ordered), self.batch_size):
+            batch_keys = ordered[start:start + self.batch_size]
+            batch_results, ok = self._run_batch([pending[key] for key in batch_keys])
+            for key, result in zip(batch_keys, batch_results):
+                results[key] = result
+                if self.cache_size and ok:
+                    self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+        return [results[key] for key in keys]
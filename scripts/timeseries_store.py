@@ -0,0 +1,308 @@
+"""
+Time-Series Snapshot Store for Profile and Post Metrics
+
+Every scrape overwrites {username}_profile.json; this store keeps the
+history. Each scrape appends one profile snapshot (followers, following,
+posts, engagement rate) and one snapshot per post (likes, comments,
+engagement rate) to the influencer's series files.
+
+Series files are append-only sequences of frames. A frame is a small header
+(record count, time range) followed by zlib-compressed, delta-encoded
+columns, so range queries skip frames outside the range without
+decompressing them. apply_policy() downsamples old points (raw, then one
+per day, then one per week), drops points past the retention limit and
+merges the frames of each series into one.
+"""
+import os
+import json
+import time
+import zlib
+import struct
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from scripts import instrumentation as metrics
+
+DAY = 86400
+
+# Column name -> dtype; integer columns are delta-encoded before compression
+PROFILE_COLUMNS = (
+    ("timestamp", "<i8"), ("followers", "<i8"), ("following", "<i8"),
+    ("posts_count", "<i8"), ("engagement_rate", "<f4")
+)
+POST_COLUMNS = (
+    ("timestamp", "<i8"), ("post", "<i4"), ("likes", "<i8"),
+    ("comments", "<i8"), ("engagement_rate", "<f4")
+)
+
+_HEADER = struct.Struct("<4sIIqq")  # magic, records, payload bytes, min and max timestamp
+_MAGIC = b"BXTS"
+
+@dataclass(frozen=True, slots=True)
+class RetentionPolicy:
+    """
+    How long each resolution is kept: every snapshot for raw_days, then the
+    last snapshot of each day until daily_days, then the last of each week.
+    Snapshots older than max_days (if set) are dropped.
+    """
+    raw_days: int = 30
+    daily_days: int = 365
+    max_days: Optional[int] = None
+
+def _timestamp(value) -> int:
+    if value is None:
+        return int(time.time())
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+def _encode_frame(columns_spec, columns: Dict[str, np.ndarray], names: Optional[List[str]] = None) -> bytes:
+    n = len(columns["timestamp"])
+    parts = []
+    if names is not None:
+        encoded = json.dumps(names, ensure_ascii=False).encode("utf-8")
+        parts.append(struct.pack("<I", len(encoded)) + encoded)
+    for name, dtype in columns_spec:
+        values = np.asarray(columns[name], dtype=dtype)
+        if values.dtype.kind == "i":
+            values = np.diff(values, prepend=values.dtype.type(0))
+        parts.append(values.astype(dtype).tobytes())
+    payload = zlib.compress(b"".join(parts), 6)
+    timestamps = columns["timestamp"]
+    return _HEADER.pack(_MAGIC, n, len(payload), int(np.min(timestamps)), int(np.max(timestamps))) + payload
+
+def _decode_frame(columns_spec, payload: bytes, n: int, with_names: bool):
+    data = zlib.decompress(payload)
+    offset = 0
+    names = None
+    if with_names:
+        (length,) = struct.unpack_from("<I", data, 0)
+        names = json.loads(data[4:4 + length].decode("utf-8"))
+        offset = 4 + length
+    columns = {}
+    for name, dtype in columns_spec:
+        dtype = np.dtype(dtype)
+        values = np.frombuffer(data, dtype=dtype, count=n, offset=offset)
+        offset += n * dtype.itemsize
+        columns[name] = np.cumsum(values, dtype=dtype) if dtype.kind == "i" else values.copy()
+    return columns, names
+
+class TimeSeriesStore:
+    """
+    Per-influencer profile and post metric history under `root`:
+    {username}.profile.ts and {username}.posts.ts
+    """
+    def __init__(self, root: str, policy: Optional[RetentionPolicy] = None):
+        self.root = root
+        self.policy = policy or RetentionPolicy()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, username: str, kind: str) -> str:
+        return os.path.join(self.root, f"{username}.{kind}.ts")
+
+    def usernames(self) -> List[str]:
+        suffix = ".profile.ts"
+        return sorted(f[:-len(suffix)] for f in os.listdir(self.root) if f.endswith(suffix))
+
+    # Writes
+
+    def record_profile(self, profile_data, timestamp=None):
+        """
+        Append a snapshot of a scraped profile and its posts. timestamp
+        defaults to now; pass the profile's scrape_date when backfilling.
+        """
+        username = profile_data["username"]
+        ts = _timestamp(timestamp)
+        profile_frame = _encode_frame(PROFILE_COLUMNS, {
+            "timestamp": [ts],
+            "followers": [profile_data.get("followers") or 0],
+            "following": [profile_data.get("following") or 0],
+            "posts_count": [profile_data.get("posts_count") or 0],
+            "engagement_rate": [profile_data.get("engagement_rate") or 0.0]
+        })
+
+        posts = profile_data.get("posts", [])
+        post_frame = None
+        if posts:
+            post_frame = _encode_frame(POST_COLUMNS, {
+                "timestamp": [ts] * len(posts),
+                "post": list(range(len(posts))),
+                "likes": [post.get("likes") or 0 for post in posts],
+                "comments": [post.get("comments") or 0 for post in posts],
+                "engagement_rate": [post.get("engagement_rate") or 0.0 for post in posts]
+            }, names=[post.get("post_id") or str(i) for i, post in enumerate(posts)])
+
+        with self._lock:
+            with open(self._path(username, "profile"), 'ab') as f:
+                f.write(profile_frame)
+            if post_frame:
+                with open(self._path(username, "posts"), 'ab') as f:
+                    f.write(post_frame)
+        metrics.count("timeseries.snapshots")
+        metrics.count("timeseries.post_snapshots", len(posts))
+
+    # Reads
+
+    def _read(self, username: str, kind: str, start=None, end=None):
+        columns_spec = PROFILE_COLUMNS if kind == "profile" else POST_COLUMNS
+        with_names = kind == "posts"
+        path = self._path(username, kind)
+        start = _timestamp(start) if start is not None else None
+        end = _timestamp(end) if end is not None else None
+
+        empty = {name: np.zeros(0, dtype=dtype) for name, dtype in columns_spec}
+        if with_names:
+            empty["post_id"] = np.zeros(0, dtype=object)
+        if not os.path.exists(path):
+            return empty
+
+        with metrics.span("timeseries.read"):
+            with open(path, 'rb') as f:
+                data = f.read()
+            frames = []
+            offset = 0
+            while offset + _HEADER.size <= len(data):
+                magic, n, size, min_ts, max_ts = _HEADER.unpack_from(data, offset)
+                if magic != _MAGIC:
+                    print(f"Corrupt time-series frame in {path} at byte {offset}; ignoring the rest")
+                    break
+                payload_start = offset + _HEADER.size
+                offset = payload_start + size
+                if (start is not None and max_ts < start) or (end is not None and min_ts > end):
+                    continue
+                columns, names = _decode_frame(columns_spec, data[payload_start:offset], n, with_names)
+                if with_names:
+                    columns["post_id"] = np.array(names, dtype=object)[columns.pop("post")]
+                frames.append(columns)
+
+        if not frames:
+            return empty
+        result = {name: np.concatenate([frame[name] for frame in frames]) for name in frames[0]}
+        keep = np.ones(len(result["timestamp"]), dtype=bool)
+        if start is not None:
+            keep &= result["timestamp"] >= start
+        if end is not None:
+            keep &= result["timestamp"] <= end
+        order = np.argsort(result["timestamp"][keep], kind="stable")
+        return {name: values[keep][order] for name, values in result.items()}
+
+    def profile_history(self, username: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Profile snapshots in [start, end] as columns sorted by timestamp"""
+        return self._read(username, "profile", start, end)
+
+    def post_history(self, username: str, post_id: Optional[str] = None, start=None, end=None) -> Dict[str, np.ndarray]:
+        """Post snapshots in [start, end] (optionally of one post) as columns sorted by timestamp"""
+        history = self._read(username, "posts", start, end)
+        if post_id is not None:
+            keep = history["post_id"] == post_id
+            history = {name: values[keep] for name, values in history.items()}
+        return history
+
+    def growth(self, usernames: Iterable[str], metric: str = "followers", start=None, end=None) -> Dict[str, tuple]:
+        """(timestamps, values) of one profile metric for many influencers"""
+        result = {}
+        for username in usernames:
+            history = self.profile_history(username, start, end)
+            if len(history["timestamp"]):
+                result[username] = (history["timestamp"], history[metric])
+        return result
+
+    # Maintenance
+
+    def _downsample(self, history, now: int, key_columns=()):
+        """Keep the last snapshot per (resolution bucket, keys), dropping expired ones"""
+        ts = history["timestamp"]
+        age = now - ts
+        keep = np.ones(len(ts), dtype=bool)
+        if self.policy.max_days is not None:
+            keep &= age <= self.policy.max_days * DAY
+
+        # Bucket ids: raw points keep their own (negative) id, older ones share a day or week
+        bucket = np.where(age < self.policy.daily_days * DAY, ts // DAY, ts // (7 * DAY) * 7)
+        bucket = np.where(age < self.policy.raw_days * DAY, -1 - np.arange(len(ts)), bucket)
+
+        keys = [bucket] + [history[column] for column in key_columns]
+        seen = set()
+        # Walk newest first so the last snapshot of each bucket wins
+        for i in range(len(ts) - 1, -1, -1):
+            if not keep[i]:
+                continue
+            key = tuple(k[i] for k in keys)
+            if key in seen:
+                keep[i] = False
+            else:
+                seen.add(key)
+        return {name: values[keep] for name, values in history.items()}
+
+    def _rewrite(self, path: str, frame: Optional[bytes]):
+        tmp_file = path + ".tmp"
+        if frame is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        with open(tmp_file, 'wb') as f:
+            f.write(frame)
+        os.replace(tmp_file, path)
+
+    def apply_policy(self, usernames: Optional[Iterable[str]] = None, now=None) -> Dict[str, int]:
+        """
+        Downsample and expire old snapshots and merge each series into one
+        frame. Returns the number of snapshots before and after.
+        """
+        now = _timestamp(now)
+        before = after = 0
+        for username in (usernames if usernames is not None else self.usernames()):
+            with self._lock:
+                profile = self._read(username, "profile")
+                posts = self._read(username, "posts")
+                before += len(profile["timestamp"]) + len(posts["timestamp"])
+
+                profile = self._downsample(profile, now)
+                posts = self._downsample(posts, now, key_columns=("post_id",))
+                after += len(profile["timestamp"]) + len(posts["timestamp"])
+
+                self._rewrite(self._path(username, "profile"),
+                              _encode_frame(PROFILE_COLUMNS, profile) if len(profile["timestamp"]) else None)
+                if len(posts["timestamp"]):
+                    names, post_index = np.unique(posts["post_id"].astype(str), return_inverse=True)
+                    posts["post"] = post_index
+                    frame = _encode_frame(POST_COLUMNS, posts, names=names.tolist())
+                else:
+                    frame = None
+                self._rewrite(self._path(username, "posts"), frame)
+        metrics.count("timeseries.compacted_away", before - after)
+        return {"before": before, "after": after}
+
+def backfill_from_profiles(data_dir: str, store: TimeSeriesStore, usernames=None) -> int:
+    """Record the current {username}_profile.json files as snapshots dated by their scrape_date"""
+    suffix = "_profile.json"
+    if usernames is None:
+        usernames = sorted(f[:-len(suffix)] for f in os.listdir(data_dir) if f.endswith(suffix))
+    recorded = 0
+    for username in usernames:
+        profile_file = os.path.join(data_dir, f"{username}{suffix}")
+        if not os.path.exists(profile_file):
+            continue
+        with open(profile_file, 'r', encoding='utf-8') as f:
+            profile_data = json.load(f)
+        store.record_profile(profile_data, timestamp=profile_data.get("scrape_date"))
+        recorded += 1
+    return recorded
+
+# Example usage
+if __name__ == "__main__":
+    from config import DATA_DIR
+
+    store = TimeSeriesStore(os.path.join(DATA_DIR, "timeseries"))
+    username = input("Enter Instagram username: ")
+    history = store.profile_history(username)
+    for ts, followers, rate in zip(history["timestamp"], history["followers"], history["engagement_rate"]):
+        day = datetime.fromtimestamp(int(ts), timezone.utc).strftime("%Y-%m-%d")
+        print(f"{day}: {followers:,} followers, {rate:.2f}% engagement")
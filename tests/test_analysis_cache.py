@@ -0,0 +1,47 @@
+import time
+import threading
+from scripts.analysis_cache import AnalysisCache, _age_bucket
+
+def test_fractional_ages_fall_in_a_bucket():
+    assert _age_bucket(17.4) == "13-17"
+    assert _age_bucket(17.99) == "13-17"
+    assert _age_bucket(18) == "18-25"
+    assert _age_bucket(25.5) == "18-25"
+    assert _age_bucket(26) == "26-35"
+    assert _age_bucket(45.9) == "36-45"
+    assert _age_bucket(46) == "46+"
+    assert _age_bucket(71.2) == "46+"
+
+def test_ages_below_13_have_no_bucket():
+    assert _age_bucket(12.9) is None
+    assert _age_bucket(None) is None
+
+def test_waiters_share_a_result_too_big_to_cache():
+    cache = AnalysisCache(max_bytes=10)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"username": "big", "posts": ["x" * 100]}
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_compute("big", "v1", compute)))
+    first.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_or_compute("big", "v1", compute)))
+               for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    # Let the waiters block on the computation before it finishes
+    time.sleep(0.2)
+    release.set()
+    for thread in [first, *waiters]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+    assert len(cache) == 0
@@ -0,0 +1,81 @@
+import random
+from scripts.category_cascade import CategoryCascade, LexiconClassifier, cascade_stats
+
+class FakeZeroShot:
+    """Zero-shot stand-in returning a fixed (label, score) per caption and recording its calls"""
+    def __init__(self, answers, default=("Lifestyle", 0.9)):
+        self.answers = answers
+        self.default = default
+        self.calls = []
+
+    def __call__(self, captions):
+        self.calls.append(list(captions))
+        results = []
+        for caption in captions:
+            label, score = self.answers.get(caption, self.default)
+            results.append({"labels": [label, "Other"], "scores": [score, 1 - score]})
+        return results
+
+CAPTIONS = [
+    "Fit check #ootd #streetstyle",        # lexicon: Fashion
+    "Leg day done #gymlife #fitfam",        # lexicon: Fitness
+    "Had a great weekend with friends",     # no votes: small model, confident
+    "New video is up, link in bio",         # no votes: small model unsure, full model
+    "#food and #travel in one trip",        # split votes: small model unsure, full model
+]
+
+def test_each_caption_stops_at_the_first_confident_tier():
+    small = FakeZeroShot({CAPTIONS[2]: ("Lifestyle", 0.8), CAPTIONS[3]: ("Tech", 0.3), CAPTIONS[4]: ("Food", 0.4)})
+    full = FakeZeroShot({CAPTIONS[3]: ("Entertainment", 0.7), CAPTIONS[4]: ("Travel", 0.6)})
+    cascade = CategoryCascade(full, small, small_threshold=0.5)
+    results = cascade(CAPTIONS)
+
+    assert [(r["label"], r["tier"]) for r in results] == [
+        ("Fashion", "lexicon"), ("Fitness", "lexicon"), ("Lifestyle", "small"),
+        ("Entertainment", "full"), ("Travel", "full")
+    ]
+    # Each model only sees what the cheaper tiers left over, in one batch
+    assert small.calls == [CAPTIONS[2:]]
+    assert full.calls == [CAPTIONS[3:]]
+    stats = cascade.stats()
+    assert stats["captions"] == 5
+    assert stats["shares"] == {"lexicon": 0.4, "small": 0.2, "full": 0.4}
+
+def test_without_a_small_model_unsure_captions_go_to_the_full_model():
+    full = FakeZeroShot({})
+    results = CategoryCascade(full)(CAPTIONS)
+
+    assert [r["tier"] for r in results] == ["lexicon", "lexicon", "full", "full", "full"]
+    assert full.calls == [CAPTIONS[2:]]
+
+def test_confident_lexicon_results_skip_the_models_entirely():
+    full = FakeZeroShot({})
+    small = FakeZeroShot({})
+    results = CategoryCascade(full, small)(CAPTIONS[:2])
+
+    assert all(r["tier"] == "lexicon" for r in results)
+    assert full.calls == [] and small.calls == []
+
+def test_audits_measure_agreement_with_the_full_model():
+    small = FakeZeroShot({CAPTIONS[2]: ("Lifestyle", 0.8)}, default=("Tech", 0.1))
+    # The full model agrees on Fashion and Lifestyle but not Fitness
+    full = FakeZeroShot({CAPTIONS[0]: ("Fashion", 0.9), CAPTIONS[1]: ("Health", 0.9),
+                         CAPTIONS[2]: ("Lifestyle", 0.9)})
+    cascade = CategoryCascade(full, small, audit_rate=1.0, rng=random.Random(0))
+    results = cascade(CAPTIONS)
+
+    # Audits never change the cheap tier's answer
+    assert results[1] == {"label": "Fitness", "score": 1.0, "tier": "lexicon"}
+    assert sorted(full.calls[0]) == sorted(CAPTIONS)
+    agreement = cascade.stats()["agreement"]
+    assert agreement["lexicon"] == {"audited": 2, "agreement": 0.5}
+    assert agreement["small"] == {"audited": 1, "agreement": 1.0}
+    assert agreement["overall"]["audited"] == 3
+
+def test_lexicon_respects_allowed_categories_and_stats_sum_over_profiles():
+    lexicon = LexiconClassifier(categories=["Fitness"])
+    assert lexicon("Fit check #ootd")[0] is None
+    assert lexicon("#gymlife")[0] == "Fitness"
+
+    stats = cascade_stats({"lexicon": 3, "small": 1, "full": 4})
+    assert stats["escalated_share"] == 0.5 and stats["agreement"] == {}
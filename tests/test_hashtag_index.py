@@ -0,0 +1,101 @@
+import random
+from collections import Counter
+from datetime import date, timedelta
+import numpy as np
+from scripts.hashtag_index import HashtagIndex, decode_deltas, encode_varint
+
+TAGS = [f"tag{i}" for i in range(25)]
+
+def test_varint_deltas_round_trip():
+    rng = np.random.default_rng(0)
+    ids = np.unique(rng.integers(0, 2**40, 5000))
+    buffer = bytearray()
+    previous = 0
+    for post_id in ids.tolist():
+        encode_varint(post_id - previous, buffer)
+        previous = post_id
+
+    assert np.array_equal(decode_deltas(buffer), ids)
+    assert len(decode_deltas(bytearray())) == 0
+
+def _profile(rng, username, n_posts, start=0):
+    day = date(2024, 1, 1)
+    return {"username": username, "posts": [
+        {"post_id": f"{username}/{i}",
+         "posted_on": (day + timedelta(days=rng.randrange(60))).isoformat(),
+         "hashtags": [f"#{tag}" for tag in rng.sample(TAGS, rng.randint(0, 5))]}
+        for i in range(start, start + n_posts)
+    ]}
+
+class _Model:
+    """Brute-force picture of the live posts"""
+    def __init__(self):
+        self.posts = {}
+
+    def add_profile(self, profile):
+        for post in profile["posts"]:
+            self.posts[post["post_id"]] = (profile["username"], {t.lstrip("#") for t in post["hashtags"]},
+                                           post["posted_on"])
+
+    def remove_influencer(self, username):
+        self.posts = {key: post for key, post in self.posts.items() if post[0] != username}
+
+    def postings(self, tag, since=None):
+        return sorted((user, key, day) for key, (user, tags, day) in self.posts.items()
+                      if tag in tags and (since is None or day >= since))
+
+    def cooccurring(self, tag):
+        return Counter(other for _, tags, _ in self.posts.values() if tag in tags for other in tags if other != tag)
+
+    def top_hashtags(self):
+        return Counter(tag for _, tags, _ in self.posts.values() for tag in tags)
+
+def _check(index, model):
+    for tag in TAGS:
+        assert sorted(index.postings(tag)) == model.postings(tag)
+        assert sorted(index.postings(tag, since="2024-02-01")) == model.postings(tag, since="2024-02-01")
+        users = Counter(user for user, _, _ in model.postings(tag))
+        assert dict(index.influencers_using(tag)) == dict(users)
+        assert dict(index.cooccurring(tag, k=len(TAGS))) == dict(model.cooccurring(tag))
+    assert dict(index.top_hashtags(k=len(TAGS))) == dict(model.top_hashtags())
+    assert len(index) == len(model.posts)
+
+def _updates(rng):
+    """Scrapes, re-scrapes with changed posts, and removals"""
+    updates = [("add", _profile(rng, f"creator_{u}", 30)) for u in range(8)]
+    updates += [("add", _profile(rng, f"creator_{u}", 10, start=25)) for u in range(0, 8, 2)]
+    updates += [("remove", "creator_3"), ("add", _profile(rng, "creator_3", 5, start=100))]
+    return updates
+
+def _apply(index, model, update):
+    op, record = update
+    if op == "add":
+        index.add_profile(record)
+        model.add_profile(record)
+    else:
+        index.remove_influencer(record)
+        model.remove_influencer(record)
+
+def test_queries_match_brute_force_after_updates():
+    rng = random.Random(0)
+    index, model = HashtagIndex(), _Model()
+    for update in _updates(rng):
+        _apply(index, model, update)
+    _check(index, model)
+
+def test_snapshot_plus_journal_replay_restores_the_index(tmp_path):
+    rng = random.Random(1)
+    state_file = str(tmp_path / "hashtags" / "index.npz")
+    index, model = HashtagIndex(state_file), _Model()
+    updates = _updates(rng)
+    for update in updates[:6]:
+        _apply(index, model, update)
+    index.save()
+    # Everything after the snapshot only lives in the journal
+    for update in updates[6:]:
+        _apply(index, model, update)
+
+    restored = HashtagIndex(state_file)
+    _check(restored, model)
+    # Re-adding unchanged posts after a restart indexes nothing new
+    assert restored.add_profile(updates[1][1]) == 0
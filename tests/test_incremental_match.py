@@ -0,0 +1,83 @@
+import random
+from dataclasses import replace
+from scripts.sponsor_match import match_indices
+from scripts.pricing_calculator import calculate_pricing
+from scripts.incremental_match import IncrementalMatcher
+from tests.test_sponsor_match import random_audience, random_brands, random_influencers
+
+def _events(rng, n=400):
+    """Random adds, updates and removals of brands and influencers"""
+    brands = random_brands(rng, 15)
+    influencers = random_influencers(rng, 60)
+    events = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.35:
+            events.append(("add_influencer", rng.choice(influencers)))
+        elif roll < 0.55:
+            base = rng.choice(influencers)
+            events.append(("update_influencer", replace(base, audience_stats=random_audience(rng),
+                                                         average_reach=rng.randint(1_000, 1_000_000))))
+        elif roll < 0.65:
+            events.append(("remove_influencer", rng.choice(influencers).name))
+        elif roll < 0.8:
+            events.append(("add_brand", rng.choice(brands)))
+        elif roll < 0.92:
+            events.append(("update_brand", replace(rng.choice(brands), target_audience=random_audience(rng),
+                                                   product_cost=rng.choice([200.0, 900.0]))))
+        else:
+            events.append(("remove_brand", rng.choice(brands).name))
+    return events
+
+def _rebuilt(matcher):
+    """Matches from a full rebuild over the matcher's current brands and influencers"""
+    brands = list(matcher.brands.values())
+    influencers = list(matcher.influencers.values())
+    return {
+        brands[b].name: {influencers[i].name: calculate_pricing(brands[b], influencers[i]) for i in rows.tolist()}
+        for b, rows in match_indices(brands, influencers).items()
+    }
+
+def _current(matcher):
+    return {name: dict(pairs) for name, pairs in matcher.matches.items()}
+
+def test_incremental_matches_equal_a_full_rebuild():
+    rng = random.Random(0)
+    matcher = IncrementalMatcher()
+    pairs = {}
+
+    def follow(event):
+        key = (event.brand, event.influencer)
+        if event.kind == "removed":
+            del pairs[key]
+        else:
+            pairs[key] = event.pricing
+    matcher.subscribe(follow)
+
+    for n, (op, record) in enumerate(_events(rng)):
+        getattr(matcher, op)(record)
+        if n % 50 == 0:
+            assert _current(matcher) == _rebuilt(matcher)
+    assert _current(matcher) == _rebuilt(matcher)
+    # The event stream alone reconstructs the match set
+    assert pairs == {(b, i): pricing for b, brand_pairs in _rebuilt(matcher).items()
+                     for i, pricing in brand_pairs.items()}
+    for name in matcher.influencers:
+        assert set(matcher.matches_for_influencer(name)) == {b for b, i in pairs if i == name}
+
+def test_snapshot_plus_journal_replay_restores_the_matcher(tmp_path):
+    rng = random.Random(1)
+    state_file = str(tmp_path / "match_state.json")
+    matcher = IncrementalMatcher(state_file)
+    events = _events(rng, 300)
+    for op, record in events[:150]:
+        getattr(matcher, op)(record)
+    matcher.save()
+    # Everything after the snapshot only lives in the journal
+    for op, record in events[150:]:
+        getattr(matcher, op)(record)
+
+    restored = IncrementalMatcher(state_file)
+    assert restored.brands == matcher.brands
+    assert restored.influencers == matcher.influencers
+    assert _current(restored) == _current(matcher) == _rebuilt(restored)
@@ -0,0 +1,64 @@
+import numpy as np
+from scripts.lookalike import LookalikeIndex, RETRAIN_GROWTH, normalize
+
+def _vectors(n, dim=64, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((20, dim), dtype=np.float32)
+    return normalize(centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, dim), dtype=np.float32))
+
+def _names(start, stop):
+    return [f"creator_{i}" for i in range(start, stop)]
+
+def _exact_top(vectors, query, k):
+    return set(np.argsort(-(vectors @ query))[:k].tolist())
+
+def test_small_ivfpq_index_stays_flat_and_exact():
+    vectors = _vectors(150)
+    index = LookalikeIndex(64, "ivfpq", nlist=100, m=8)
+    index.add(_names(0, 150), vectors)
+
+    assert not index.is_trained
+    found = {int(name.split("_")[1]) for name, _ in index.search(vectors[0], k=10)[0]}
+    assert found == _exact_top(vectors, vectors[0], 10)
+
+def test_ivf_index_trains_once_big_enough_and_retrains_as_it_grows():
+    vectors = _vectors(2000)
+    index = LookalikeIndex(64, "ivfflat", nlist=10, nprobe=10)
+    index.add(_names(0, 300), vectors[:300])
+    assert not index.is_trained
+
+    index.add(_names(300, 400), vectors[300:400])
+    assert index.is_trained and index.options["trained_on"] == 400
+
+    index.add(_names(400, 2000), vectors[400:])
+    assert index.options["trained_on"] == 2000 > RETRAIN_GROWTH * 400
+    assert len(index) == 2000
+    # Every cell probed: IVF-flat search is exact
+    for i in (0, 999, 1999):
+        found = {int(name.split("_")[1]) for name, _ in index.search(vectors[i], k=10)[0]}
+        assert found == _exact_top(vectors, vectors[i], 10)
+
+def test_ivfpq_trains_with_enough_vectors_for_the_codebooks():
+    vectors = _vectors(700)
+    index = LookalikeIndex(64, "ivfpq", nlist=4, m=8, nbits=4)
+    index.add(_names(0, 600), vectors[:600])
+    assert not index.is_trained
+    index.add(_names(600, 700), vectors[600:])
+    assert index.is_trained and len(index) == 700
+
+def test_save_and_load_keep_pending_and_trained_state(tmp_path):
+    vectors = _vectors(500)
+    path = str(tmp_path / "lookalike.index")
+    index = LookalikeIndex(64, "ivfflat", nlist=10, nprobe=10)
+    index.add(_names(0, 100), vectors[:100])
+    index.save(path)
+
+    loaded = LookalikeIndex.load(path)
+    assert not loaded.is_trained and len(loaded) == 100
+    loaded.add(_names(100, 500), vectors[100:])
+    assert loaded.is_trained
+    loaded.save(path)
+
+    reloaded = LookalikeIndex.load(path)
+    assert reloaded.is_trained and reloaded.options["trained_on"] == 500
+    assert reloaded.lookalikes("creator_7", k=5) == loaded.lookalikes("creator_7", k=5)
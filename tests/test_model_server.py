@@ -0,0 +1,98 @@
+import os
+import stat
+import time
+import tempfile
+import threading
+import pytest
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+
+pytest.importorskip("transformers")
+
+from benchmarks.stub_models import (
+    StubSentimentPipeline, StubZeroShotPipeline, StubLanguagePipeline, StubEmbeddingPipeline
+)
+from scripts import model_server
+from scripts.model_server import ModelServer, RemoteModel
+
+STUBS = {
+    "sentiment-analysis": StubSentimentPipeline,
+    "zero-shot-classification": StubZeroShotPipeline,
+    "text-classification": StubLanguagePipeline,
+    "feature-extraction": StubEmbeddingPipeline
+}
+LABELS = ["Fashion", "Food", "Travel", "Tech"]
+
+class RecordingPipeline:
+    """Stub pipeline that remembers the size of every batch it was called with"""
+    def __init__(self, stub):
+        self.stub = stub
+        self.batches = []
+
+    def __call__(self, texts, *args, **kwargs):
+        self.batches.append(len(texts))
+        return self.stub(texts, *args, **kwargs)
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.delenv(model_server.KEY_ENV, raising=False)
+    monkeypatch.setattr(model_server, "pipeline", lambda task, model=None: RecordingPipeline(STUBS[task]()))
+    # Unix socket paths are limited to ~100 bytes, so stay out of pytest's long tmp dirs.
+    # The listener unlinks its socket at interpreter exit, so only the key is removed here
+    server = ModelServer(os.path.join(tempfile.mkdtemp(dir="/tmp"), "models.sock"), max_batch=64, max_wait_ms=100)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    deadline = time.time() + 10
+    while not os.path.exists(server.address):
+        assert time.time() < deadline, "model server did not start"
+        time.sleep(0.01)
+    yield server
+    os.remove(server.address + ".key")
+
+def test_socket_and_key_are_owner_only(server):
+    assert stat.S_IMODE(os.stat(server.address).st_mode) == 0o600
+    assert stat.S_IMODE(os.stat(server.address + ".key").st_mode) == 0o600
+
+def test_wrong_key_is_rejected(server):
+    with pytest.raises(AuthenticationError):
+        Client(server.address, family="AF_UNIX", authkey=b"not-the-key")
+    # The server keeps accepting clients with the right key
+    assert RemoteModel("sentiment", server.address)._request({"op": "ping"}) == []
+
+def test_single_inputs_match_local_pipelines(server):
+    text = "Loved this new cafe in town"
+    assert RemoteModel("sentiment", server.address)(text) == StubSentimentPipeline()(text)
+    assert RemoteModel("language", server.address)(text) == StubLanguagePipeline()(text)
+    assert RemoteModel("category", server.address)(text, candidate_labels=LABELS) == \
+        StubZeroShotPipeline()(text, candidate_labels=LABELS)
+    assert RemoteModel("embedding", server.address)(text) == StubEmbeddingPipeline()(text)
+
+def test_concurrent_requests_are_batched_and_routed_back(server):
+    sentiment = RemoteModel("sentiment", server.address)
+    category = RemoteModel("category", server.address)
+    requests = {n: [f"caption {n} part {k}" for k in range(n % 4 + 1)] for n in range(16)}
+    results = {}
+    start = threading.Barrier(len(requests))
+
+    def client(n):
+        start.wait()
+        if n % 2:
+            results[n] = category(requests[n], candidate_labels=LABELS)
+        else:
+            results[n] = sentiment(requests[n])
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for n, texts in requests.items():
+        if n % 2:
+            assert results[n] == StubZeroShotPipeline()(texts, candidate_labels=LABELS)
+        else:
+            assert results[n] == StubSentimentPipeline()(texts)
+
+    # Requests from different clients shared model calls
+    batches = server._models["sentiment"].batches
+    assert sum(batches) == sum(len(requests[n]) for n in requests if n % 2 == 0)
+    assert len(batches) < len(requests) // 2
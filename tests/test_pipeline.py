@@ -0,0 +1,81 @@
+import time
+import threading
+from scripts.pipeline import Pipeline, Stage
+
+def _double(n):
+    return n * 2
+
+def _fail_on_seven(n):
+    if n == 14:
+        raise ValueError("bad item")
+    return n
+
+def test_every_item_comes_out_once_with_failures_attributed():
+    seen_downstream = []
+
+    def drop_multiples_of_five(n):
+        return None if n % 5 == 0 else n
+
+    def record(n):
+        seen_downstream.append(n)
+        return n
+
+    pipeline = Pipeline([
+        Stage("filter", drop_multiples_of_five, workers=3),
+        Stage("raise", lambda n: 1 / 0 if n == 3 else n, workers=2),
+        Stage("record", record)
+    ], queue_size=2)
+    results = {item: (ok, extra) for item, ok, _, extra in pipeline.run(range(1, 31))}
+
+    assert sorted(results) == list(range(1, 31))
+    for n in (5, 10, 15, 20, 25, 30):
+        assert results[n] == (False, {"failed_stage": "filter"})
+    assert results[3][0] is False
+    assert results[3][1]["failed_stage"] == "raise" and "division by zero" in results[3][1]["error"]
+    # Failed items never reach later stages
+    assert sorted(seen_downstream) == [n for n in range(1, 31) if n % 5 and n != 3]
+    stats = {s["stage"]: s for s in pipeline.stats()}
+    assert (stats["filter"]["processed"], stats["filter"]["failed"]) == (24, 6)
+    assert (stats["raise"]["processed"], stats["raise"]["failed"]) == (23, 1)
+    assert stats["record"]["processed"] == 23
+
+def test_full_queue_blocks_the_upstream_stage():
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, peak: produced but not yet picked up downstream
+
+    def produce(n):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        return n
+
+    def consume(n):
+        with lock:
+            in_flight[0] -= 1
+        time.sleep(0.01)
+        return n
+
+    pipeline = Pipeline([Stage("produce", produce, workers=2), Stage("consume", consume)], queue_size=3)
+    assert all(ok for _, ok, _, _ in pipeline.run(range(1, 41)))
+
+    # At most a full queue, one item per blocked producer and the one being handed over
+    assert in_flight[1] <= 3 + 2 + 1
+    stats = {s["stage"]: s for s in pipeline.stats()}
+    assert stats["produce"]["blocked_seconds"] > 0.1
+    assert stats["consume"]["max_queue_depth"] <= 3
+
+def test_process_stages_run_and_report_errors():
+    pipeline = Pipeline([
+        Stage("double", _double, workers=2, processes=True),
+        Stage("check", _fail_on_seven, workers=2, processes=True)
+    ])
+    results = {item: (ok, extra) for item, ok, _, extra in pipeline.run(range(1, 11))}
+
+    assert [item for item, (ok, _) in results.items() if not ok] == [7]
+    assert results[7][1] == {"failed_stage": "check", "error": "bad item"}
+
+def test_in_process_initializer_runs_once():
+    calls = []
+    pipeline = Pipeline([Stage("noop", lambda n: n, workers=4, initializer=calls.append, initargs=("init",))])
+    assert len(list(pipeline.run(range(1, 9)))) == 8
+    assert calls == ["init"]
@@ -0,0 +1,52 @@
+import numpy as np
+from scripts.sponsor_match import Brand, Influencer, InfluencerTable, match_indices
+from scripts.pricing_simulation import MonteCarloPricer, get_matches_with_simulated_pricing
+
+BRAND = Brand("Acme", "Food", {"age": "18-25", "location": "IN"}, 500.0, 20.0)
+
+def _influencers(n):
+    return [Influencer(f"creator_{i}", "Food", {"age": ("18-25", "26-35")[i % 2], "location": "IN"},
+                       1000 * (i + 1), 2.0 + i % 3) for i in range(n)]
+
+def test_empty_influencer_table_prices_nothing():
+    pricer = MonteCarloPricer(seed=0)
+
+    assert pricer.conversion_percentiles(np.zeros(0), np.zeros(0)).shape == (0, 3)
+    brand_rows, influencer_rows, prices = pricer.price_matches([BRAND], [])
+    assert len(brand_rows) == len(influencer_rows) == 0
+    assert all(len(values) == 0 for values in prices.values())
+    assert get_matches_with_simulated_pricing([BRAND], [], pricer=pricer) == {BRAND: {}}
+
+def test_engagement_stats_match_the_history():
+    influencers = _influencers(4)
+    history = {"creator_0": [2.0, 4.0, 6.0], "creator_1": [3.0]}
+    mean, std = MonteCarloPricer().engagement_stats(InfluencerTable.from_influencers(influencers), history)
+
+    assert np.allclose(mean, [0.04, 0.03, 0.04, 0.02])
+    assert np.isclose(std[0], np.std([0.02, 0.04, 0.06]))
+    # A single post or no history: half the mean
+    assert np.allclose(std[1:], mean[1:] * 0.5)
+
+def test_percentiles_are_ordered_and_shared_per_bucket():
+    pricer = MonteCarloPricer(seed=0)
+    per_unit = pricer.conversion_percentiles(np.array([0.05, 0.05, 0.2]), np.array([0.01, 0.01, 0.05]))
+
+    assert np.all(np.diff(per_unit, axis=1) >= 0)
+    assert np.array_equal(per_unit[0], per_unit[1])
+    assert len(pricer._cache) == 2
+    # Engagement x conversion centres on the product of the means
+    assert abs(per_unit[0, 1] - 0.05 * 0.02) < 0.0005
+
+def test_matched_pairs_are_priced_from_reach_and_brand_value():
+    influencers = _influencers(6)
+    pricer = MonteCarloPricer(seed=1)
+    brand_rows, influencer_rows, prices = pricer.price_matches([BRAND], influencers)
+
+    assert influencer_rows.tolist() == match_indices([BRAND], influencers)[0].tolist() == [0, 2, 4]
+    mean, std = pricer.engagement_stats(InfluencerTable.from_influencers(influencers))
+    per_unit = pricer.conversion_percentiles(mean, std)[influencer_rows]
+    reach = np.array([influencers[i].average_reach for i in influencer_rows])
+    expected = np.round(reach[:, None] * 500.0 * 1.2 * per_unit, 2)
+    assert np.allclose(prices["p10_price"], expected[:, 0])
+    assert np.allclose(prices["recommended_price"], expected[:, 1])
+    assert np.allclose(prices["max_price"], expected[:, 2])
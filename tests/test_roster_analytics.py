@@ -0,0 +1,95 @@
+import os
+import json
+import random
+import numpy as np
+from scripts import instrumentation as metrics
+from scripts.roster_analytics import RosterAnalytics, follower_tier
+
+CATEGORIES = ["Food", "Travel", "Tech"]
+
+def _analysis(rng, username, with_comments=True):
+    categories = {category: rng.randint(0, 10) for category in CATEGORIES}
+    categories[rng.choice(CATEGORIES)] += 11
+    return {
+        "username": username,
+        "basic_metrics": {"followers": rng.choice([5_000, 50_000, 300_000]) + rng.randint(0, 4000),
+                          "engagement_rate": round(rng.uniform(0.5, 9.0), 3)},
+        "content_analysis": {
+            "categories": categories,
+            "sentiment": {"positive": rng.randint(0, 20), "neutral": rng.randint(0, 10), "negative": rng.randint(0, 5)},
+            "comment_sentiment": ({"positive": rng.randint(1, 50), "negative": rng.randint(0, 20)}
+                                  if with_comments else {})
+        }
+    }
+
+def _write(data_dir, analysis):
+    with open(os.path.join(data_dir, f"{analysis['username']}_analysis.json"), 'w', encoding='utf-8') as f:
+        json.dump(analysis, f)
+
+def _roster(tmp_path, n, seed=0, with_comments=lambda i: True):
+    rng = random.Random(seed)
+    analyses = [_analysis(rng, f"creator_{i}", with_comments(i)) for i in range(n)]
+    for analysis in analyses:
+        _write(str(tmp_path), analysis)
+    return analyses
+
+def test_percentiles_match_exact_ranks_within_the_group(tmp_path):
+    analyses = _roster(tmp_path, 600)
+    roster = RosterAnalytics(data_dir=str(tmp_path), min_peers=5)
+    frame = roster.frame()
+
+    for analysis in analyses[:50]:
+        context = roster.context(analysis)
+        result = context["metrics"]["engagement_rate"]
+        peers = frame[(frame["tier"] == context["tier"]) & (frame["category"] == context["category"])]
+        assert result["group"] == f"tier={context['tier']}|category={context['category']}"
+        assert result["peers"] == len(peers)
+        # Exact percentile rank (ties at the midpoint) vs the 101-point grid
+        values = peers["engagement_rate"].to_numpy()
+        value = analysis["basic_metrics"]["engagement_rate"]
+        exact = ((values < value).sum() + 0.5 * ((values == value).sum() - 1)) / (len(values) - 1) * 100
+        assert abs(result["percentile"] - exact) <= 100 / (len(values) - 1) + 1
+        assert result["median"] == np.quantile(values, 0.5).round(6)
+
+def test_peers_count_only_influencers_with_a_value(tmp_path):
+    # Most influencers have no comments, so comment sentiment has few peers per group
+    analyses = _roster(tmp_path, 200, seed=1, with_comments=lambda i: i % 10 == 0)
+    roster = RosterAnalytics(data_dir=str(tmp_path), min_peers=5)
+    frame = roster.frame()
+
+    for analysis in analyses[:40]:
+        context = roster.context(analysis)
+        for metric, result in context["metrics"].items():
+            parts = dict(part.split("=") for part in result["group"].split("|")) if result["group"] != "all" else {}
+            group = frame
+            for column, value in parts.items():
+                group = group[group[column] == value]
+            assert result["peers"] == group[metric].notna().sum() >= 5
+        if "comment_positive_share" in context["metrics"]:
+            # Too few tier/category peers with comments: a broader group was used
+            assert context["metrics"]["comment_positive_share"]["group"] != \
+                f"tier={context['tier']}|category={context['category']}"
+
+def test_refresh_rereads_only_changed_analyses(tmp_path):
+    rng = random.Random(2)
+    _roster(tmp_path, 30, seed=2)
+    RosterAnalytics(data_dir=str(tmp_path)).refresh()
+
+    metrics.enable()
+    metrics.reset()
+    try:
+        changed = _analysis(rng, "creator_3")
+        changed["basic_metrics"]["followers"] = 2_000_000
+        _write(str(tmp_path), changed)
+        os.remove(os.path.join(str(tmp_path), "creator_4_analysis.json"))
+
+        roster = RosterAnalytics(data_dir=str(tmp_path)).refresh()
+        assert metrics.snapshot()["counters"]["roster.rows_loaded"] == 1
+    finally:
+        metrics.reset()
+        metrics.enable(False)
+
+    frame = roster.frame().set_index("username")
+    assert len(frame) == 29 and "creator_4" not in frame.index
+    assert frame.loc["creator_3", "tier"] == follower_tier(2_000_000) == "mega"
+    assert roster.stats["influencers"] == 29
@@ -0,0 +1,55 @@
+import sqlite3
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from scripts.run_state import RunState
+
+def test_steps_work_on_a_fresh_database_without_setup(tmp_path):
+    state = RunState(str(tmp_path / "new" / "run_state.db"))
+    state.set_step("step_2_data_analysis", "completed")
+
+    assert state.steps()["step_2_data_analysis"] == "completed"
+
+def test_initialize_enables_wal(tmp_path):
+    path = str(tmp_path / "run_state.db")
+    RunState(path).initialize()
+
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def _record(path, run_id, worker, items):
+    state = RunState(path)
+    for i in range(items):
+        with state.track("analyze", f"creator_{worker}_{i}", run_id) as task:
+            task.ok = i % 5 != 0
+
+def test_concurrent_threads_and_processes_lose_no_updates(tmp_path):
+    path = str(tmp_path / "run_state.db")
+    state = RunState(path).initialize()
+    run_id = state.start_run("analyze")
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_record, args=(path, run_id, worker, 50)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda worker: _record(path, run_id, worker, 50), range(4, 8)))
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    state.finish_run(run_id)
+
+    [summary] = state.stage_summary(run_id)
+    assert (summary["completed"], summary["failed"], summary["running"]) == (320, 80, 0)
+    assert state.item_status("creator_6_3")["analyze"]["status"] == "completed"
+    assert state.item_status("creator_1_5")["analyze"]["status"] == "failed"
+    assert state.runs()[0]["status"] == "completed"
+
+def test_failed_items_record_the_exception(tmp_path):
+    state = RunState(str(tmp_path / "run_state.db"))
+    run_id = state.start_run("collect")
+    try:
+        with state.track("collect", "creator", run_id):
+            raise RuntimeError("rate limited")
+    except RuntimeError:
+        pass
+
+    assert state.item_status("creator")["collect"]["error"] == "RuntimeError: rate limited"
@@ -0,0 +1,44 @@
+import random
+from statistics import NormalDist
+from scripts.sentiment_sampling import estimate_comment_sentiment, stratified_estimate
+
+Z95 = NormalDist().inv_cdf(0.975)
+
+def _classify(texts):
+    return list(texts)
+
+def test_many_small_posts_are_not_skipped():
+    # 9000 positive comments on 3 posts, 6000 negative ones on 2000 posts
+    posts = [["positive"] * 3000 for _ in range(3)] + [["negative"] * 3 for _ in range(2000)]
+    result = estimate_comment_sentiment(posts, _classify, rng=random.Random(0))
+
+    assert abs(sum(result["shares"].values()) - 1) < 1e-9
+    for category, truth in (("positive", 0.6), ("negative", 0.4), ("neutral", 0.0)):
+        assert abs(result["shares"][category] - truth) <= result["margin_of_error"][category] + 1e-9
+    assert not result["exact"]
+
+def test_known_shares_covered_at_confidence_level():
+    rng = random.Random(1)
+    posts = [[rng.choice(("positive", "positive", "neutral", "negative")) for _ in range(rng.randint(0, 400))]
+             for _ in range(60)]
+    comments = [c for post in posts for c in post]
+    truth = {c: comments.count(c) / len(comments) for c in ("positive", "neutral", "negative")}
+
+    covered = {category: 0 for category in truth}
+    runs = 200
+    for seed in range(runs):
+        result = estimate_comment_sentiment(posts, _classify, margin=0.05, rng=random.Random(seed))
+        assert result["sampled"] < result["total"]
+        for category, share in truth.items():
+            covered[category] += abs(result["shares"][category] - share) <= result["margin_of_error"][category]
+    # 95% intervals; allow for sampling noise over 200 runs
+    for category in truth:
+        assert covered[category] / runs >= 0.9
+
+def test_uncovered_strata_widen_the_margin():
+    # Half the comments sit in a stratum that hasn't been sampled yet
+    estimate = stratified_estimate([100, 100], [["positive"] * 100, []], Z95)
+
+    assert estimate["positive"]["share"] == 1.0
+    assert abs(sum(e["share"] for e in estimate.values()) - 1) < 1e-9
+    assert abs(estimate["positive"]["margin"] - Z95 * 0.25) < 1e-9
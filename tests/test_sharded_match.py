@@ -0,0 +1,37 @@
+import os
+import random
+import numpy as np
+from scripts.sponsor_match import Brand, get_matches_with_pricing, match_indices
+from scripts.sharded_match import get_matches_with_pricing_sharded, iter_sharded_matches
+from tests.test_sponsor_match import random_brands, random_influencers
+
+def _shared_blocks():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")} if os.path.isdir("/dev/shm") else set()
+
+def test_sharded_matches_equal_single_process():
+    rng = random.Random(0)
+    influencers = random_influencers(rng, 400)
+    brands = random_brands(rng, 30) + [Brand("niche", "Food", {"language": "hi"}, 500.0, 20.0)]
+    before = _shared_blocks()
+
+    expected = get_matches_with_pricing(brands, influencers)
+    for processes, shard_size in ((2, None), (3, 1), (2, 100)):
+        sharded = get_matches_with_pricing_sharded(brands, influencers, processes=processes, shard_size=shard_size)
+        assert list(sharded) == list(expected)
+        assert sharded == expected
+    # Every shared block is unlinked once the pool is done
+    assert _shared_blocks() <= before
+
+def test_every_brand_is_yielded_once_with_its_rows():
+    rng = random.Random(1)
+    influencers = random_influencers(rng, 200)
+    brands = random_brands(rng, 25)
+    expected = match_indices(brands, influencers)
+
+    seen = {}
+    for b, rows, prices in iter_sharded_matches(brands, influencers, processes=2, shard_size=4):
+        assert b not in seen
+        seen[b] = rows
+        assert all(len(values) == len(rows) for values in prices.values())
+    assert set(seen) == set(expected)
+    assert all(np.array_equal(seen[b], expected[b]) for b in expected)
@@ -0,0 +1,63 @@
+import random
+from scripts.sponsor_match import (
+    DEFAULT_SCORE_WEIGHTS, Brand, Influencer, InfluencerTable, brand_match_mask, influencer_base_scores,
+    is_match, rank_indices
+)
+
+AUDIENCE = {"age": ["18-25", "26-35"], "gender": ["male", "female"], "location": ["IN", "US"]}
+
+def random_audience(rng):
+    """Audience dict with a random subset of keys set"""
+    return {key: rng.choice(values) for key, values in AUDIENCE.items() if rng.random() < 0.7}
+
+def random_influencers(rng, n, prefix="creator"):
+    return [Influencer(f"{prefix}_{i}", rng.choice(["Food", "Tech"]), random_audience(rng),
+                       rng.randint(1_000, 1_000_000), round(rng.uniform(0.5, 8.0), 2)) for i in range(n)]
+
+def random_brands(rng, n, prefix="brand"):
+    return [Brand(f"{prefix}_{i}", rng.choice(["Food", "Tech"]), random_audience(rng),
+                  rng.choice([200.0, 800.0, 1500.0]), rng.choice([10.0, 20.0, 40.0])) for i in range(n)]
+
+def test_is_match_agrees_with_brand_match_mask():
+    rng = random.Random(0)
+    influencers = random_influencers(rng, 300)
+    table = InfluencerTable.from_influencers(influencers)
+    for brand in random_brands(rng, 60):
+        mask = brand_match_mask(brand.target_audience, table)
+        assert mask.tolist() == [is_match(brand, influencer) for influencer in influencers]
+        # Also on one-row tables, where audience keys absent from the row are absent from the table
+        for influencer in influencers[:40]:
+            one_row = brand_match_mask(brand.target_audience, InfluencerTable.from_influencers([influencer]))
+            assert bool(one_row[0]) == is_match(brand, influencer)
+
+def _full_sort_ranking(brand, influencers, k, weights):
+    """Score every influencer and sort, the brute-force form of rank_indices"""
+    table = InfluencerTable.from_influencers(influencers)
+    weights = {**DEFAULT_SCORE_WEIGHTS, **(weights or {})}
+    base = influencer_base_scores(table, weights)
+    total_max = sum(weights.get(key, 1.0) for key in brand.target_audience) + weights["reach"] + weights["engagement"]
+    scores = [
+        base[row] + sum(weights.get(key, 1.0) for key, value in brand.target_audience.items()
+                        if influencer.audience_stats.get(key) == value)
+        for row, influencer in enumerate(influencers)
+    ]
+    order = sorted(range(len(influencers)), key=lambda row: (-scores[row], row))[:k]
+    return [(row, scores[row] / total_max) for row in order]
+
+def test_heap_top_k_equals_a_full_sort():
+    rng = random.Random(2)
+    influencers = random_influencers(rng, 500)
+    brands = random_brands(rng, 20)
+    for k, weights, block_size in ((10, None, 4096), (25, {"location": 3.0, "reach": 0.2}, 16), (1, None, 7)):
+        ranked = rank_indices(brands, influencers, k=k, weights=weights, block_size=block_size)
+        for b, brand in enumerate(brands):
+            expected = _full_sort_ranking(brand, influencers, k, weights)
+            assert [row for row, _ in ranked[b]] == [row for row, _ in expected]
+            assert all(abs(score - want) < 1e-9 for (_, score), (_, want) in zip(ranked[b], expected))
+
+def test_top_k_handles_small_and_empty_rosters():
+    rng = random.Random(3)
+    brands = random_brands(rng, 3)
+    assert all(len(shortlist) == 4 for shortlist in rank_indices(brands, random_influencers(rng, 4), k=10).values())
+    assert rank_indices(brands, [], k=10) == {0: [], 1: [], 2: []}
+    assert rank_indices(brands, random_influencers(rng, 4), k=0) == {0: [], 1: [], 2: []}
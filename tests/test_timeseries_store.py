@@ -0,0 +1,100 @@
+import random
+import numpy as np
+from scripts.timeseries_store import DAY, RetentionPolicy, TimeSeriesStore
+
+NOW = 1_750_000_000
+
+def _snapshots(rng, n):
+    """Profiles scraped at distinct random times over the last two years, in random order"""
+    times = rng.sample(range(NOW - 730 * DAY, NOW, 3600), n)
+    snapshots = []
+    for ts in times:
+        snapshots.append((ts, {
+            "username": "creator",
+            "followers": rng.randint(0, 5_000_000),
+            "following": rng.randint(0, 2000),
+            "posts_count": rng.randint(0, 3000),
+            "engagement_rate": round(rng.uniform(0, 12), 2),
+            "posts": [{"post_id": f"p{i}", "likes": rng.randint(0, 10**6), "comments": rng.randint(0, 10**4),
+                       "engagement_rate": round(rng.uniform(0, 12), 2)} for i in range(rng.randint(0, 4))]
+        }))
+    return snapshots
+
+def _store(tmp_path, snapshots, policy=None):
+    store = TimeSeriesStore(str(tmp_path / "timeseries"), policy)
+    for ts, profile in snapshots:
+        store.record_profile(profile, timestamp=ts)
+    return store
+
+def _expected_profile(snapshots, start=None, end=None):
+    rows = sorted((ts, p["followers"], p["engagement_rate"]) for ts, p in snapshots
+                  if (start is None or ts >= start) and (end is None or ts <= end))
+    return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+
+def test_profile_history_round_trips_and_filters_by_range(tmp_path):
+    rng = random.Random(0)
+    snapshots = _snapshots(rng, 200)
+    store = _store(tmp_path, snapshots)
+
+    for start, end in ((None, None), (NOW - 100 * DAY, None), (None, NOW - 400 * DAY), (NOW - 300 * DAY, NOW - 200 * DAY)):
+        history = store.profile_history("creator", start, end)
+        timestamps, followers, rates = _expected_profile(snapshots, start, end)
+        assert history["timestamp"].tolist() == timestamps
+        assert history["followers"].tolist() == followers
+        assert np.allclose(history["engagement_rate"], rates, atol=1e-4)
+
+def test_post_history_per_post(tmp_path):
+    rng = random.Random(1)
+    snapshots = _snapshots(rng, 50)
+    store = _store(tmp_path, snapshots)
+
+    expected = sorted((ts, post["likes"]) for ts, p in snapshots for post in p["posts"] if post["post_id"] == "p1")
+    history = store.post_history("creator", "p1")
+    assert list(zip(history["timestamp"].tolist(), history["likes"].tolist())) == expected
+    assert store.post_history("unknown")["timestamp"].tolist() == []
+
+def _expected_after_policy(snapshots, policy):
+    """Brute-force retention: newest snapshot per day or week bucket, by age"""
+    kept = {}
+    for ts, profile in sorted(snapshots):
+        age = NOW - ts
+        if policy.max_days is not None and age > policy.max_days * DAY:
+            continue
+        if age < policy.raw_days * DAY:
+            key = ("raw", ts)
+        elif age < policy.daily_days * DAY:
+            key = ("day", ts // DAY)
+        else:
+            key = ("week", ts // (7 * DAY))
+        kept[key] = (ts, profile["followers"])
+    return sorted(kept.values())
+
+def test_apply_policy_keeps_the_newest_snapshot_per_bucket(tmp_path):
+    rng = random.Random(2)
+    # Dense recent history so several snapshots share a day or week
+    snapshots = _snapshots(rng, 3000)
+    for policy in (RetentionPolicy(raw_days=30, daily_days=365), RetentionPolicy(raw_days=7, daily_days=90, max_days=500)):
+        store = _store(tmp_path / str(policy.raw_days), snapshots, policy)
+        result = store.apply_policy(now=NOW)
+
+        history = store.profile_history("creator")
+        kept = list(zip(history["timestamp"].tolist(), history["followers"].tolist()))
+        assert kept == _expected_after_policy(snapshots, policy)
+        assert result["after"] < result["before"]
+        # Already compacted: a second pass changes nothing
+        again = store.apply_policy(now=NOW)
+        assert again["before"] == again["after"] == result["after"]
+
+def test_apply_policy_downsamples_posts_per_post(tmp_path):
+    rng = random.Random(3)
+    snapshots = _snapshots(rng, 1500)
+    store = _store(tmp_path, snapshots)
+    store.apply_policy(now=NOW)
+
+    policy = store.policy
+    for post_id in ("p0", "p2"):
+        with_post = [(ts, {"followers": post["likes"]}) for ts, p in snapshots
+                     for post in p["posts"] if post["post_id"] == post_id]
+        history = store.post_history("creator", post_id)
+        assert list(zip(history["timestamp"].tolist(), history["likes"].tolist())) == \
+            _expected_after_policy(with_post, policy)